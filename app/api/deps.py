@@ -1,11 +1,10 @@
 from fastapi import Depends, HTTPException, status
 from fastapi.security import OAuth2PasswordBearer
-from jose import JWTError, jwt
 from sqlalchemy.orm import Session
 
 from app.db.session import SessionLocal
 from app.repositories.employee import get_by_email
-from app.services.auth_service import SECRET_KEY, ALGORITHM
+from app.services.token_service import TokenError, decode_access_token
 from app.models.employee import Employee
 
 oauth2_scheme = OAuth2PasswordBearer(tokenUrl="/api/v1/token")
@@ -23,11 +22,11 @@ def get_current_user(
     db: Session = Depends(get_db)
 ) -> Employee:
     try:
-        payload = jwt.decode(token, SECRET_KEY, algorithms=[ALGORITHM])
-        email = payload.get("sub")
-        if not email:
-            raise HTTPException(status_code=status.HTTP_401_UNAUTHORIZED, detail="Invalid token")
-    except JWTError:
+        payload = decode_access_token(token)
+    except TokenError:
+        raise HTTPException(status_code=status.HTTP_401_UNAUTHORIZED, detail="Invalid token")
+    email = payload.get("sub")
+    if not email:
         raise HTTPException(status_code=status.HTTP_401_UNAUTHORIZED, detail="Invalid token")
 
     user = get_by_email(db, email)
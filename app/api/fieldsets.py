@@ -0,0 +1,137 @@
+"""
+app/api/fieldsets.py
+
+Sparse fieldsets (`?fields=`) for read endpoints.
+
+Description:
+    A router declares one dependency per response schema with `fieldset(...)`.
+    The dependency parses `?fields=automobilio_id,marke,lokacija.miestas`
+    into a FieldSet: the columns the repository should project in SQL, the
+    selected fields of nested objects and whether links are wanted.
+    Without `fields` the full schema is returned, so existing clients are unaffected.
+
+Usage:
+    CAR_FIELDSET = fieldset(CarOut, "cars", key="automobilio_id", nested={"lokacija": LocationOut})
+
+    def get_all_cars(fs: FieldSet = Depends(CAR_FIELDSET), ...):
+        rows = car_repo.get_all(db, fields=fs.columns, ...)
+"""
+from typing import Optional
+
+from fastapi import HTTPException, Query
+
+from utils.hateoas import LINK_TEMPLATES, LinksMode, apply_links
+from utils.serialization import FastJSONResponse, schema_fields
+
+
+class FieldSet:
+    """
+    Parsed `?fields=` selection for one response schema.
+
+    Attributes:
+        columns (tuple[str, ...]): Scalar fields to project, in schema order.
+            Always contains the key and, when links are selected, the fields
+            the link templates need.
+        nested (dict[str, tuple[str, ...]]): Selected fields of nested objects.
+        links (bool): Whether the `links` field is returned.
+        hidden (tuple[str, ...]): Columns fetched only to build links; removed from the output.
+    """
+    __slots__ = ("columns", "nested", "links", "hidden")
+
+    def __init__(self, columns, nested, links, hidden=()):
+        self.columns = columns
+        self.nested = nested
+        self.links = links
+        self.hidden = hidden
+
+    def respond(self, data, resource: str, mode: LinksMode) -> FastJSONResponse:
+        """
+        Attach links (if selected), drop helper columns and build the JSON response.
+
+        Args:
+            data (dict | list[dict]): Serialized item(s) built from `columns`.
+            resource (str): Key of LINK_TEMPLATES.
+            mode (LinksMode): Value of the `?links=` parameter.
+
+        Returns:
+            FastJSONResponse: Response with the optional Link-Template header.
+        """
+        return FastJSONResponse(data, headers=self.prepare(data, resource, mode))
+
+    def prepare(self, data, resource: str, mode: LinksMode) -> dict:
+        """
+        Attach links (if selected) and drop helper columns in place.
+
+        Used directly when the items are wrapped into a larger response body.
+
+        Args:
+            data (dict | list[dict]): Serialized item(s) built from `columns`.
+            resource (str): Key of LINK_TEMPLATES.
+            mode (LinksMode): Value of the `?links=` parameter.
+
+        Returns:
+            dict: Extra response headers.
+        """
+        headers = apply_links(data, resource, mode) if self.links else {}
+        if self.hidden:
+            for item in (data if isinstance(data, list) else (data,)):
+                for name in self.hidden:
+                    del item[name]
+        return headers
+
+
+def fieldset(schema, resource: str, key: str, nested: dict = None):
+    """
+    Create a `?fields=` dependency for a response schema.
+
+    Args:
+        schema: Pydantic output schema (e.g. CarOut).
+        resource (str): Key of LINK_TEMPLATES used for the `links` field.
+        key (str): Identifier field, always returned.
+        nested (dict[str, type], optional): Nested object fields and their schemas,
+            selectable as a whole ("lokacija") or per field ("lokacija.miestas").
+
+    Returns:
+        Callable: FastAPI dependency returning a FieldSet.
+    """
+    nested = {name: schema_fields(sub) for name, sub in (nested or {}).items()}
+    scalar = schema_fields(schema, exclude=("links", *nested))
+    link_fields = LINK_TEMPLATES[resource].fields
+    full = FieldSet(scalar, nested, True)
+
+    def dependency(
+        fields: Optional[str] = Query(
+            None,
+            description="Comma-separated fields to return, e.g. `" + ",".join(scalar[:2]) + "`; "
+                        "nested fields use a dot, `links` adds HATEOAS links",
+        ),
+    ) -> FieldSet:
+        if not fields:
+            return full
+
+        requested, sub, unknown = {key}, {}, []
+        for name in filter(None, (part.strip() for part in fields.split(","))):
+            parent, _, child = name.partition(".")
+            if name == "links" or name in scalar:
+                requested.add(name)
+            elif parent in nested and (not child or child in nested[parent]):
+                # "lokacija" be taško – visi lokacijos laukai
+                sub.setdefault(parent, set()).update((child,) if child else nested[parent])
+            else:
+                unknown.append(name)
+        if unknown:
+            raise HTTPException(status_code=400, detail=f"Unknown fields: {', '.join(unknown)}")
+
+        links = "links" in requested
+        columns = tuple(
+            name for name in scalar
+            if name in requested or (links and name in link_fields)
+        )
+        return FieldSet(
+            columns,
+            {parent: tuple(f for f in nested[parent] if f in chosen) for parent, chosen in sub.items()},
+            links,
+            tuple(name for name in columns if name not in requested),
+        )
+
+    return dependency
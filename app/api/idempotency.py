@@ -0,0 +1,180 @@
+"""
+app/api/idempotency.py
+
+`Idempotency-Key` support for create endpoints.
+
+Description:
+    A client that retries a POST after a timeout cannot know whether the
+    first attempt was committed. When the request carries an
+    `Idempotency-Key` header, the key is reserved in 'pakartojimo_raktai'
+    in the same transaction as the created row, and the response is stored
+    under it. The repositories only flush the created rows; `save` commits
+    the row, the key and the response once. A retry with the same key (per caller, within
+    IDEMPOTENCY_TTL_HOURS) then gets the stored response with
+    `Idempotent-Replayed: true` without running the endpoint again.
+
+      - same key, different body            -> 422
+      - same key while the first is running -> 409 (the unique key makes a
+        concurrent duplicate wait for the first transaction and then fail)
+      - the endpoint fails                  -> the reservation is rolled back
+        with its transaction, the key can be retried
+      - a key left without a response for longer than
+        IDEMPOTENCY_LEASE_SECONDS            -> treated as abandoned, the
+        request runs again
+
+    Requests without the header behave as before.
+
+Usage:
+    ORDER_IDEMPOTENCY = idempotent("createOrder", OrderOut)
+
+    def create_order(order: OrderCreate, db: Session = Depends(get_db),
+                     idem: IdempotentRequest = Depends(ORDER_IDEMPOTENCY)):
+        created = repo.create(db, order)
+        return idem.save(db, {...})
+"""
+import hashlib
+import json
+import os
+from datetime import datetime, timedelta
+from typing import Optional
+
+from fastapi import Depends, Header, HTTPException, Request
+from fastapi.concurrency import run_in_threadpool
+from fastapi.encoders import jsonable_encoder
+from sqlalchemy import delete
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.orm import Session
+
+from app.api.deps import get_db
+from app.middleware.rate_limit import principal_of
+from app.models.idempotency_key import IdempotencyKey
+
+IDEMPOTENCY_TTL_HOURS = int(os.getenv("IDEMPOTENCY_TTL_HOURS", "24"))
+# Po tiek sekundžių raktas be atsakymo laikomas apleistu
+IDEMPOTENCY_LEASE_SECONDS = int(os.getenv("IDEMPOTENCY_LEASE_SECONDS", "60"))
+MAX_KEY_LENGTH = 255
+
+
+class IdempotentReplay(Exception):
+    """Raised to answer a repeated request with its stored response."""
+
+    def __init__(self, status_code: int, body):
+        self.status_code = status_code
+        self.body = body
+
+
+class IdempotentRequest:
+    """
+    Idempotency key reserved for the current request.
+
+    Attributes:
+        record (IdempotencyKey | None): Reserved row, None when no key was sent.
+        response_model: Schema the stored response is serialized with.
+    """
+    __slots__ = ("record", "response_model")
+
+    def __init__(self, record, response_model):
+        self.record = record
+        self.response_model = response_model
+
+    def save(self, db: Session, payload, status_code: int = 200):
+        """
+        Store the response under the key and commit the request transaction.
+
+        The endpoint commits only here, so the created row, the key and the
+        stored response are written together (also when no key was sent).
+
+        Args:
+            db (Session): Session of the request (the one the key was reserved in).
+            payload (dict): Response returned by the endpoint.
+            status_code (int): Response status.
+
+        Returns:
+            dict: The unchanged payload.
+        """
+        if self.record is not None:
+            body = jsonable_encoder(self.response_model.model_validate(payload))
+            self.record.busenos_kodas = status_code
+            self.record.atsakymas = json.dumps(body, ensure_ascii=False)
+        db.commit()
+        return payload
+
+
+def purge_expired(db: Session) -> int:
+    """
+    Delete keys older than IDEMPOTENCY_TTL_HOURS.
+
+    Returns:
+        int: Number of deleted keys.
+    """
+    cutoff = datetime.utcnow() - timedelta(hours=IDEMPOTENCY_TTL_HOURS)
+    deleted = db.execute(delete(IdempotencyKey).where(IdempotencyKey.sukurta < cutoff)).rowcount
+    db.commit()
+    return deleted
+
+
+def _reserve(db: Session, principal: str, key: str, operation: str, digest: str) -> IdempotencyKey:
+    """Return a new key row flushed in the request transaction, or raise for a known key."""
+    existing = (
+        db.query(IdempotencyKey)
+        .filter(IdempotencyKey.subjektas == principal, IdempotencyKey.raktas == key)
+        .first()
+    )
+    if existing is not None:
+        now = datetime.utcnow()
+        expired = existing.sukurta < now - timedelta(hours=IDEMPOTENCY_TTL_HOURS)
+        abandoned = (
+            existing.busenos_kodas is None
+            and existing.sukurta < now - timedelta(seconds=IDEMPOTENCY_LEASE_SECONDS)
+        )
+        if expired or abandoned:
+            db.delete(existing)
+            db.flush()
+        elif existing.operacija != operation or existing.uzklausos_maisa != digest:
+            raise HTTPException(status_code=422, detail="Idempotency-Key was already used for a different request")
+        elif existing.busenos_kodas is None:
+            raise HTTPException(status_code=409, detail="A request with this Idempotency-Key is still in progress")
+        else:
+            raise IdempotentReplay(existing.busenos_kodas, json.loads(existing.atsakymas))
+
+    record = IdempotencyKey(subjektas=principal, raktas=key, operacija=operation, uzklausos_maisa=digest)
+    db.add(record)
+    try:
+        db.flush()
+    except IntegrityError:
+        # Lygiagreti užklausa su tuo pačiu raktu spėjo pirma
+        db.rollback()
+        raise HTTPException(status_code=409, detail="A request with this Idempotency-Key is still in progress")
+    return record
+
+
+def idempotent(operation: str, response_model):
+    """
+    Create an `Idempotency-Key` dependency for a create endpoint.
+
+    Args:
+        operation (str): operation_id of the endpoint; a key is valid for one operation.
+        response_model: Response schema of the endpoint.
+
+    Returns:
+        Callable: FastAPI dependency returning an IdempotentRequest.
+    """
+    none = IdempotentRequest(None, response_model)
+
+    async def dependency(
+        request: Request,
+        db: Session = Depends(get_db),
+        idempotency_key: Optional[str] = Header(
+            None, max_length=MAX_KEY_LENGTH,
+            description="Unique key of this create request; retries with the same key return the first response",
+        ),
+    ) -> IdempotentRequest:
+        if not idempotency_key:
+            return none
+        digest = hashlib.sha256(await request.body()).hexdigest()
+        record = await run_in_threadpool(
+            _reserve, db, principal_of(request.scope), idempotency_key, operation, digest
+        )
+        return IdempotentRequest(record, response_model)
+
+    return dependency
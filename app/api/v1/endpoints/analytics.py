@@ -0,0 +1,131 @@
+"""
+app/api/v1/endpoints/analytics.py
+
+API endpoints for analytics computed from the columnar snapshot.
+
+Description:
+    Utilization, revenue trend and cohort reports read the Parquet snapshot
+    (app/services/analytics.py) instead of the live database, so they do not
+    load the booking tables. Results are as fresh as the snapshot (see
+    GET /analytics/snapshot); the endpoints answer 503 until the first
+    snapshot is taken.
+"""
+from datetime import date, timedelta
+
+from fastapi import APIRouter, Depends, HTTPException, Query
+from sqlalchemy.orm import Session
+
+from app.api.deps import get_current_user, get_db
+from app.api.permissions import require_perm, Perm
+from app.schemas.analytics import CarUtilization, Cohort, RevenuePeriod, RevenueTrend, SnapshotInfo
+from app.services import analytics, job_queue
+
+router = APIRouter(
+    prefix="/analytics",
+    tags=["Analytics"],
+    dependencies=[Depends(get_current_user)]
+)
+
+# Numatytasis laikotarpis, kai `from` nenurodytas
+DEFAULT_PERIOD_DAYS = 30
+
+
+def _period(date_from: date = None, date_to: date = None) -> tuple[date, date]:
+    """Resolve the optional date range (last DEFAULT_PERIOD_DAYS days by default)."""
+    date_to = date_to or date.today()
+    date_from = date_from or date_to - timedelta(days=DEFAULT_PERIOD_DAYS - 1)
+    if date_from > date_to:
+        raise HTTPException(status_code=400, detail="'from' must not be after 'to'")
+    return date_from, date_to
+
+
+def _run(query, *args):
+    """Run a snapshot query, answering 503 while there is no snapshot."""
+    try:
+        return query(*args)
+    except analytics.SnapshotMissing as exc:
+        raise HTTPException(status_code=503, detail=str(exc))
+
+
+@router.get("/snapshot", response_model=SnapshotInfo, operation_id="getAnalyticsSnapshot",
+            dependencies=[Depends(require_perm(Perm.VIEW))])
+def get_snapshot():
+    """
+    Describe the snapshot the analytics are computed from.
+
+    Returns:
+        SnapshotInfo: Snapshot name, time and row counts.
+    """
+    return _run(analytics.snapshot_info)
+
+
+@router.post("/snapshot", status_code=202, operation_id="takeAnalyticsSnapshot",
+             dependencies=[Depends(require_perm(Perm.ADMIN))])
+def take_snapshot(db: Session = Depends(get_db)):
+    """
+    Queue a new snapshot now instead of waiting for the scheduler.
+
+    Args:
+        db (Session): SQLAlchemy session.
+
+    Returns:
+        dict: ID of the background job.
+    """
+    job = job_queue.enqueue(db, "analytics.snapshot", {}, max_attempts=1)
+    db.commit()
+    return {"job_id": job.uzduoties_id}
+
+
+@router.get("/utilization", response_model=list[CarUtilization], operation_id="getCarUtilization",
+            dependencies=[Depends(require_perm(Perm.VIEW))])
+def get_utilization(
+    date_from: date = Query(None, alias="from", description="First day (30 days before `to` by default)"),
+    date_to: date = Query(None, alias="to", description="Last day, inclusive (today by default)"),
+):
+    """
+    Share of days each car was rented in a period, most utilized first.
+
+    Args:
+        date_from (date, optional): First day.
+        date_to (date, optional): Last day.
+
+    Returns:
+        list[CarUtilization]: One row per car.
+    """
+    return _run(analytics.utilization, *_period(date_from, date_to))
+
+
+@router.get("/revenue", response_model=list[RevenueTrend], operation_id="getRevenueTrend",
+            dependencies=[Depends(require_perm(Perm.VIEW))])
+def get_revenue_trend(
+    date_from: date = Query(None, alias="from", description="First day (30 days before `to` by default)"),
+    date_to: date = Query(None, alias="to", description="Last day, inclusive (today by default)"),
+    period: RevenuePeriod = Query(RevenuePeriod.DAY, description="day, week or month"),
+):
+    """
+    Invoice revenue per day, week or month.
+
+    Args:
+        date_from (date, optional): First day.
+        date_to (date, optional): Last day.
+        period (RevenuePeriod): Time bucket.
+
+    Returns:
+        list[RevenueTrend]: Buckets with invoices, in time order.
+    """
+    return _run(analytics.revenue, *_period(date_from, date_to), period.value)
+
+
+@router.get("/cohorts", response_model=list[Cohort], operation_id="getClientCohorts",
+            dependencies=[Depends(require_perm(Perm.VIEW))])
+def get_cohorts(months: int = Query(12, ge=1, le=60, description="Months of retention to report")):
+    """
+    Monthly client cohorts by first order, with retention per following month.
+
+    Args:
+        months (int): Length of the retention row.
+
+    Returns:
+        list[Cohort]: Cohorts in time order.
+    """
+    return _run(analytics.cohorts, months)
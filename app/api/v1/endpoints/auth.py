@@ -7,12 +7,18 @@ import secrets
 
 from fastapi import APIRouter, Depends, HTTPException, Request, Form
 from fastapi.responses import RedirectResponse
+from fastapi.concurrency import run_in_threadpool
 from sqlalchemy.orm import Session
 
-from app.schemas.auth import LoginRequest, TokenResponse, RegisterRequest, UserInfo, ChangePasswordRequest
+from app.schemas.auth import LoginRequest, TokenResponse, RegisterRequest, UserInfo, ChangePasswordRequest, RefreshRequest
 from app.repositories import employee as employee_repo
-from app.services.auth_service import verify_password, create_access_token, get_password_hash
+from app.services.auth_service import create_access_token
+from app.services import token_service
+from app.services.password_hasher import password_hasher
+from app.services.rate_limiter import login_guard
+from app.services import job_queue
 from app.api.deps import get_current_user, get_db
+from app.api.permissions import require_perm, Perm
 from authlib.integrations.starlette_client import OAuth
 from utils.config import settings
 
@@ -47,6 +53,52 @@ if settings.GITHUB_CLIENT_ID and settings.GITHUB_CLIENT_SECRET:
         client_kwargs={"scope": "read:user user:email"},
     )
 
+def _load_employee(db: Session, email: str):
+    """
+    Load an employee by email and release the DB connection right away.
+
+    Logins then wait for bcrypt without holding a pooled connection; the
+    returned object is detached but its columns stay readable.
+
+    Args:
+        db (Session): SQLAlchemy session.
+        email (str): Employee email.
+
+    Returns:
+        Employee | None: Detached employee or None.
+    """
+    user = employee_repo.get_by_email(db, email)
+    db.close()
+    return user
+
+def _client_ip(request: Request) -> str:
+    """Return the client address used as the per-IP rate limit key."""
+    return request.client.host if request.client else "unknown"
+
+def _token_pair(email: str) -> TokenResponse:
+    """Issue a short-lived access token together with a refresh token."""
+    return TokenResponse(
+        access_token=create_access_token(data={"sub": email}),
+        refresh_token=token_service.create_refresh_token(email),
+    )
+
+async def _check_password(db: Session, user, password: str) -> bool:
+    """
+    Verify a login password in the hashing pool and store an upgraded hash if one is returned.
+
+    Args:
+        db (Session): SQLAlchemy session.
+        user (Employee): Employee returned by `_load_employee`.
+        password (str): Plain text password from the request.
+
+    Returns:
+        bool: True if the password matches.
+    """
+    valid, new_hash = await password_hasher.verify_and_update(password, user.slaptazodis)
+    if valid and new_hash:
+        await run_in_threadpool(employee_repo.update, db, user.darbuotojo_id, {"slaptazodis": new_hash})
+    return valid
+
 # ---------- GitHub ----------
 @router.get("/github/login")
 async def github_login(request: Request):
@@ -72,15 +124,17 @@ async def github_callback(request: Request, db: Session = Depends(get_db)):
     if not email:
         raise HTTPException(status_code=400, detail="Nepavyko gauti el. pašto iš GitHub.")
 
-    user = employee_repo.get_by_email(db, email)
+    user = await run_in_threadpool(employee_repo.get_by_email, db, email)
     if not user:
         full = (me.get("name") or me.get("login") or "GitHub User").split(" ", 1)
         first, last = (full[0], (full[1] if len(full) > 1 else "User"))
         random_pwd = secrets.token_urlsafe(24)
-        user = employee_repo.create_employee(db, {
+        # Pasisveikinimo laiškas fone – užduotis įsipareigojama kartu su darbuotoju
+        job_queue.enqueue(db, "email.welcome", {"el_pastas": email, "vardas": first})
+        user = await run_in_threadpool(employee_repo.create_employee, db, {
             "vardas": first, "pavarde": last, "el_pastas": email,
             "telefono_nr": "", "pareigos": "Guest", "atlyginimas": 0.0,
-            "isidarbinimo_data": date.today(), "slaptazodis": get_password_hash(random_pwd),
+            "isidarbinimo_data": date.today(), "slaptazodis": await password_hasher.hash(random_pwd),
         })
 
     jwt_token = create_access_token(data={"sub": email, "auth": "github"})
@@ -114,7 +168,7 @@ async def google_callback(request: Request, db: Session = Depends(get_db)):
         raise HTTPException(status_code=400, detail="Google el. paštas nepatvirtintas.")
 
     email = userinfo["email"]
-    user = employee_repo.get_by_email(db, email)
+    user = await run_in_threadpool(employee_repo.get_by_email, db, email)
     if not user:
         random_pwd = secrets.token_urlsafe(24)
         employee_data = {
@@ -125,31 +179,44 @@ async def google_callback(request: Request, db: Session = Depends(get_db)):
             "pareigos": "Guest",
             "atlyginimas": 0.0,
             "isidarbinimo_data": date.today(),
-            "slaptazodis": get_password_hash(random_pwd),
+            "slaptazodis": await password_hasher.hash(random_pwd),
         }
-        user = employee_repo.create_employee(db, employee_data)
+        job_queue.enqueue(db, "email.welcome", {"el_pastas": email, "vardas": employee_data["vardas"]})
+        user = await run_in_threadpool(employee_repo.create_employee, db, employee_data)
 
     jwt_token = create_access_token(data={"sub": email, "auth": "google"})
     return RedirectResponse(url=f"http://localhost:3000/oauth#access_token={jwt_token}", status_code=303)
 
 # --------- KLASIKINIS JWT LOGIN/REGISTER ---------
 @router.post("/login", response_model=TokenResponse, operation_id="login")
-def login(request: LoginRequest, db: Session = Depends(get_db)):
-    db_user = employee_repo.get_by_email(db, request.el_pastas)
-    if not db_user or not verify_password(request.slaptazodis, db_user.slaptazodis):
+async def login(request: LoginRequest, http_request: Request, db: Session = Depends(get_db)):
+    login_guard.check(_client_ip(http_request), request.el_pastas)
+    db_user = await run_in_threadpool(_load_employee, db, request.el_pastas)
+    valid = bool(db_user) and await _check_password(db, db_user, request.slaptazodis)
+    login_guard.record(request.el_pastas, valid)
+    if not valid:
         raise HTTPException(status_code=401, detail="Invalid login credentials")
-    token = create_access_token(data={"sub": db_user.el_pastas})
-    return TokenResponse(access_token=token)
+    return _token_pair(db_user.el_pastas)
 
 @router.post("/register", operation_id="register")
-def register(request: RegisterRequest, db: Session = Depends(get_db)):
-    if employee_repo.get_by_email(db, request.el_pastas):
+async def register(request: RegisterRequest, db: Session = Depends(get_db)):
+    if await run_in_threadpool(_load_employee, db, request.el_pastas):
         raise HTTPException(status_code=400, detail="Employee with this email already exists")
     data = request.dict()
-    data["slaptazodis"] = get_password_hash(data.pop("slaptazodis"))
-    new_employee = employee_repo.create_employee(db, data)
+    data["slaptazodis"] = await password_hasher.hash(data.pop("slaptazodis"))
+    new_employee = await run_in_threadpool(employee_repo.create_employee, db, data)
     return {"message": "Employee created successfully", "id": new_employee.darbuotojo_id}
 
+@router.post("/refresh", response_model=TokenResponse, operation_id="refreshToken")
+def refresh(request: RefreshRequest, db: Session = Depends(get_db)):
+    try:
+        email = token_service.use_refresh_token(db, request.refresh_token)
+    except token_service.TokenError:
+        raise HTTPException(status_code=401, detail="Invalid refresh token")
+    if not employee_repo.get_by_email(db, email):
+        raise HTTPException(status_code=401, detail="Invalid refresh token")
+    return _token_pair(email)
+
 @router.post("/logout", operation_id="logout")
 def logout():
     return {"message": "Successfully logged out"}
@@ -159,18 +226,25 @@ def me(current_user = Depends(get_current_user)):
     return current_user
 
 @router.post("/change-password", operation_id="changePassword")
-def change_password(request: ChangePasswordRequest, db: Session = Depends(get_db), current_user = Depends(get_current_user)):
-    user = employee_repo.get_by_email(db, current_user.el_pastas)
-    if not verify_password(request.senas_slaptazodis, user.slaptazodis):
+async def change_password(request: ChangePasswordRequest, db: Session = Depends(get_db), current_user = Depends(get_current_user)):
+    user = await run_in_threadpool(_load_employee, db, current_user.el_pastas)
+    if not await password_hasher.verify(request.senas_slaptazodis, user.slaptazodis):
         raise HTTPException(status_code=400, detail="Wrong current password")
-    user.slaptazodis = get_password_hash(request.naujas_slaptazodis)
-    db.commit()
+    new_hash = await password_hasher.hash(request.naujas_slaptazodis)
+    await run_in_threadpool(employee_repo.update, db, user.darbuotojo_id, {"slaptazodis": new_hash})
     return {"message": "Password updated successfully"}
 
 @router.post("/token", response_model=TokenResponse, operation_id="swaggerLogin")
-def login_swagger(username: str = Form(...), password: str = Form(...), db: Session = Depends(get_db)):
-    user = employee_repo.get_by_email(db, username)
-    if not user or not verify_password(password, user.slaptazodis):
+async def login_swagger(http_request: Request, username: str = Form(...), password: str = Form(...), db: Session = Depends(get_db)):
+    login_guard.check(_client_ip(http_request), username)
+    user = await run_in_threadpool(_load_employee, db, username)
+    valid = bool(user) and await _check_password(db, user, password)
+    login_guard.record(username, valid)
+    if not valid:
         raise HTTPException(status_code=401, detail="Invalid credentials")
-    token = create_access_token(data={"sub": user.el_pastas})
-    return TokenResponse(access_token=token)
+    return _token_pair(user.el_pastas)
+
+@router.get("/auth/hasher-metrics", operation_id="getPasswordHasherMetrics",
+            dependencies=[Depends(require_perm(Perm.ADMIN))])
+def hasher_metrics():
+    return password_hasher.metrics()
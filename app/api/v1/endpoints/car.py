@@ -9,17 +9,24 @@ Description:
     Provides CRUD operations and search functionality for cars.
     Includes support for location data and HATEOAS links for each resource.
 """
-from fastapi import APIRouter, Depends, HTTPException, Query
-from sqlalchemy.orm import Session, joinedload
+from fastapi import APIRouter, Depends, HTTPException, Query, Request
+from sqlalchemy.orm import Session
 from typing import Optional, List
 from app.api.deps import get_db
 from app.models.car import Car
-from app.schemas.car import CarOut, CarCreate, CarUpdate, CarStatusUpdate
-from utils.hateoas import generate_links
+from app.repositories import car as car_repo
+from app.schemas.car import CarOut, CarCreate, CarUpdate, CarStatusUpdate, CarSearchResult, CarAvailabilityCalendar
+from app.schemas.location import LocationOut
+from app.schemas.bulk import BulkStatusUpdate, BulkStatusResult
+from utils.hateoas import LinksMode, generate_links, links_param
+from app.api.fieldsets import FieldSet, fieldset
 from app.api.deps import get_current_user
 from app.api.permissions import require_perm, Perm
+from app.services.availability import availability_index
+from app.services.car_search import car_index
+from utils.serialization import FastJSONResponse
+from utils.pagination import decode_cursor, encode_cursor, keyset, next_page_headers
 from datetime import date
-from app.models.reservation import Reservation
 
 
 router = APIRouter(
@@ -28,10 +35,44 @@ router = APIRouter(
     dependencies=[Depends(get_current_user)]
 )
 
+CAR_FIELDSET = fieldset(CarOut, "cars", key="automobilio_id", nested={"lokacija": LocationOut})
+
+
+def _car_rows(db: Session, fs: FieldSet):
+    """Start a projected car query for the selected fields."""
+    return car_repo.rows_query(db, fs.columns, fs.nested.get("lokacija", ()))
+
+
+def _car_out(row, fs: FieldSet) -> dict:
+    """
+    Map a projected car row (car columns + location columns) to a CarOut-shaped dict.
+
+    Args:
+        row (Row): Row from `car_repo.rows_query(db, fs.columns, location_fields)`.
+        fs (FieldSet): Selected fields.
+
+    Returns:
+        dict: Data ready for `FieldSet.respond`.
+    """
+    data = dict(zip(fs.columns, row))
+    location_fields = fs.nested.get("lokacija")
+    if location_fields is not None:
+        location = row[len(fs.columns):]
+        # Be lokacijos (outer join) visi stulpeliai NULL
+        data["lokacija"] = (
+            dict(zip(location_fields, location))
+            if any(value is not None for value in location) else None
+        )
+    return data
+
 @router.get("/", response_model=List[CarOut], operation_id="getAllCars",
              dependencies=[Depends(require_perm(Perm.VIEW))])
 
-def get_all_cars(db: Session = Depends(get_db)):
+def get_all_cars(
+    db: Session = Depends(get_db),
+    links: LinksMode = Depends(links_param),
+    fs: FieldSet = Depends(CAR_FIELDSET),
+):
     """
     Retrieve all cars with their location and HATEOAS links.
 
@@ -43,22 +84,8 @@ def get_all_cars(db: Session = Depends(get_db)):
 
     Author: Gabrielė Tamaševičiūtė <gabriele.tamaseviciutes@stud.viko.lt>
     """
-    cars = db.query(Car).options(joinedload(Car.lokacija)).all()
-    return [
-        {
-            **car.__dict__,
-            "lokacija": (
-                {
-                    "vietos_id": car.lokacija.vietos_id,
-                    "pavadinimas": car.lokacija.pavadinimas,
-                    "adresas": car.lokacija.adresas,
-                    "miestas": car.lokacija.miestas,
-                } if car.lokacija else None
-            ),
-            "links": generate_links("cars", car.automobilio_id, ["update", "delete", "update_status"]),
-        }
-        for car in cars
-    ]
+    rows = car_repo.get_all(db, fields=fs.columns, location_fields=fs.nested.get("lokacija", ()))
+    return fs.respond([_car_out(row, fs) for row in rows], "cars", links)
 
 @router.get(
     "/available",
@@ -70,6 +97,8 @@ def get_available_cars(
     date_from: date = Query(..., description="YYYY-MM-DD"),
     date_to:   date = Query(..., description="YYYY-MM-DD "),
     db: Session = Depends(get_db),
+    links: LinksMode = Depends(links_param),
+    fs: FieldSet = Depends(CAR_FIELDSET),
 ):
     """
     Retrieve all available cars for a given date interval [date_from, date_to).
@@ -90,42 +119,56 @@ def get_available_cars(
     if date_from >= date_to:
         raise HTTPException(status_code=400, detail="Invalid date range: `date_from` must be earlier than `date_to`.")
 
-
-    busy_car_ids_subq = (
-    db.query(Reservation.automobilio_id)
-    .filter(
-        ~(
-            (Reservation.rezervacijos_pabaiga <= date_from) |   
-            (Reservation.rezervacijos_pradzia >= date_to)       
-        )
-    )
-    .subquery()
-)
- 
-    cars = (
-        db.query(Car)
-        .options(joinedload(Car.lokacija))
-        .filter(~Car.automobilio_id.in_(busy_car_ids_subq))
-        .all()
+    rows = car_repo.get_available(
+        db, date_from, date_to, fields=fs.columns, location_fields=fs.nested.get("lokacija", ()),
+        busy_ids=availability_index.busy_car_ids(db, date_from, date_to),
     )
+    return fs.respond([_car_out(row, fs) for row in rows], "cars", links)
+
+# Ilgiausias leidžiamas kalendoriaus intervalas (dienomis)
+CALENDAR_MAX_DAYS = 366
+
+@router.get("/availability-calendar", response_model=CarAvailabilityCalendar, operation_id="getCarsAvailabilityCalendar",
+            dependencies=[Depends(require_perm(Perm.VIEW))])
 
-    return [
-        {
-            **car.__dict__,
-            "lokacija": (
-                {
-                    "vietos_id": car.lokacija.vietos_id,
-                    "pavadinimas": car.lokacija.pavadinimas,
-                    "adresas": car.lokacija.adresas,
-                    "miestas": car.lokacija.miestas,
-                } if car.lokacija else None
-            ),
-            "links": generate_links(
-                "cars", car.automobilio_id, ["update", "delete", "update_status"]
-            ),
-        }
-        for car in cars
-    ]
+def get_cars_availability_calendar(
+    date_from: date = Query(..., description="YYYY-MM-DD"),
+    date_to:   date = Query(..., description="YYYY-MM-DD (exclusive)"),
+    group_by: str = Query("kebulo_tipas", pattern="^(" + "|".join(car_repo.CALENDAR_GROUP_FIELDS) + ")$"),
+    db: Session = Depends(get_db),
+):
+    """
+    Count free cars per group for each day of [date_from, date_to).
+
+    Replaces one `/cars/available` call per day: a car counts as free on a day
+    exactly when `/cars/available` for that single day would return it.
+
+    Args:
+        date_from (date): Start date (inclusive).
+        date_to (date): End date (exclusive), at most 366 days after `date_from`.
+        group_by (str): Car field to group by (body type, fuel, brand, seats, gearbox or location).
+        db (Session): SQLAlchemy session.
+
+    Returns:
+        CarAvailabilityCalendar: Groups, cars per group and a groups x days matrix of free counts.
+
+    Raises:
+        HTTPException: If the range is empty or longer than 366 days.
+    """
+    if date_from >= date_to:
+        raise HTTPException(status_code=400, detail="Invalid date range: `date_from` must be earlier than `date_to`.")
+    if (date_to - date_from).days > CALENDAR_MAX_DAYS:
+        raise HTTPException(status_code=400, detail=f"Selected range must not exceed {CALENDAR_MAX_DAYS} days.")
+
+    groups, totals, free = car_repo.availability_calendar(db, date_from, date_to, group_by)
+    return FastJSONResponse({
+        "date_from": date_from,
+        "date_to": date_to,
+        "group_by": group_by,
+        "groups": groups,
+        "totals": totals,
+        "free": free,
+    })
 
 @router.get(
     "/utilization",
@@ -141,8 +184,9 @@ def get_cars_utilization(
     """
     Compute utilization percentage per car for a given date interval [date_from, date_to).
 
-    Overlap days are counted as:
-        overlap = max(0, min(reservation_end, date_to) - max(reservation_start, date_from))
+    A day counts as used when at least one reservation with a selected status
+    covers it; days come from the in-memory availability bitmaps
+    (app/services/availability.py) or, outside their horizon, from SQL.
 
     Args:
         date_from (date): Start date (inclusive).
@@ -164,45 +208,71 @@ def get_cars_utilization(
     if statuses:
         status_list = [s.strip() for s in statuses.split(",") if s.strip()]
 
-    cars = db.query(Car).all()
+    used = availability_index.used_days(db, date_from, date_to, status_list)
+    if used is None:
+        # Intervalas už atminties horizonto – skaičiuojame SQL
+        used = car_repo.used_days(db, date_from, date_to, status_list)
 
     results: list[dict] = []
-    for c in cars:
-        q = db.query(Reservation).filter(Reservation.automobilio_id == c.automobilio_id)
-        if status_list:
-          
-            if hasattr(Reservation, "statusas"):
-                q = q.filter(Reservation.statusas.in_(status_list))
-
-        used_days = 0
-        for r in q.all():
-           
-            start = getattr(r, "rezervacijos_pradzia")
-            end   = getattr(r, "rezervacijos_pabaiga")
-
-         
-            s = max(start, date_from)
-            e = min(end, date_to)
-            delta = (e - s).days
-            if delta > 0:
-                used_days += delta
-
-        utilization = round(100.0 * used_days / total_days, 1)
+    for (car_id,) in db.query(Car.automobilio_id):
+        used_days = used.get(car_id, 0)
         results.append({
-            "car_id": c.automobilio_id,
-            "utilization_pct": utilization,
+            "car_id": car_id,
+            "utilization_pct": round(100.0 * used_days / total_days, 1),
             "used_days": used_days,
             "total_days": total_days,
         })
 
-    
     results.sort(key=lambda x: x["utilization_pct"], reverse=True)
     return results
 
 
+@router.get("/search/text", response_model=CarSearchResult, operation_id="searchCarsText", dependencies=[Depends(require_perm(Perm.VIEW))])
+
+def search_cars_text(
+    db: Session = Depends(get_db),
+    q: str = Query("", description="Free text, e.g. `toyota balta`; prefixes and small typos match"),
+    marke: Optional[str] = None,
+    kuro_tipas: Optional[str] = None,
+    sedimos_vietos: Optional[int] = None,
+    metai: Optional[int] = None,
+    limit: int = Query(50, ge=1, le=500),
+    links: LinksMode = Depends(links_param),
+    fs: FieldSet = Depends(CAR_FIELDSET),
+):
+    """
+    Free-text car search over the in-memory index with facet counts.
+
+    Args:
+        db (Session): SQLAlchemy session.
+        q (str): Search text matched against brand, model, color, fuel, body, gearbox, plate and year.
+        marke (str): Exact brand facet.
+        kuro_tipas (str): Exact fuel type facet.
+        sedimos_vietos (int): Exact seat count facet.
+        metai (int): Exact year facet.
+        limit (int): Maximum number of cars returned.
+
+    Returns:
+        CarSearchResult: Total, best matching cars and facet counts.
+    """
+    car_index.refresh(db)
+    ids, total, facets = car_index.search(
+        q,
+        {"marke": marke, "kuro_tipas": kuro_tipas, "sedimos_vietos": sedimos_vietos, "metai": metai},
+        limit,
+    )
+    rows = _car_rows(db, fs).filter(Car.automobilio_id.in_(ids)).all() if ids else []
+    by_id = {row.automobilio_id: row for row in rows}
+    # Išlaikome indekso reitingo tvarką
+    items = [_car_out(by_id[car_id], fs) for car_id in ids if car_id in by_id]
+    headers = fs.prepare(items, "cars", links)
+    return FastJSONResponse({"total": total, "items": items, "facets": facets}, headers=headers)
+
+
 @router.get("/search", response_model=List[CarOut], operation_id="searchCars", dependencies=[Depends(require_perm(Perm.VIEW))])
 
 def search_cars(
+    request: Request,
     db: Session = Depends(get_db),
     marke: Optional[str] = None,
     modelis: Optional[str] = None,
@@ -211,9 +281,25 @@ def search_cars(
     kuro_tipas: Optional[str] = None,
     metai: Optional[int] = None,
     sedimos_vietos: Optional[int] = None,
+    kaina_parai_min: Optional[float] = None,
+    kaina_parai_max: Optional[float] = None,
+    metai_min: Optional[int] = None,
+    metai_max: Optional[int] = None,
+    rida_min: Optional[int] = None,
+    rida_max: Optional[int] = None,
+    galia_kw_min: Optional[int] = None,
+    galia_kw_max: Optional[int] = None,
+    sort: Optional[str] = Query(
+        None, pattern="^-?(" + "|".join(car_repo.SORT_FIELDS) + ")$",
+        description="Sort field, `-` prefix for descending, e.g. `-kaina_parai`",
+    ),
+    limit: Optional[int] = Query(None, ge=1, le=500, description="Page size; enables cursor pagination"),
+    cursor: Optional[str] = Query(None, description="Value of X-Next-Cursor from the previous page"),
+    links: LinksMode = Depends(links_param),
+    fs: FieldSet = Depends(CAR_FIELDSET),
 ):
     """
-    Search for cars using optional filters.
+    Search for cars using optional filters, ranges, sorting and keyset pagination.
 
     Args:
         db (Session): SQLAlchemy session.
@@ -224,50 +310,66 @@ def search_cars(
         kuro_tipas (str): Fuel type.
         metai (int): Year.
         sedimos_vietos (int): Seats.
+        kaina_parai_min, kaina_parai_max (float): Price per day range (inclusive).
+        metai_min, metai_max (int): Year range.
+        rida_min, rida_max (int): Mileage range.
+        galia_kw_min, galia_kw_max (int): Power range.
+        sort (str): Sort field (`-` for descending); ties are broken by ID.
+        limit (int): Page size; the next page is announced in X-Next-Cursor and Link headers.
+        cursor (str): Cursor of the page to return.
 
     Returns:
         List[CarOut]: Filtered list of cars with HATEOAS links.
 
     Author: Gabrielė Tamaševičiūtė <gabriele.tamaseviciutes@stud.viko.lt>
     """
-    query = db.query(Car).options(joinedload(Car.lokacija))
-
-    if marke:
-        query = query.filter(Car.marke.ilike(f"%{marke}%"))
-    if modelis:
-        query = query.filter(Car.modelis.ilike(f"%{modelis}%"))
-    if spalva:
-        query = query.filter(Car.spalva.ilike(f"%{spalva}%"))
-    if status:
-        query = query.filter(Car.automobilio_statusas == status)
-    if kuro_tipas:
-        query = query.filter(Car.kuro_tipas == kuro_tipas)
-    if metai:
-        query = query.filter(Car.metai == metai)
-    if sedimos_vietos:
-        query = query.filter(Car.sedimos_vietos == sedimos_vietos)
-
-    cars = query.all()
-    return [
-        {
-            **car.__dict__,
-            "lokacija": (
-                {
-                    "vietos_id": car.lokacija.vietos_id,
-                    "pavadinimas": car.lokacija.pavadinimas,
-                    "adresas": car.lokacija.adresas,
-                    "miestas": car.lokacija.miestas,
-                } if car.lokacija else None
-            ),
-            "links": generate_links("cars", car.automobilio_id, ["update", "delete", "update_status"]),
-        }
-        for car in cars
-    ]
+    query = car_repo.apply_search_filters(
+        _car_rows(db, fs),
+        marke=marke, modelis=modelis, spalva=spalva, status=status,
+        kuro_tipas=kuro_tipas, metai=metai, sedimos_vietos=sedimos_vietos,
+        ranges={
+            "kaina_parai": (kaina_parai_min, kaina_parai_max),
+            "metai": (metai_min, metai_max),
+            "rida": (rida_min, rida_max),
+            "galia_kw": (galia_kw_min, galia_kw_max),
+        },
+    )
+
+    paginate = limit is not None or cursor is not None
+    if not (sort or paginate):
+        rows = query.all()
+        return fs.respond([_car_out(row, fs) for row in rows], "cars", links)
+
+    descending = bool(sort) and sort.startswith("-")
+    field = (sort or "automobilio_id").lstrip("-")
+    key = (getattr(Car, field), Car.automobilio_id) if field != "automobilio_id" else (Car.automobilio_id,)
+    after = decode_cursor(cursor, key) if cursor else None
+    # Rikiavimo raktas pridedamas rezultato gale – iš jo kuriamas kitas kursorius
+    query = keyset(query.add_columns(*key), key, after, descending)
+
+    headers = {}
+    if paginate:
+        limit = limit or 50
+        rows = query.limit(limit + 1).all()
+        if len(rows) > limit:
+            rows = rows[:limit]
+            headers = next_page_headers(request, encode_cursor(rows[-1][-len(key):]))
+    else:
+        rows = query.all()
+
+    items = [_car_out(row[:-len(key)], fs) for row in rows]
+    headers.update(fs.prepare(items, "cars", links))
+    return FastJSONResponse(items, headers=headers)
 
 
 @router.get("/{car_id}", response_model=CarOut, operation_id="getCarById", dependencies=[Depends(require_perm(Perm.VIEW))])
 
-def get_car(car_id: int, db: Session = Depends(get_db)):
+def get_car(
+    car_id: int,
+    db: Session = Depends(get_db),
+    links: LinksMode = Depends(links_param),
+    fs: FieldSet = Depends(CAR_FIELDSET),
+):
     """
     Retrieve a specific car by ID.
 
@@ -283,21 +385,14 @@ def get_car(car_id: int, db: Session = Depends(get_db)):
 
     Author: Gabrielė Tamaševičiūtė <gabriele.tamaseviciutes@stud.viko.lt>
     """
-    car = db.query(Car).options(joinedload(Car.lokacija)).filter(Car.automobilio_id == car_id).first()
-    if not car:
+    row = (
+        _car_rows(db, fs)
+        .filter(Car.automobilio_id == car_id)
+        .first()
+    )
+    if not row:
         raise HTTPException(status_code=404, detail="Car not found")
-    return {
-        **car.__dict__,
-        "lokacija": (
-            {
-                "vietos_id": car.lokacija.vietos_id,
-                "pavadinimas": car.lokacija.pavadinimas,
-                "adresas": car.lokacija.adresas,
-                "miestas": car.lokacija.miestas,
-            } if car.lokacija else None
-        ),
-        "links": generate_links("cars", car.automobilio_id, ["update", "delete", "update_status"]),
-    }
+    return fs.respond(_car_out(row, fs), "cars", links)
 
 
 @router.post("/", response_model=CarOut, operation_id="createCar", dependencies=[Depends(require_perm(Perm.EDIT))])
@@ -368,6 +463,22 @@ def update_car(car_id: int, data: CarUpdate, db: Session = Depends(get_db)):
     }
 
 
+@router.patch("/status", response_model=BulkStatusResult, operation_id="updateCarsStatus",
+              dependencies=[Depends(require_perm(Perm.EDIT))])
+def update_cars_status(data: BulkStatusUpdate, db: Session = Depends(get_db)):
+    """
+    Change the status of many cars with one UPDATE statement.
+
+    Args:
+        data (BulkStatusUpdate): IDs and/or current status to select, and the new status.
+        db (Session): SQLAlchemy session.
+
+    Returns:
+        BulkStatusResult: Number of updated cars.
+    """
+    updated = car_repo.bulk_update_status(db, data.status, ids=data.ids, from_status=data.from_status)
+    return {"updated": updated, "status": data.status}
+
 @router.patch("/{car_id}/status", response_model=CarOut, operation_id="updateCarStatus", dependencies=[Depends(require_perm(Perm.EDIT))])
 
 def update_car_status(car_id: int, data: CarStatusUpdate, db: Session = Depends(get_db)):
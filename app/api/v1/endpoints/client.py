@@ -9,7 +9,7 @@ Description:
     Implements RESTful API routes for client entity management (create, read, delete) and client orders.
     Includes HATEOAS links in responses for navigability from the frontend.
 """
-from fastapi import APIRouter, Depends, HTTPException
+from fastapi import APIRouter, Depends, HTTPException, Query, Request
 from sqlalchemy.orm import Session
 from app.api.deps import get_db
 from app.schemas import client as schemas_client
@@ -17,7 +17,13 @@ from app.schemas import order as schemas_order
 
 from app.repositories import client as repo
 from app.repositories import order as order_repo
-from utils.hateoas import generate_links
+from app.services import client_stats
+from utils.hateoas import LinksMode, apply_links, generate_links, links_param
+from utils.pagination import decode_cursor, encode_cursor, keyset, next_page_headers
+from utils.serialization import FastJSONResponse, to_dict
+from app.api.fieldsets import FieldSet, fieldset
+from app.models.client import Client
+from app.models.order import Order
 from app.api.deps import get_current_user
 
 from app.api.permissions import require_perm, Perm
@@ -27,11 +33,18 @@ router = APIRouter(
     dependencies=[Depends(get_current_user)]
 )
 
+CLIENT_FIELDSET = fieldset(schemas_client.ClientOut, "clients", key="kliento_id")
+CLIENT_ORDER_FIELDSET = fieldset(schemas_order.OrderOut, "client_orders", key="uzsakymo_id")
+
 
 @router.get("/", response_model=list[schemas_client.ClientOut], operation_id="getAllClients",
             dependencies=[Depends(require_perm(Perm.VIEW))])
 
-def get_all_clients(db: Session = Depends(get_db)):
+def get_all_clients(
+    db: Session = Depends(get_db),
+    links: LinksMode = Depends(links_param),
+    fs: FieldSet = Depends(CLIENT_FIELDSET),
+):
     """
     Retrieve all clients.
 
@@ -43,20 +56,19 @@ def get_all_clients(db: Session = Depends(get_db)):
 
     Author: Ivan Bruner <ivan.bruner@stud.viko.lt>
     """
-    clients = repo.get_all(db)
-    return [
-        {
-            **client.__dict__,
-            "links": generate_links("clients", client.kliento_id, ["update", "delete"])
-        }
-        for client in clients
-    ]
+    clients = repo.get_all(db, fields=fs.columns)
+    return fs.respond([to_dict(client, fs.columns) for client in clients], "clients", links)
 
 
 @router.get("/{kliento_id}", response_model=schemas_client.ClientOut, operation_id="getClientById",
             dependencies=[Depends(require_perm(Perm.VIEW))])
 
-def get_client(kliento_id: int, db: Session = Depends(get_db)):
+def get_client(
+    kliento_id: int,
+    db: Session = Depends(get_db),
+    links: LinksMode = Depends(links_param),
+    fs: FieldSet = Depends(CLIENT_FIELDSET),
+):
     """
     Retrieve a client by ID.
 
@@ -72,13 +84,10 @@ def get_client(kliento_id: int, db: Session = Depends(get_db)):
 
     Author: Ivan Bruner <ivan.bruner@stud.viko.lt>
     """
-    client = repo.get_by_id(db, kliento_id)
+    client = repo.rows_query(db, fs.columns).filter(Client.kliento_id == kliento_id).first()
     if not client:
         raise HTTPException(status_code=404, detail="Client not found")
-    return {
-        **client.__dict__,
-        "links": generate_links("clients", client.kliento_id, ["update", "delete"])
-    }
+    return fs.respond(to_dict(client, fs.columns), "clients", links)
 
 @router.put(
     "/{kliento_id}",
@@ -176,7 +185,12 @@ def delete_client(kliento_id: int, db: Session = Depends(get_db)):
 @router.get("/{kliento_id}/orders", response_model=list[schemas_order.OrderOut], 
             operation_id="getClientOrder", dependencies=[Depends(require_perm(Perm.VIEW))])
 
-def get_client_orders(kliento_id: int, db: Session = Depends(get_db)):
+def get_client_orders(
+    kliento_id: int,
+    db: Session = Depends(get_db),
+    links: LinksMode = Depends(links_param),
+    fs: FieldSet = Depends(CLIENT_ORDER_FIELDSET),
+):
     """
     Retrieve all orders for a specific client.
 
@@ -189,15 +203,81 @@ def get_client_orders(kliento_id: int, db: Session = Depends(get_db)):
 
     Author: Ivan Bruner <ivan.bruner@stud.viko.lt>
     """
-    orders = order_repo.get_by_client_id(db, kliento_id)
-    return [
-        {
-            **order.__dict__,
-            "links": [
-                {"rel": "self", "href": f"/orders/{order.uzsakymo_id}"},
-                {"rel": "car", "href": f"/cars/{order.automobilio_id}"},
-                {"rel": "delete", "href": f"/orders/{order.uzsakymo_id}"}
-            ]
-        }
-        for order in orders
+    orders = order_repo.get_by_client_id(db, kliento_id, fields=fs.columns)
+    return fs.respond([to_dict(order, fs.columns) for order in orders], "client_orders", links)
+
+
+@router.get("/{kliento_id}/orders/history", response_model=list[schemas_order.ClientOrderHistoryOut],
+            operation_id="getClientOrderHistory", dependencies=[Depends(require_perm(Perm.VIEW))])
+def get_client_order_history(
+    kliento_id: int,
+    request: Request,
+    db: Session = Depends(get_db),
+    limit: int = Query(50, ge=1, le=500, description="Page size"),
+    cursor: str | None = Query(None, description="Value of X-Next-Cursor from the previous page"),
+    links: LinksMode = Depends(links_param),
+):
+    """
+    Page through a client's orders, newest first, with their invoices.
+
+    Each page is one query (orders LEFT JOIN invoices) that continues after
+    the last order ID of the previous page, so deep pages of large clients
+    cost the same as the first one.
+
+    Args:
+        kliento_id (int): Client identifier.
+        request (Request): Current request (for the next page URL).
+        db (Session): SQLAlchemy session.
+        limit (int): Page size; the next page is announced in X-Next-Cursor and Link headers.
+        cursor (str): Cursor of the page to return.
+
+    Returns:
+        list[ClientOrderHistoryOut]: Orders with invoice data and HATEOAS links.
+
+    Raises:
+        HTTPException: If the client is not found or the cursor is invalid.
+    """
+    if not db.query(Client.kliento_id).filter(Client.kliento_id == kliento_id).first():
+        raise HTTPException(status_code=404, detail="Client not found")
+
+    key = (Order.uzsakymo_id,)
+    after = decode_cursor(cursor, key) if cursor else None
+    rows = keyset(order_repo.history_query(db, kliento_id), key, after, descending=True).limit(limit + 1).all()
+
+    headers = {}
+    if len(rows) > limit:
+        rows = rows[:limit]
+        headers = next_page_headers(request, encode_cursor((rows[-1].uzsakymo_id,)))
+    fields = order_repo.HISTORY_FIELDS + order_repo.HISTORY_INVOICE_FIELDS
+    items = [dict(zip(fields, row)) for row in rows]
+    headers.update(apply_links(items, "client_orders", links))
+    return FastJSONResponse(items, headers=headers)
+
+
+@router.get("/{kliento_id}/stats", response_model=schemas_client.ClientStatsOut,
+            operation_id="getClientStats", dependencies=[Depends(require_perm(Perm.VIEW))])
+def get_client_stats(kliento_id: int, db: Session = Depends(get_db)):
+    """
+    Order count, spend and bonus points of a client.
+
+    Answered from the precomputed statistics row, which a background job
+    refreshes after the client's orders or invoices change.
+
+    Args:
+        kliento_id (int): Client identifier.
+        db (Session): SQLAlchemy session.
+
+    Returns:
+        ClientStatsOut: Client statistics with HATEOAS links.
+
+    Raises:
+        HTTPException: If the client is not found.
+    """
+    stats = client_stats.get_stats(db, kliento_id)
+    if stats is None:
+        raise HTTPException(status_code=404, detail="Client not found")
+    stats["links"] = [
+        {"rel": "client", "href": f"/clients/{kliento_id}"},
+        {"rel": "orders", "href": f"/clients/{kliento_id}/orders"},
     ]
+    return stats
@@ -18,8 +18,11 @@ from app.repositories import client_support
 from app.api.deps import get_current_user
 from datetime import datetime, timedelta
 from app.models.client_support import ClientSupport
+from utils.serialization import FastJSONResponse, schema_fields, to_dict
+from utils.hateoas import LinksMode, apply_links, links_param
 
 from app.api.permissions import require_perm, Perm
+from app.services import job_queue
 
 router = APIRouter(
     prefix="/support",
@@ -27,6 +30,8 @@ router = APIRouter(
     dependencies=[Depends(get_current_user)]
 )
 
+SUPPORT_FIELDS = schema_fields(ClientSupportOut, exclude=("links",))
+
 def build_support_links(support) -> list[dict]:
     """
     Build HATEOAS links for a client support request.
@@ -56,6 +61,7 @@ def build_support_links(support) -> list[dict]:
 def get_overdue_supports(
     hours: int = Query(24, ge=1, le=7*24, description="Hours since creation to consider a ticket overdue"),
     db: Session = Depends(get_db),
+    links: LinksMode = Depends(links_param),
 ):
     """
     Retrieve overdue (unanswered) client support requests older than the given number of hours.
@@ -81,13 +87,8 @@ def get_overdue_supports(
 
     items = q.order_by(ClientSupport.pateikimo_data.asc()).all()
 
-    return [
-        {
-            **item.__dict__,
-            "links": build_support_links(item)
-        }
-        for item in items
-    ]
+    data = [to_dict(item, SUPPORT_FIELDS) for item in items]
+    return FastJSONResponse(data, headers=apply_links(data, "support", links))
 
 
 @router.post("/", response_model=ClientSupportOut, operation_id="createSupport", 
@@ -114,7 +115,7 @@ def create_support(support: ClientSupportCreate, db: Session = Depends(get_db)):
 
 @router.get("/", response_model=list[ClientSupportOut], operation_id="getAllSupports",
             dependencies=[Depends(require_perm(Perm.VIEW))])
-def get_all_supports(db: Session = Depends(get_db)):
+def get_all_supports(db: Session = Depends(get_db), links: LinksMode = Depends(links_param)):
     """
     Retrieve all client support requests.
 
@@ -127,17 +128,12 @@ def get_all_supports(db: Session = Depends(get_db)):
     Author: Ivan Bruner <ivan.bruner@stud.viko.lt>
     """
     items = client_support.get_all_support_requests(db)
-    return [
-        {
-            **item.__dict__,
-            "links": build_support_links(item)
-        }
-        for item in items
-    ]
+    data = [to_dict(item, SUPPORT_FIELDS) for item in items]
+    return FastJSONResponse(data, headers=apply_links(data, "support", links))
 
 @router.get("/unanswered", response_model=list[ClientSupportOut], operation_id="getUnansweredSupports",
             dependencies=[Depends(require_perm(Perm.VIEW))])
-def get_unanswered_supports(db: Session = Depends(get_db)):
+def get_unanswered_supports(db: Session = Depends(get_db), links: LinksMode = Depends(links_param)):
     """
     Retrieve all unanswered client support requests.
 
@@ -150,17 +146,12 @@ def get_unanswered_supports(db: Session = Depends(get_db)):
     Author: Ivan Bruner <ivan.bruner@stud.viko.lt>
     """
     items = client_support.get_unanswered_requests(db)
-    return [
-        {
-            **item.__dict__,
-            "links": build_support_links(item)
-        }
-        for item in items
-    ]
+    data = [to_dict(item, SUPPORT_FIELDS) for item in items]
+    return FastJSONResponse(data, headers=apply_links(data, "support", links))
 
 @router.get("/{uzklausos_id}", response_model=ClientSupportOut, operation_id="getSupport",
             dependencies=[Depends(require_perm(Perm.VIEW))])
-def get_support(uzklausos_id: int, db: Session = Depends(get_db)):
+def get_support(uzklausos_id: int, db: Session = Depends(get_db), links: LinksMode = Depends(links_param)):
     """
     Retrieve a specific client support request by ID.
 
@@ -179,10 +170,8 @@ def get_support(uzklausos_id: int, db: Session = Depends(get_db)):
     support = client_support.get_support_request_by_id(db, uzklausos_id)
     if not support:
         raise HTTPException(status_code=404, detail="Support request not found")
-    return {
-        **support.__dict__,
-        "links": build_support_links(support)
-    }
+    data = to_dict(support, SUPPORT_FIELDS)
+    return FastJSONResponse(data, headers=apply_links(data, "support", links))
 
 @router.patch("/{uzklausos_id}", response_model=ClientSupportOut, operation_id="answerToSupport",
               dependencies=[Depends(require_perm(Perm.EDIT))])
@@ -203,6 +192,9 @@ def answer_to_support(uzklausos_id: int, data: ClientSupportUpdate, db: Session
 
     Author: Ivan Bruner <ivan.bruner@stud.viko.lt>
     """
+    if data.dict(exclude_unset=True).get("atsakymas"):
+        # Atsakymas klientui išsiunčiamas fone, įsipareigojus kartu su atnaujinimu
+        job_queue.enqueue(db, "email.support_answered", {"uzklausos_id": uzklausos_id})
     updated = client_support.update_support_request(db, uzklausos_id, data)
     if not updated:
         raise HTTPException(status_code=404, detail="Support request not found")
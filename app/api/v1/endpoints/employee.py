@@ -16,7 +16,8 @@ from app.schemas.employee import EmployeeOut, EmployeeUpdate
 from app.schemas.employee import EmployeeCreate
 from app.api.deps import get_db
 from app.services.auth_service import get_password_hash
-from utils.hateoas import generate_links
+from utils.hateoas import LinksMode, apply_links, generate_links, links_param
+from utils.serialization import FastJSONResponse, schema_fields, to_dict
 from app.api.deps import get_current_user
 from app.api.permissions import require_perm, Perm
 
@@ -26,6 +27,8 @@ router = APIRouter(
     dependencies=[Depends(get_current_user)]
 )
 
+EMPLOYEE_FIELDS = schema_fields(EmployeeOut, exclude=("links",))
+
 @router.post("/", response_model=EmployeeOut, operation_id="createEmployee",
              dependencies=[Depends(require_perm(Perm.EDIT))])
 def create_employee(data: EmployeeCreate, db: Session = Depends(get_db)):
@@ -57,7 +60,7 @@ def create_employee(data: EmployeeCreate, db: Session = Depends(get_db)):
 
 @router.get("/", response_model=list[EmployeeOut], operation_id="getAllEmployees",
             dependencies=[Depends(require_perm(Perm.VIEW))])
-def get_employees(db: Session = Depends(get_db)):
+def get_employees(db: Session = Depends(get_db), links: LinksMode = Depends(links_param)):
     """
     Retrieve all employees.
 
@@ -70,17 +73,12 @@ def get_employees(db: Session = Depends(get_db)):
     Author: Astijus Grinevičius <astijus.grinevicius@stud.viko.lt>
     """
     employees = employee_repo.get_all(db)
-    return [
-        {
-            **emp.__dict__,
-            "links": generate_links("employees", emp.darbuotojo_id, ["update", "delete"])
-        }
-        for emp in employees
-    ]
+    data = [to_dict(emp, EMPLOYEE_FIELDS) for emp in employees]
+    return FastJSONResponse(data, headers=apply_links(data, "employees", links))
 
 @router.get("/{employee_id}", response_model=EmployeeOut, operation_id="getEmployee",
             dependencies=[Depends(require_perm(Perm.VIEW))])
-def get_employee(employee_id: int, db: Session = Depends(get_db)):
+def get_employee(employee_id: int, db: Session = Depends(get_db), links: LinksMode = Depends(links_param)):
     """
     Retrieve an employee by ID.
 
@@ -99,10 +97,8 @@ def get_employee(employee_id: int, db: Session = Depends(get_db)):
     employee = employee_repo.get_by_id(db, employee_id)
     if not employee:
         raise HTTPException(status_code=404, detail="Employee not found")
-    return {
-        **employee.__dict__,
-        "links": generate_links("employees", employee.darbuotojo_id, ["update", "delete"])
-    }
+    data = to_dict(employee, EMPLOYEE_FIELDS)
+    return FastJSONResponse(data, headers=apply_links(data, "employees", links))
 
 @router.put("/{employee_id}", response_model=EmployeeOut, operation_id="updateEmployee",
             dependencies=[Depends(require_perm(Perm.EDIT))])
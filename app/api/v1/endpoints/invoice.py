@@ -9,12 +9,20 @@ Description:
     Implements RESTful API routes for invoice CRUD operations and status updates.
     All endpoints return data with HATEOAS links for easier frontend navigation.
 """
-from fastapi import APIRouter, Depends, HTTPException
+from datetime import date
+
+from fastapi import APIRouter, Depends, HTTPException, Query
+from fastapi.responses import FileResponse
+from sqlalchemy.exc import IntegrityError
 from sqlalchemy.orm import Session
 from app.api.deps import get_db
-from app.schemas.invoice import InvoiceCreate, InvoiceStatusUpdate, InvoiceOut
+from app.schemas.invoice import InvoiceCreate, InvoiceGenerateResult, InvoiceStatusUpdate, InvoiceOut
+from app.schemas.bulk import BulkStatusUpdate, BulkStatusResult
 from app.repositories import invoice as crud_invoice
-from utils.hateoas import generate_links
+from utils.hateoas import LinksMode, generate_links, links_param
+from app.api.fieldsets import FieldSet, fieldset
+from app.api.idempotency import IdempotentRequest, idempotent
+from app.services import invoice_pdf, job_queue
 from app.models.order import Order
 from app.models import client as klientas_model
 from app.models.invoice import Invoice 
@@ -27,6 +35,9 @@ router = APIRouter(
     dependencies=[Depends(get_current_user)]
 )
 
+INVOICE_FIELDSET = fieldset(InvoiceOut, "invoices", key="invoice_id")
+INVOICE_IDEMPOTENCY = idempotent("createInvoice", InvoiceOut)
+
 def generate_invoice_links(invoice) -> list[dict]:
     """
     Build HATEOAS links for an invoice.
@@ -50,7 +61,11 @@ def generate_invoice_links(invoice) -> list[dict]:
 
 @router.get("/", response_model=list[InvoiceOut], operation_id="getAllInvoices",
             dependencies=[Depends(require_perm(Perm.VIEW))])
-def get_all_invoices(db: Session = Depends(get_db)):
+def get_all_invoices(
+    db: Session = Depends(get_db),
+    links: LinksMode = Depends(links_param),
+    fs: FieldSet = Depends(INVOICE_FIELDSET),
+):
     """
     Retrieve all invoices.
 
@@ -62,42 +77,58 @@ def get_all_invoices(db: Session = Depends(get_db)):
 
     Author: Vytautas Petronis <vytautas.petronis@stud.viko.lt>
     """
-    raw_data = crud_invoice.get_invoice(db)
-    return [
-        {
-            **invoice,
-            "links": generate_invoice_links(invoice)
-        }
-        for invoice in raw_data
-    ]
+    raw_data = crud_invoice.get_invoice(db, fields=fs.columns)
+    return fs.respond(raw_data, "invoices", links)
 
 @router.post("/", response_model=InvoiceOut, operation_id="createInvoice",
              dependencies=[Depends(require_perm(Perm.EDIT))])
-def create_invoice(invoice: InvoiceCreate, db: Session = Depends(get_db)):
+def create_invoice(
+    invoice: InvoiceCreate,
+    db: Session = Depends(get_db),
+    idem: IdempotentRequest = Depends(INVOICE_IDEMPOTENCY),
+):
     """
     Create a new invoice.
 
     Args:
         invoice (InvoiceCreate): Invoice creation schema.
         db (Session): SQLAlchemy session.
+        idem (IdempotentRequest): `Idempotency-Key` reservation; a retry gets the stored response.
 
     Returns:
         InvoiceOut: Created invoice with HATEOAS links.
 
+    Raises:
+        HTTPException: 404 if the order does not exist, 400 if it already has
+            an invoice, 409 if a parallel request invoiced it first.
+
     Author: Vytautas Petronis <vytautas.petronis@stud.viko.lt>
     """
+    order = db.query(Order).filter(Order.uzsakymo_id == invoice.order_id).first()
+    if not order:
+        raise HTTPException(status_code=404, detail="Order not found")
+
     existing = db.query(Invoice).filter(Invoice.uzsakymo_id == invoice.order_id).first()
     if existing:
         raise HTTPException(status_code=400, detail="This order already has an invoice.")
 
+    # Pranešimas klientui – užduotis įrašoma kartu su sąskaita, siunčia foninis workeris
+    job_queue.enqueue(db, "email.invoice_created", {"uzsakymo_id": invoice.order_id})
+    job_queue.enqueue(db, "invoice.render_pdf", {"uzsakymo_id": invoice.order_id})
+
     # Sukurti sąskaitą
-    created = crud_invoice.create_invoice(db, invoice)
+    try:
+        created = crud_invoice.create_invoice(db, invoice)
+    except IntegrityError:
+        # 409 tik unikalaus indekso pažeidimui – lygiagreti užklausa spėjo išrašyti sąskaitą
+        if db.query(Invoice.saskaitos_id).filter(Invoice.uzsakymo_id == invoice.order_id).first():
+            raise HTTPException(status_code=409, detail="This order already has an invoice.")
+        raise
 
     # Paimti papildomą info
-    order = db.query(Order).filter(Order.uzsakymo_id == created.uzsakymo_id).first()
     client = db.query(klientas_model.Client).filter(klientas_model.Client.kliento_id == order.kliento_id).first()
 
-    return {
+    return idem.save(db, {
         "invoice_id": created.saskaitos_id,
         "order_id": created.uzsakymo_id,
         "kliento_id": order.kliento_id,
@@ -107,7 +138,41 @@ def create_invoice(invoice: InvoiceCreate, db: Session = Depends(get_db)):
         "client_first_name": client.vardas,
         "client_last_name": client.pavarde,
         "links": generate_invoice_links(created)
-    }
+    })
+
+@router.post("/generate", response_model=InvoiceGenerateResult, operation_id="generateInvoices",
+             dependencies=[Depends(require_perm(Perm.EDIT))])
+def generate_invoices(
+    invoice_date: date = Query(None, description="Date of the new invoices (today by default)"),
+    db: Session = Depends(get_db),
+):
+    """
+    Month-end run: create invoices for all completed orders that have none.
+
+    The e-mails and the PDFs of the new invoices are queued as background jobs
+    in the same transaction.
+
+    Args:
+        invoice_date (date, optional): Date of the new invoices, today by default.
+        db (Session): SQLAlchemy session.
+
+    Returns:
+        InvoiceGenerateResult: Number of created invoices.
+
+    Raises:
+        HTTPException: 409 if one of the orders was invoiced meanwhile (nothing is created).
+    """
+    invoice_date = invoice_date or date.today()
+    try:
+        order_ids = crud_invoice.generate_missing(db, invoice_date)
+    except IntegrityError:
+        db.rollback()
+        raise HTTPException(status_code=409, detail="Invoices were created concurrently, retry the run.")
+    if order_ids:
+        job_queue.enqueue_many(db, "email.invoice_created", [{"uzsakymo_id": order_id} for order_id in order_ids])
+        job_queue.enqueue(db, "invoice.prerender_month", {"month": invoice_date.strftime("%Y-%m")}, max_attempts=3)
+    db.commit()
+    return {"created": len(order_ids), "invoice_date": invoice_date}
 
 @router.delete("/{invoice_id}", operation_id="deleteInvoice", dependencies=[Depends(require_perm(Perm.ADMIN))])
 def delete_invoice(invoice_id: int, db: Session = Depends(get_db)):
@@ -131,6 +196,24 @@ def delete_invoice(invoice_id: int, db: Session = Depends(get_db)):
         raise HTTPException(status_code=404, detail="Invoice not found")
     return {"detail": "Invoice deleted"}
 
+@router.patch("/status", response_model=BulkStatusResult, operation_id="updateInvoicesStatus",
+              dependencies=[Depends(require_perm(Perm.EDIT))])
+def update_invoices_status(data: BulkStatusUpdate, db: Session = Depends(get_db)):
+    """
+    Change the status of many invoices with one UPDATE statement.
+
+    The status of an invoice is the status of its order.
+
+    Args:
+        data (BulkStatusUpdate): IDs and/or current status to select, and the new status.
+        db (Session): SQLAlchemy session.
+
+    Returns:
+        BulkStatusResult: Number of updated invoices.
+    """
+    updated = crud_invoice.bulk_update_status(db, data.status, ids=data.ids, from_status=data.from_status)
+    return {"updated": updated, "status": data.status}
+
 @router.patch("/{invoice_id}/status", response_model=InvoiceOut, operation_id="updateStatus",
               dependencies=[Depends(require_perm(Perm.EDIT))])
 def update_status(invoice_id: int, status: InvoiceStatusUpdate, db: Session = Depends(get_db)):
@@ -166,9 +249,63 @@ def update_status(invoice_id: int, status: InvoiceStatusUpdate, db: Session = De
         "client_last_name": client.pavarde,
         "links": generate_invoice_links(updated)
     }
+@router.post("/pdf/prerender", status_code=202, operation_id="prerenderInvoicePdfs",
+             dependencies=[Depends(require_perm(Perm.EDIT))])
+def prerender_invoice_pdfs(
+    month: str = Query(..., pattern=r"^\d{4}-(0[1-9]|1[0-2])$", description="Month as YYYY-MM"),
+    db: Session = Depends(get_db),
+):
+    """
+    Queue rendering of the PDFs of all invoices issued in a month (month-end run).
+
+    Args:
+        month (str): Month as YYYY-MM.
+        db (Session): SQLAlchemy session.
+
+    Returns:
+        dict: Month and the ID of the background job.
+    """
+    job = job_queue.enqueue(db, "invoice.prerender_month", {"month": month}, max_attempts=3)
+    db.commit()
+    return {"month": month, "job_id": job.uzduoties_id}
+
+@router.get("/{invoice_id}/pdf", response_class=FileResponse, operation_id="getInvoicePdf",
+            dependencies=[Depends(require_perm(Perm.VIEW))])
+def get_invoice_pdf(invoice_id: int, db: Session = Depends(get_db)):
+    """
+    Download an invoice as PDF.
+
+    The PDF is served from the disk cache when the invoice data has not
+    changed since it was rendered. The endpoint is synchronous, so loading
+    and rendering run in the thread pool, not on the event loop.
+
+    Args:
+        invoice_id (int): Invoice identifier.
+        db (Session): SQLAlchemy session.
+
+    Returns:
+        FileResponse: application/pdf document.
+
+    Raises:
+        HTTPException: If invoice not found.
+    """
+    context = invoice_pdf.load(db, invoice_id)
+    if context is None:
+        raise HTTPException(status_code=404, detail="Invoice not found")
+    path, _ = invoice_pdf.get_or_render(context)
+    return FileResponse(
+        path, media_type="application/pdf",
+        filename=f"saskaita_{invoice_id}.pdf", content_disposition_type="inline",
+    )
+
 @router.get("/{invoice_id}", response_model=InvoiceOut, operation_id="getInvoiceById",
             dependencies=[Depends(require_perm(Perm.VIEW))])
-def get_invoice_by_id(invoice_id: int, db: Session = Depends(get_db)):
+def get_invoice_by_id(
+    invoice_id: int,
+    db: Session = Depends(get_db),
+    links: LinksMode = Depends(links_param),
+    fs: FieldSet = Depends(INVOICE_FIELDSET),
+):
     """
     Get a single invoice by ID.
 
@@ -182,21 +319,7 @@ def get_invoice_by_id(invoice_id: int, db: Session = Depends(get_db)):
     Raises:
         HTTPException: If invoice not found.
     """
-    invoice = crud_invoice.get_invoice_by_id(db, invoice_id)
+    invoice = crud_invoice.get_invoice_details(db, invoice_id, fields=fs.columns)
     if not invoice:
         raise HTTPException(status_code=404, detail="Invoice not found")
-
-    order = db.query(Order).filter(Order.uzsakymo_id == invoice.uzsakymo_id).first()
-    client = db.query(klientas_model.Client).filter(klientas_model.Client.kliento_id == order.kliento_id).first()
-
-    return {
-        "invoice_id": invoice.saskaitos_id,
-        "order_id": invoice.uzsakymo_id,
-        "kliento_id": order.kliento_id,
-        "total": invoice.suma,
-        "invoice_date": str(invoice.saskaitos_data),
-        "status": order.uzsakymo_busena,
-        "client_first_name": client.vardas,
-        "client_last_name": client.pavarde,
-        "links": generate_invoice_links(invoice)
-    }
+    return fs.respond(invoice, "invoices", links)
@@ -13,8 +13,13 @@ from fastapi import APIRouter, Depends, HTTPException
 from sqlalchemy.orm import Session
 from app.api.deps import get_db
 from app.schemas import order as schemas
+from app.schemas.bulk import BulkStatusUpdate, BulkStatusResult
 from app.repositories import order as repo
-from utils.hateoas import generate_links
+from utils.hateoas import LinksMode, generate_links, links_param
+from utils.serialization import to_dict
+from app.api.fieldsets import FieldSet, fieldset
+from app.api.idempotency import IdempotentRequest, idempotent
+from app.models.order import Order
 from app.api.deps import get_current_user
 from app.api.permissions import require_perm, Perm
 
@@ -24,9 +29,16 @@ router = APIRouter(
     dependencies=[Depends(get_current_user)]
 )
 
+ORDER_FIELDSET = fieldset(schemas.OrderOut, "orders", key="uzsakymo_id")
+ORDER_IDEMPOTENCY = idempotent("createOrder", schemas.OrderOut)
+
 @router.get("/", response_model=list[schemas.OrderOut], operation_id="getAllOrders",
             dependencies=[Depends(require_perm(Perm.VIEW))])
-def get_all_orders(db: Session = Depends(get_db)):
+def get_all_orders(
+    db: Session = Depends(get_db),
+    links: LinksMode = Depends(links_param),
+    fs: FieldSet = Depends(ORDER_FIELDSET),
+):
     """
     Retrieve all orders.
 
@@ -38,23 +50,17 @@ def get_all_orders(db: Session = Depends(get_db)):
 
     Author: Astijus Grinevičius <astijus.grinevicius@stud.viko.lt>
     """
-    orders = repo.get_all(db)
-    return [
-        {
-            **order.__dict__,
-            "links": [
-                {"rel": "self", "href": f"/orders/{order.uzsakymo_id}"},
-                {"rel": "client", "href": f"/clients/{order.kliento_id}"},
-                {"rel": "car", "href": f"/cars/{order.automobilio_id}"},
-                {"rel": "delete", "href": f"/orders/{order.uzsakymo_id}"}
-            ]
-        }
-        for order in orders
-    ]
+    orders = repo.get_all(db, fields=fs.columns)
+    return fs.respond([to_dict(order, fs.columns) for order in orders], "orders", links)
 
 @router.get("/{uzsakymo_id}", response_model=schemas.OrderOut, operation_id="getOrderById",
             dependencies=[Depends(require_perm(Perm.VIEW))])
-def get_order(uzsakymo_id: int, db: Session = Depends(get_db)):
+def get_order(
+    uzsakymo_id: int,
+    db: Session = Depends(get_db),
+    links: LinksMode = Depends(links_param),
+    fs: FieldSet = Depends(ORDER_FIELDSET),
+):
     """
     Retrieve an order by ID.
 
@@ -70,28 +76,25 @@ def get_order(uzsakymo_id: int, db: Session = Depends(get_db)):
 
     Author: Astijus Grinevičius <astijus.grinevicius@stud.viko.lt>
     """
-    order = repo.get_by_id(db, uzsakymo_id)
+    order = repo.rows_query(db, fs.columns).filter(Order.uzsakymo_id == uzsakymo_id).first()
     if not order:
         raise HTTPException(status_code=404, detail="Order not found")
-    return {
-        **order.__dict__,
-        "links": [
-            {"rel": "self", "href": f"/orders/{order.uzsakymo_id}"},
-            {"rel": "client", "href": f"/clients/{order.kliento_id}"},
-            {"rel": "car", "href": f"/cars/{order.automobilio_id}"},
-            {"rel": "delete", "href": f"/orders/{order.uzsakymo_id}"}
-        ]
-    }
+    return fs.respond(to_dict(order, fs.columns), "orders", links)
 
 @router.post("/", response_model=schemas.OrderOut, operation_id="createOrder",
              dependencies=[Depends(require_perm(Perm.EDIT))])
-def create_order(order: schemas.OrderCreate, db: Session = Depends(get_db)):
+def create_order(
+    order: schemas.OrderCreate,
+    db: Session = Depends(get_db),
+    idem: IdempotentRequest = Depends(ORDER_IDEMPOTENCY),
+):
     """
     Create a new order.
 
     Args:
         order (OrderCreate): Order creation schema.
         db (Session): SQLAlchemy session.
+        idem (IdempotentRequest): `Idempotency-Key` reservation; a retry gets the stored response.
 
     Returns:
         OrderOut: Created order with HATEOAS links.
@@ -99,7 +102,7 @@ def create_order(order: schemas.OrderCreate, db: Session = Depends(get_db)):
     Author: Astijus Grinevičius <astijus.grinevicius@stud.viko.lt>
     """
     created = repo.create(db, order)
-    return {
+    return idem.save(db, {
         **created.__dict__,
         "links": [
             {"rel": "self", "href": f"/orders/{created.uzsakymo_id}"},
@@ -107,7 +110,7 @@ def create_order(order: schemas.OrderCreate, db: Session = Depends(get_db)):
             {"rel": "car", "href": f"/cars/{created.automobilio_id}"},
             {"rel": "delete", "href": f"/orders/{created.uzsakymo_id}"}
         ]
-    }
+    })
 
 @router.delete("/{uzsakymo_id}", operation_id="deleteOrder",
                dependencies=[Depends(require_perm(Perm.ADMIN))])
@@ -150,7 +153,12 @@ def get_order_stats_by_status(db: Session = Depends(get_db)):
 
 @router.get("/by-client/{kliento_id}", response_model=list[schemas.OrderOut],
              operation_id="getOrderByClient", dependencies=[Depends(require_perm(Perm.VIEW))])
-def get_orders_by_client(kliento_id: int, db: Session = Depends(get_db)):
+def get_orders_by_client(
+    kliento_id: int,
+    db: Session = Depends(get_db),
+    links: LinksMode = Depends(links_param),
+    fs: FieldSet = Depends(ORDER_FIELDSET),
+):
     """
     Retrieve all orders for a specific client.
 
@@ -163,20 +171,25 @@ def get_orders_by_client(kliento_id: int, db: Session = Depends(get_db)):
 
     Author: Astijus Grinevičius <astijus.grinevicius@stud.viko.lt>
     """
-    orders = repo.get_by_client_id(db, kliento_id)
-    return [
-        {
-            **order.__dict__,
-            "links": [
-                {"rel": "self", "href": f"/orders/{order.uzsakymo_id}"},
-                {"rel": "client", "href": f"/clients/{order.kliento_id}"},
-                {"rel": "car", "href": f"/cars/{order.automobilio_id}"},
-                {"rel": "delete", "href": f"/orders/{order.uzsakymo_id}"}
-            ]
-        }
-        for order in orders
-    ]
+    orders = repo.get_by_client_id(db, kliento_id, fields=fs.columns)
+    return fs.respond([to_dict(order, fs.columns) for order in orders], "orders", links)
+
+
+@router.patch("/status", response_model=BulkStatusResult, operation_id="updateOrdersStatus",
+              dependencies=[Depends(require_perm(Perm.EDIT))])
+def update_orders_status(data: BulkStatusUpdate, db: Session = Depends(get_db)):
+    """
+    Change the status of many orders with one UPDATE statement.
 
+    Args:
+        data (BulkStatusUpdate): IDs and/or current status to select, and the new status.
+        db (Session): SQLAlchemy session.
+
+    Returns:
+        BulkStatusResult: Number of updated orders.
+    """
+    updated = repo.bulk_update_status(db, data.status, ids=data.ids, from_status=data.from_status)
+    return {"updated": updated, "status": data.status}
 
 @router.put("/{uzsakymo_id}", response_model=schemas.OrderOut, operation_id="updateOrder",
             dependencies=[Depends(require_perm(Perm.EDIT))])
@@ -0,0 +1,144 @@
+"""
+app/api/v1/endpoints/report.py
+
+API endpoints for aggregate reports.
+
+Description:
+    GET /reports/revenue sums invoice amounts in the database, grouped by
+    day, month, car, client or pick-up location, and streams the JSON array
+    while the rows are read.
+
+    A report whose period ended before the current month ("closed") changes
+    rarely: its encoded body is kept in memory (REPORT_CACHE_SIZE most recent
+    reports) under the current versions of the resources it is built from.
+    Invoices can still be created, backdated or deleted and labels come from
+    cars and clients, so any such write makes a new cache key. Clients
+    revalidate with the version-based ETag (app/middleware/conditional.py).
+"""
+import os
+import threading
+from collections import OrderedDict
+from datetime import date
+
+from fastapi import APIRouter, Depends, HTTPException, Query
+from fastapi.responses import Response, StreamingResponse
+
+from app.api.deps import get_current_user
+from app.api.permissions import require_perm, Perm
+from app.db.session import SessionLocal
+from app.repositories import report as report_repo
+from app.schemas.report import RevenueGroup, RevenueRow
+from app.services import resource_versions
+from utils.serialization import dumps
+
+router = APIRouter(
+    prefix="/reports",
+    tags=["Reports"],
+    dependencies=[Depends(get_current_user)]
+)
+
+REPORT_CACHE_SIZE = int(os.getenv("REPORT_CACHE_SIZE", "256"))
+# Srauto gabalo dydis (baitais)
+STREAM_CHUNK = 64 * 1024
+# Resursai, iš kurių sudaroma ataskaita (jų versijos – talpyklos rakto dalis)
+REPORT_RESOURCES = ("invoices", "orders", "cars", "clients")
+
+_closed_reports: "OrderedDict[tuple, bytes]" = OrderedDict()
+_cache_lock = threading.Lock()
+
+
+def is_closed(date_to: date = None, today: date = None) -> bool:
+    """
+    Whether a period ends before the current month (its invoices rarely change).
+
+    Args:
+        date_to (date, optional): Last day of the period (None – open-ended).
+        today (date, optional): Current day (for tests).
+
+    Returns:
+        bool: True for a closed period.
+    """
+    today = today or date.today()
+    return date_to is not None and date_to < today.replace(day=1)
+
+
+def _cached(key: tuple) -> bytes | None:
+    with _cache_lock:
+        body = _closed_reports.get(key)
+        if body is not None:
+            _closed_reports.move_to_end(key)
+        return body
+
+
+def _store(key: tuple, body: bytes) -> None:
+    with _cache_lock:
+        _closed_reports[key] = body
+        if len(_closed_reports) > REPORT_CACHE_SIZE:
+            _closed_reports.popitem(last=False)
+
+
+def _stream_revenue(group_by: RevenueGroup, date_from: date, date_to: date, cache_key: tuple = None):
+    """
+    Encode report rows into a JSON array chunk by chunk.
+
+    The generator has its own session: the request session is closed before a
+    streaming body is sent. A fully sent closed-period report is cached.
+    """
+    db = SessionLocal()
+    parts = [] if cache_key is not None else None
+    buffer = bytearray(b"[")
+    try:
+        for i, row in enumerate(report_repo.revenue(db, group_by, date_from, date_to)):
+            if i:
+                buffer += b","
+            buffer += dumps(row)
+            if len(buffer) >= STREAM_CHUNK:
+                chunk = bytes(buffer)
+                buffer.clear()
+                if parts is not None:
+                    parts.append(chunk)
+                yield chunk
+        buffer += b"]"
+        chunk = bytes(buffer)
+        if parts is not None:
+            parts.append(chunk)
+            _store(cache_key, b"".join(parts))
+        yield chunk
+    finally:
+        db.close()
+
+
+@router.get("/revenue", response_model=list[RevenueRow], operation_id="getRevenueReport",
+            dependencies=[Depends(require_perm(Perm.VIEW))])
+def get_revenue_report(
+    group_by: RevenueGroup = Query(RevenueGroup.MONTH, description="day, month, car, client or location"),
+    date_from: date = Query(None, alias="from", description="First invoice day (inclusive)"),
+    date_to: date = Query(None, alias="to", description="Last invoice day (inclusive)"),
+):
+    """
+    Revenue (sum of invoice amounts) and invoice count per group.
+
+    Args:
+        group_by (RevenueGroup): Grouping of the rows.
+        date_from (date, optional): First invoice day.
+        date_to (date, optional): Last invoice day.
+
+    Returns:
+        list[RevenueRow]: Groups ordered by key, streamed as a JSON array.
+
+    Raises:
+        HTTPException: If `from` is after `to`.
+    """
+    if date_from and date_to and date_from > date_to:
+        raise HTTPException(status_code=400, detail="'from' must not be after 'to'")
+    if not is_closed(date_to):
+        return StreamingResponse(_stream_revenue(group_by, date_from, date_to), media_type="application/json")
+
+    # Pasenusios versijos raktai nebenaudojami ir iškrenta iš LRU
+    key = (group_by.value, date_from, date_to, resource_versions.snapshot(REPORT_RESOURCES)[0])
+    body = _cached(key)
+    if body is not None:
+        return Response(body, media_type="application/json")
+    return StreamingResponse(
+        _stream_revenue(group_by, date_from, date_to, cache_key=key), media_type="application/json",
+    )
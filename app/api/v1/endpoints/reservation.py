@@ -3,13 +3,18 @@ from sqlalchemy.orm import Session
 from app.api.deps import get_db
 from app.schemas import reservation as schemas
 from app.repositories import reservation as repo
-from utils.hateoas import generate_links
+from utils.hateoas import LinksMode, apply_links, generate_links, links_param
+from utils.serialization import FastJSONResponse, schema_fields, to_dict
+from app.api.fieldsets import FieldSet, fieldset
+from app.api.idempotency import IdempotentRequest, idempotent
 from typing import Optional
 from datetime import date
 from app.api.deps import get_current_user
 from app.api.permissions import require_perm, Perm
+from app.services import client_stats
 
 from app.models.car import Car
+from app.models.reservation import Reservation
 
 router = APIRouter(
     prefix="/reservations",
@@ -17,6 +22,12 @@ router = APIRouter(
     dependencies=[Depends(get_current_user)]
 )
 
+RESERVATION_FIELDSET = fieldset(schemas.ReservationOut, "reservations", key="rezervacijos_id")
+RESERVATION_DETAIL_FIELDSET = fieldset(schemas.ReservationOut, "reservation", key="rezervacijos_id")
+RESERVATION_IDEMPOTENCY = idempotent("createReservation", schemas.ReservationOut)
+BATCH_IDEMPOTENCY = idempotent("createReservationsBatch", schemas.ReservationBatchResult)
+SUMMARY_FIELDS = schema_fields(schemas.ReservationSummary, exclude=("links",))
+
 @router.get(
     "/quote",
     operation_id="getReservationQuote",
@@ -27,6 +38,7 @@ def get_reservation_quote(
     date_from: date = Query(..., description="YYYY-MM-DD (inclusive)"),
     date_to:   date = Query(..., description="YYYY-MM-DD (exclusive)"),
     discount: str | None = Query(None, description="Optional discount code, e.g. LOYALTY or WELCOME10"),
+    client_id: int | None = Query(None, description="Client asking for the quote (required for LOYALTY)"),
     db: Session = Depends(get_db),
 ):
     """
@@ -39,7 +51,8 @@ def get_reservation_quote(
           * >= 30 days: 20%
           * >= 7  days: 10%
       - Code discounts (optional):
-          * LOYALTY:   5%
+          * LOYALTY:   5% – only for `client_id` with enough completed
+                       orders (precomputed client statistics)
           * WELCOME10: 10%
       - Total discount = duration + code (capped at 50%)
 
@@ -48,6 +61,7 @@ def get_reservation_quote(
         date_from (date): Start date (inclusive).
         date_to (date): End date (exclusive).
         discount (str|None): Optional discount code.
+        client_id (int|None): Client the quote is for.
         db (Session): SQLAlchemy session.
 
     Returns:
@@ -83,6 +97,10 @@ def get_reservation_quote(
         "LOYALTY": 0.05,
         "WELCOME10": 0.10,
     }
+    if code_norm == "LOYALTY":
+        stats = client_stats.get_stats(db, client_id) if client_id is not None else None
+        if not (stats and stats["loyalty_eligible"]):
+            code_norm = ""
     if code_norm in code_map:
         code_pct = code_map[code_norm]
 
@@ -109,62 +127,65 @@ def get_reservation_quote(
 
 @router.get("/latest", response_model=list[schemas.ReservationSummary], 
             operation_id="getLatestReservations", dependencies=[Depends(require_perm(Perm.VIEW))])
-def get_latest_reservations(db: Session = Depends(get_db), limit: int = 5):
+def get_latest_reservations(db: Session = Depends(get_db), limit: int = 5, links: LinksMode = Depends(links_param)):
     """
     Get the latest reservations with details.
     """
     results = repo.get_latest_reservations_with_details(db, limit=limit)
-    return [
-        {
-            "rezervacijos_id": r.rezervacijos_id,
-            "rezervacijos_pradzia": r.rezervacijos_pradzia,
-            "rezervacijos_pabaiga": r.rezervacijos_pabaiga,
-            "automobilio_id": r.automobilio_id,
-            "kliento_id": r.kliento_id,
-            "busena": r.busena,
-            "marke": r.marke,
-            "modelis": r.modelis,
-            "vardas": r.vardas,
-            "pavarde": r.pavarde,
-            "links": [
-                {"rel": "self", "href": f"/reservations/{r.rezervacijos_id}"},
-                {"rel": "client", "href": f"/clients/{r.kliento_id}"},
-                {"rel": "car", "href": f"/cars/{r.automobilio_id}"}
-            ]
-        }
-        for r in results
-    ]
+    data = [to_dict(r, SUMMARY_FIELDS) for r in results]
+    return FastJSONResponse(data, headers=apply_links(data, "reservations", links))
 
 @router.get("/", response_model=list[schemas.ReservationOut], operation_id="getAllReservations",
             dependencies=[Depends(require_perm(Perm.VIEW))])
-def get_all_reservations(db: Session = Depends(get_db)):
+def get_all_reservations(
+    db: Session = Depends(get_db),
+    links: LinksMode = Depends(links_param),
+    fs: FieldSet = Depends(RESERVATION_FIELDSET),
+):
     """
     Retrieve all reservation records.
     """
-    reservations = repo.get_all(db)
-    return [
-        {
-            **res.__dict__,
-            "links": [
-                {"rel": "self", "href": f"/reservations/{res.rezervacijos_id}"},
-                {"rel": "client", "href": f"/clients/{res.kliento_id}"},
-                {"rel": "car", "href": f"/cars/{res.automobilio_id}"}
-            ]
-        }
-        for res in reservations
-    ]
+    reservations = repo.get_all(db, fields=fs.columns)
+    return fs.respond([to_dict(res, fs.columns) for res in reservations], "reservations", links)
 
 @router.post("/", response_model=schemas.ReservationOut, operation_id="createReservation",
              dependencies=[Depends(require_perm(Perm.EDIT))])
-def create_reservation(reservation: schemas.ReservationCreate, db: Session = Depends(get_db)):
+def create_reservation(
+    reservation: schemas.ReservationCreate,
+    db: Session = Depends(get_db),
+    idem: IdempotentRequest = Depends(RESERVATION_IDEMPOTENCY),
+):
     """
     Create a new reservation.
+
+    A retry with the same `Idempotency-Key` header gets the first response.
     """
     created = repo.create(db, reservation)
-    return {
+    return idem.save(db, {
         **created.__dict__,
         "links": generate_links("reservations", created.rezervacijos_id, ["delete"])
-    }
+    })
+
+@router.post("/batch", response_model=schemas.ReservationBatchResult, operation_id="createReservationsBatch",
+             dependencies=[Depends(require_perm(Perm.EDIT))])
+def create_reservations_batch(
+    batch: schemas.ReservationBatchCreate,
+    db: Session = Depends(get_db),
+    idem: IdempotentRequest = Depends(BATCH_IDEMPOTENCY),
+):
+    """
+    Create many reservations in one transaction.
+
+    Items overlapping an existing reservation of the same car, or an earlier
+    item of the batch, are reported as conflicts; the others are created.
+    A retry with the same `Idempotency-Key` header gets the first response.
+    """
+    results = repo.create_batch(db, batch.items)
+    for item in results:
+        if item["rezervacijos_id"] is not None:
+            item["links"] = generate_links("reservations", item["rezervacijos_id"], ["delete"])
+    created = sum(item["status"] == "created" for item in results)
+    return idem.save(db, {"created": created, "rejected": len(results) - created, "items": results})
 
 @router.put("/{rezervacijos_id}", response_model=schemas.ReservationOut, operation_id="updateReservation",
             dependencies=[Depends(require_perm(Perm.EDIT))])
@@ -205,7 +226,9 @@ def search_reservations(
     automobilio_id: Optional[int] = None,
     nuo: Optional[date] = None,
     iki: Optional[date] = None,
-    busena: Optional[str] = None
+    busena: Optional[str] = None,
+    links: LinksMode = Depends(links_param),
+    fs: FieldSet = Depends(RESERVATION_FIELDSET),
 ):
     """
     Search for reservations by multiple filters.
@@ -216,31 +239,28 @@ def search_reservations(
         automobilio_id=automobilio_id,
         nuo=nuo,
         iki=iki,
-        busena=busena
+        busena=busena,
+        fields=fs.columns
     )
-    return [
-        {
-            **res.__dict__,
-            "links": [
-                {"rel": "self", "href": f"/reservations/{res.rezervacijos_id}"},
-                {"rel": "client", "href": f"/clients/{res.kliento_id}"},
-                {"rel": "car", "href": f"/cars/{res.automobilio_id}"}
-            ]
-        }
-        for res in results
-    ]
+    return fs.respond([to_dict(res, fs.columns) for res in results], "reservations", links)
 
 @router.get("/{rezervacijos_id}", response_model=schemas.ReservationOut, operation_id="getReservationById",
             dependencies=[Depends(require_perm(Perm.VIEW))])
-def get_reservation(rezervacijos_id: int, db: Session = Depends(get_db)):
+def get_reservation(
+    rezervacijos_id: int,
+    db: Session = Depends(get_db),
+    links: LinksMode = Depends(links_param),
+    fs: FieldSet = Depends(RESERVATION_DETAIL_FIELDSET),
+):
     """
     Retrieve reservation by ID.
     """
-    res = repo.get_by_id(db, rezervacijos_id)
+    res = (
+        repo.rows_query(db, fs.columns)
+        .filter(Reservation.rezervacijos_id == rezervacijos_id)
+        .first()
+    )
     if not res:
         raise HTTPException(status_code=404, detail="Reservation not found")
-    return {
-        **res.__dict__,
-        "links": generate_links("reservations", res.rezervacijos_id, ["delete"])
-    }
+    return fs.respond(to_dict(res, fs.columns), "reservation", links)
 
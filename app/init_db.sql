@@ -15,7 +15,8 @@ CREATE TABLE `Klientai` (
  `telefono_nr` VARCHAR(255) NOT NULL,
  `gimimo_data` DATE NOT NULL,
  `registracijos_data` TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
- `bonus_taskai` INTEGER DEFAULT 0 CHECK (`bonus_taskai` >= 0)
+ `bonus_taskai` INTEGER DEFAULT 0 CHECK (`bonus_taskai` >= 0),
+ `bonus_korekcija` INTEGER NOT NULL DEFAULT 0
 );
 
 -- Sukuriama lentelė automobilių nuomos užsakymams saugoti
@@ -200,7 +201,7 @@ CREATE TABLE `Rezervavimas` (
   `automobilio_id` INTEGER NOT NULL,
   `rezervacijos_pradzia` DATE NOT NULL,
   `rezervacijos_pabaiga` DATE NOT NULL,
-  `busena` ENUM('patvirtinta', 'atšaukta', 'laukia') NOT NULL
+  `busena` ENUM('patvirtinta', 'atšaukta', 'laukia', 'baigta') NOT NULL
 );
 
 -- Sukuriama nuolaidų lentelė
@@ -252,6 +253,67 @@ CREATE TABLE `Automobilio_Grazinimo_Vieta` (
   `vietos_id` INTEGER NOT NULL
 );
 
+-- Pakeitimų žurnalas: API procesai jį skaito, kad išvalytų savo podėlius po kitų procesų įrašymų
+CREATE TABLE `pakeitimu_zurnalas` (
+  `pakeitimo_id` INTEGER PRIMARY KEY AUTO_INCREMENT,
+  `resursas` VARCHAR(50) NOT NULL,
+  `iraso_id` INTEGER,
+  `veiksmas` VARCHAR(10) NOT NULL,
+  `saltinis` VARCHAR(64) NOT NULL,
+  `sukurta` DATETIME NOT NULL,
+  INDEX `ix_pakeitimu_zurnalas_sukurta` (`sukurta`)
+);
+
+-- Pakartojimo raktai: išsaugoti POST atsakymai, kad pakartota užklausa nesukurtų dublikato
+CREATE TABLE `pakartojimo_raktai` (
+  `rakto_id` INTEGER PRIMARY KEY AUTO_INCREMENT,
+  `subjektas` VARCHAR(120) NOT NULL,
+  `raktas` VARCHAR(255) NOT NULL,
+  `operacija` VARCHAR(64) NOT NULL,
+  `uzklausos_maisa` VARCHAR(64) NOT NULL,
+  `busenos_kodas` INTEGER,
+  `atsakymas` TEXT,
+  `sukurta` DATETIME NOT NULL,
+  UNIQUE KEY `uq_pakartojimo_raktai_subjektas_raktas` (`subjektas`, `raktas`),
+  INDEX `ix_pakartojimo_raktai_sukurta` (`sukurta`)
+);
+
+-- Foninių užduočių eilė (el. laiškai, PDF, statistika) – vykdo app/services/job_queue.py
+CREATE TABLE `uzduociu_eile` (
+  `uzduoties_id` INTEGER PRIMARY KEY AUTO_INCREMENT,
+  `tipas` VARCHAR(64) NOT NULL,
+  `duomenys` TEXT NOT NULL,
+  `busena` VARCHAR(10) NOT NULL,
+  `bandymai` INTEGER NOT NULL DEFAULT 0,
+  `max_bandymai` INTEGER NOT NULL DEFAULT 5,
+  `paleisti_po` DATETIME NOT NULL,
+  `uzrakinta_iki` DATETIME,
+  `klaida` TEXT,
+  `sukurta` DATETIME NOT NULL,
+  `atnaujinta` DATETIME NOT NULL,
+  INDEX `ix_uzduociu_eile_busena_paleisti_po` (`busena`, `paleisti_po`)
+);
+
+-- Klientų užsakymų statistika (skaičiai, išlaidos) – perskaičiuoja app/services/client_stats.py
+CREATE TABLE `kliento_statistika` (
+  `kliento_id` INTEGER PRIMARY KEY,
+  `uzsakymu_skaicius` INTEGER NOT NULL DEFAULT 0,
+  `uzbaigti_uzsakymai` INTEGER NOT NULL DEFAULT 0,
+  `islaidos` DOUBLE NOT NULL DEFAULT 0,
+  `uzdirbti_taskai` INTEGER NOT NULL DEFAULT 0,
+  `panaudoti_taskai` INTEGER NOT NULL DEFAULT 0,
+  `pirmas_uzsakymas` DATE,
+  `paskutinis_uzsakymas` DATE,
+  `perskaiciuota` DATETIME NOT NULL
+);
+
+-- Panaudoti atnaujinimo žetonai (jti) – kiekvienas refresh žetonas tinka tik kartą
+CREATE TABLE `panaudoti_atnaujinimo_zetonai` (
+  `jti` VARCHAR(64) PRIMARY KEY,
+  `galioja_iki` DATETIME NOT NULL,
+  INDEX `ix_panaudoti_atnaujinimo_zetonai_galioja_iki` (`galioja_iki`)
+);
+
 -- Žemiau ALTER komandos, kurios prideda lentelių tarpusavio ryšius (užtikrina duomenų integralumą)
 ALTER TABLE `Uzsakymai` ADD FOREIGN KEY (`kliento_id`) REFERENCES `Klientai` (`kliento_id`);
 ALTER TABLE `Uzsakymai` ADD FOREIGN KEY (`darbuotojo_id`) REFERENCES `Darbuotojai` (`darbuotojo_id`);
@@ -286,6 +348,28 @@ ALTER TABLE `Automobilio_Grazinimo_Vieta` ADD FOREIGN KEY (`automobilio_id`) REF
 ALTER TABLE `Automobilio_Grazinimo_Vieta` ADD FOREIGN KEY (`vietos_id`) REFERENCES `Pristatymo_Vietos` (`vietos_id`);
 ALTER TABLE `Baudu_Registras` ADD FOREIGN KEY (`kliento_id`) REFERENCES `Klientai` (`kliento_id`);
 
+-- Automobilių paieškos indeksai (filtrai pagal statusą/kurą/vietas ir intervalai su rikiavimu)
+CREATE INDEX `ix_automobiliai_statusas_kaina` ON `Automobiliai` (`automobilio_statusas`, `kaina_parai`);
+CREATE INDEX `ix_automobiliai_kuras_metai` ON `Automobiliai` (`kuro_tipas`, `metai`);
+CREATE INDEX `ix_automobiliai_vietos_kaina` ON `Automobiliai` (`sedimos_vietos`, `kaina_parai`);
+CREATE INDEX `ix_automobiliai_kaina` ON `Automobiliai` (`kaina_parai`);
+CREATE INDEX `ix_automobiliai_metai` ON `Automobiliai` (`metai`);
+CREATE INDEX `ix_automobiliai_rida` ON `Automobiliai` (`rida`);
+CREATE INDEX `ix_automobiliai_galia` ON `Automobiliai` (`galia_kw`);
+
+-- Rezervacijų persidengimo paieška pagal automobilį ir datas
+CREATE INDEX `ix_rezervavimas_automobilis_datos` ON `Rezervavimas` (`automobilio_id`, `rezervacijos_pradzia`, `rezervacijos_pabaiga`);
+
+-- Užbaigtų užsakymų be sąskaitų paieška (mėnesio sąskaitų generavimas)
+CREATE INDEX `ix_uzsakymai_busena` ON `Uzsakymai` (`uzsakymo_busena`);
+CREATE UNIQUE INDEX `ix_saskaitos_uzsakymo_id` ON `Saskaitos` (`uzsakymo_id`);
+
+-- Pajamų ataskaitos pagal sąskaitų datą (dengiantis indeksas)
+CREATE INDEX `ix_saskaitos_data_suma` ON `Saskaitos` (`saskaitos_data`, `uzsakymo_id`, `suma`);
+
+-- Kliento užsakymų istorija (puslapiavimas pagal užsakymo ID)
+CREATE INDEX `ix_uzsakymai_klientas` ON `Uzsakymai` (`kliento_id`, `uzsakymo_id`);
+
 -- Žemiau prasideda pradinių duomenų įrašymas (insertai)
 
 -- Pridedami klientų įrašai
@@ -302,6 +386,9 @@ VALUES
 ('Karolis', 'Rutkauskas', 'karolis.rutkauskas@example.com', '+37069987654', '1990-09-02', '2023-04-12 11:40:00', 50),
 ('Rasa', 'Grigaliūnaitė', 'rasa.grigaliunaite@example.com', '+37061122334', '1986-01-28', '2020-10-05 13:55:00', 225);
 
+-- Pradiniai taškų likučiai laikomi rankine korekcija (likutį perskaičiuoja kliento statistika)
+UPDATE `Klientai` SET `bonus_korekcija` = `bonus_taskai`;
+
 -- Įterpiami darbuotojų įrašai
 INSERT INTO Darbuotojai (
     vardas, pavarde, el_pastas, telefono_nr, pareigos, atlyginimas, isidarbinimo_data, slaptazodis
@@ -11,7 +11,11 @@ Authors:
     
 Description:
     Initializes the FastAPI app, loads environment variables,
-    sets up SQLAlchemy models, configures CORS, and registers all API routers
+    sets up SQLAlchemy models, configures CORS, response compression and
+    conditional GET (ETag/304), builds the in-memory reservation bitmaps
+    at startup, polls the change log for writes of other workers, runs the
+    periodic status transitions (app/services/scheduler.py), starts the
+    background job workers (app/services/job_queue.py), and registers all API routers
     for authentication, employees, cars, reservations, orders, clients, client support,
     invoices and geocoding endpoints.
 
@@ -24,18 +28,29 @@ Note:
     - CORS is configured to allow requests from the frontend at http://localhost:3000.
     - Environment variables are loaded from a .env file.
 """
+import asyncio
 import os
+from contextlib import asynccontextmanager
 from dotenv import load_dotenv
 from fastapi import FastAPI, Request
 from fastapi.middleware.cors import CORSMiddleware
-from fastapi.responses import PlainTextResponse
+from fastapi.responses import JSONResponse, PlainTextResponse
 from starlette.middleware.sessions import SessionMiddleware
+from app.middleware.compression import CompressionMiddleware
+from app.middleware.conditional import ConditionalGetMiddleware
+from app.middleware.rate_limit import RateLimitMiddleware
 from fastapi.openapi.utils import get_openapi
 
 from app.db.base import Base
-from app.db.session import engine
+from app.services.password_hasher import PasswordPoolSaturated
+from app.services.rate_limiter import RateLimitExceeded
+from app.api.idempotency import IdempotentReplay
+from app.db.session import SessionLocal, engine
+from app.services.availability import availability_index
+from app.services import change_log, job_queue, scheduler
+from app.services import notifications  # noqa: F401 – el. laiškų užduočių tipai
 from app.api.v1.endpoints import (
-    auth, employee, car, reservation, order, geocode, client, client_support, invoice
+    auth, employee, car, reservation, order, geocode, client, client_support, invoice, report, analytics
 )
 
 load_dotenv()
@@ -43,7 +58,36 @@ load_dotenv()
 # Sukuriame DB lenteles (užtikrink, kad app.db.base importuoja visus modelius)
 Base.metadata.create_all(bind=engine)
 
-app = FastAPI(title="Car Rental API", version="1.0.0")
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    # Automobilių užimtumo bitmap'ai (žr. app/services/availability.py)
+    db = SessionLocal()
+    try:
+        availability_index.build(db)
+    finally:
+        db.close()
+    # Kitų workerių pakeitimai iš pakeitimų žurnalo (žr. app/services/change_log.py)
+    poller = asyncio.create_task(change_log.poll_forever())
+    # Rezervacijų ir automobilių būsenų perėjimai (vykdo tik GET_LOCK lyderis)
+    jobs = asyncio.create_task(scheduler.run_forever()) if scheduler.SCHEDULER_ENABLED else None
+    # Foninių užduočių workeriai (žr. app/services/job_queue.py)
+    workers = [asyncio.create_task(job_queue.work()) for _ in range(job_queue.JOB_WORKERS)]
+    try:
+        yield
+    finally:
+        poller.cancel()
+        if jobs:
+            jobs.cancel()
+        for worker in workers:
+            worker.cancel()
+
+app = FastAPI(title="Car Rental API", version="1.0.0", lifespan=lifespan)
+
+# Užklausų kvotos pagal operation_id ir naudotoją (vidiniausias – 304 kvotos nenaudoja)
+app.add_middleware(RateLimitMiddleware)
+
+# ETag / 304 (vidinis – kad 304 atsakymai gautų CORS antraštes)
+app.add_middleware(ConditionalGetMiddleware)
 
 # Session (OAuthui reikalinga)
 app.add_middleware(
@@ -58,6 +102,18 @@ app.add_middleware(
     allow_credentials=True,
     allow_methods=["*"],
     allow_headers=["*"],
+    expose_headers=[
+        "ETag", "Last-Modified", "Link-Template", "Link", "X-Next-Cursor",
+        "Retry-After", "X-RateLimit-Limit", "X-RateLimit-Remaining", "Idempotent-Replayed",
+    ],
+)
+
+# Suspaudimas (išorinis – suspaudžia galutinį atsakymą)
+app.add_middleware(
+    CompressionMiddleware,
+    minimum_size=int(os.getenv("COMPRESSION_MIN_SIZE", "1024")),
+    gzip_level=int(os.getenv("GZIP_LEVEL", "6")),
+    brotli_quality=int(os.getenv("BROTLI_QUALITY", "4")),
 )
 
 # Swagger Bearer schema (pritaikoma visiems endpointams, kurie jos prašo)
@@ -87,6 +143,35 @@ app.include_router(client.router,        prefix="/api/v1", tags=["Client"])
 app.include_router(client_support.router,prefix="/api/v1", tags=["Client Support"])
 app.include_router(invoice.router,       prefix="/api/v1", tags=["Invoices"])
 app.include_router(geocode.router,       prefix="/api/v1", tags=["Geo Code"])
+app.include_router(report.router,        prefix="/api/v1", tags=["Reports"])
+app.include_router(analytics.router,     prefix="/api/v1", tags=["Analytics"])
+
+# Slaptažodžių maišymo pool'as perpildytas – klientas tegul bando vėliau
+@app.exception_handler(PasswordPoolSaturated)
+async def password_pool_saturated_handler(request: Request, exc: PasswordPoolSaturated):
+    return JSONResponse(
+        status_code=429,
+        content={"detail": "Too many concurrent password operations, try again later"},
+        headers={"Retry-After": str(exc.retry_after)},
+    )
+
+# Per daug prisijungimo bandymų iš to paties IP ar į tą pačią paskyrą
+@app.exception_handler(RateLimitExceeded)
+async def rate_limit_exceeded_handler(request: Request, exc: RateLimitExceeded):
+    return JSONResponse(
+        status_code=429,
+        content={"detail": "Too many login attempts, try again later"},
+        headers={"Retry-After": str(exc.retry_after)},
+    )
+
+# Pakartota užklausa su tuo pačiu Idempotency-Key – grąžiname išsaugotą atsakymą
+@app.exception_handler(IdempotentReplay)
+async def idempotent_replay_handler(request: Request, exc: IdempotentReplay):
+    return JSONResponse(
+        status_code=exc.status_code,
+        content=exc.body,
+        headers={"Idempotent-Replayed": "true"},
+    )
 
 # Naudingas trace per 500
 @app.exception_handler(Exception)
@@ -0,0 +1,154 @@
+"""
+app/middleware/compression.py
+
+Response compression middleware (brotli or gzip).
+
+Description:
+    Negotiates the encoding from the `Accept-Encoding` request header,
+    preferring brotli when the `brotli` package is installed and falling back
+    to gzip. Bodies smaller than `minimum_size`, already encoded responses and
+    non-text content types are sent unchanged. Streaming responses are
+    compressed chunk by chunk.
+"""
+import zlib
+
+from starlette.datastructures import Headers, MutableHeaders
+
+try:
+    import brotli
+except ImportError:  # brotli nėra įdiegtas – liekame prie gzip
+    brotli = None
+
+COMPRESSIBLE_TYPES = ("application/json", "text/", "application/xml", "application/javascript")
+
+
+def _accepted(header: str) -> set[str]:
+    """
+    Parse an Accept-Encoding header into the set of acceptable codings.
+
+    Args:
+        header (str): Raw header value, e.g. "gzip, deflate, br;q=0.5".
+
+    Returns:
+        set[str]: Codings with a non-zero quality.
+    """
+    codings = set()
+    for part in header.lower().split(","):
+        name, _, params = part.strip().partition(";")
+        if not name:
+            continue
+        q = params.strip()
+        if q.startswith("q="):
+            try:
+                if float(q[2:]) == 0:
+                    continue
+            except ValueError:
+                continue
+        codings.add(name.strip())
+    return codings
+
+
+class _Encoder:
+    """Incremental compressor for one response body."""
+
+    def __init__(self, encoding: str, level: int):
+        self.encoding = encoding
+        if encoding == "br":
+            self._obj = brotli.Compressor(quality=min(level, 11))
+        else:
+            # wbits 31 – gzip antraštė ir CRC
+            self._obj = zlib.compressobj(level, zlib.DEFLATED, 31)
+
+    def compress(self, data: bytes) -> bytes:
+        if self.encoding == "br":
+            return self._obj.process(data)
+        return self._obj.compress(data)
+
+    def flush(self) -> bytes:
+        if self.encoding == "br":
+            return self._obj.finish()
+        return self._obj.flush()
+
+
+class CompressionMiddleware:
+    """
+    Pure ASGI middleware compressing HTTP responses.
+
+    Args:
+        app: Wrapped ASGI application.
+        minimum_size (int): Smallest body (bytes) worth compressing.
+        gzip_level (int): zlib compression level (1-9).
+        brotli_quality (int): Brotli quality (0-11); 4-5 is a good speed/size trade-off for JSON.
+    """
+
+    def __init__(self, app, minimum_size: int = 1024, gzip_level: int = 6, brotli_quality: int = 4):
+        self.app = app
+        self.minimum_size = minimum_size
+        self.gzip_level = gzip_level
+        self.brotli_quality = brotli_quality
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        accepted = _accepted(Headers(scope=scope).get("accept-encoding", ""))
+        if brotli is not None and "br" in accepted:
+            encoding, level = "br", self.brotli_quality
+        elif "gzip" in accepted:
+            encoding, level = "gzip", self.gzip_level
+        else:
+            await self.app(scope, receive, send)
+            return
+
+        start_message = None
+        encoder = None
+        passthrough = False
+
+        async def send_wrapper(message):
+            nonlocal start_message, encoder, passthrough
+            if message["type"] == "http.response.start":
+                start_message = message
+                headers = Headers(raw=message["headers"])
+                content_type = headers.get("content-type", "")
+                passthrough = (
+                    "content-encoding" in headers
+                    or not content_type.startswith(COMPRESSIBLE_TYPES)
+                )
+                if passthrough:
+                    await send(message)
+                return
+            if message["type"] != "http.response.body" or passthrough:
+                await send(message)
+                return
+
+            body = message.get("body", b"")
+            more_body = message.get("more_body", False)
+
+            if encoder is None:
+                if not more_body and len(body) < self.minimum_size:
+                    passthrough = True
+                    await send(start_message)
+                    await send(message)
+                    return
+                encoder = _Encoder(encoding, level)
+                headers = MutableHeaders(raw=start_message["headers"])
+                headers["Content-Encoding"] = encoding
+                headers.add_vary_header("Accept-Encoding")
+                if more_body:
+                    del headers["Content-Length"]
+                else:
+                    body = encoder.compress(body) + encoder.flush()
+                    headers["Content-Length"] = str(len(body))
+                    await send(start_message)
+                    await send({"type": "http.response.body", "body": body})
+                    return
+                await send(start_message)
+
+            chunk = encoder.compress(body)
+            if not more_body:
+                chunk += encoder.flush()
+            if chunk or not more_body:
+                await send({"type": "http.response.body", "body": chunk, "more_body": more_body})
+
+        await self.app(scope, receive, send_wrapper)
@@ -0,0 +1,136 @@
+"""
+app/middleware/conditional.py
+
+Conditional GET (weak ETag / Last-Modified) middleware.
+
+Description:
+    For GET requests under a known resource prefix the ETag is derived from
+    the request (path, query, Authorization header) and the current versions
+    of the resources the response depends on (app/services/resource_versions.py).
+    A matching `If-None-Match` is answered with 304 before the endpoint runs,
+    so nothing is queried or serialized. Successful writes (POST/PUT/PATCH/DELETE)
+    bump the version of the resource they target.
+
+    Only `If-None-Match` is honored: `Last-Modified` has one-second resolution
+    and is sent for information only.
+"""
+import hashlib
+from email.utils import formatdate
+
+from starlette.datastructures import Headers, MutableHeaders
+
+from app.services import resource_versions
+
+# Kelio prefiksas -> resursai, nuo kurių priklauso atsakymas (pirmas – rašomas resursas)
+RESOURCE_DEPENDENCIES = {
+    "/api/v1/cars": ("cars", "reservations"),
+    "/api/v1/reservations": ("reservations", "cars", "clients"),
+    "/api/v1/orders": ("orders",),
+    "/api/v1/clients": ("clients", "orders", "invoices"),
+    "/api/v1/invoices": ("invoices", "orders", "clients"),
+    "/api/v1/support": ("support",),
+    "/api/v1/employees": ("employees",),
+    "/api/v1/reports": ("invoices", "orders", "cars", "clients"),
+}
+
+# Kiti keliai, kurie gali sukurti įrašų (pvz. OAuth callback sukuria darbuotoją)
+EXTRA_WRITES = {
+    "/api/v1/register": "employees",
+    "/api/v1/google/callback": "employees",
+    "/api/v1/github/callback": "employees",
+}
+
+# Atsakymas priklauso nuo dabartinio laiko – ETag netinka
+UNCACHEABLE_PATHS = {"/api/v1/support/overdue"}
+
+SAFE_METHODS = ("GET", "HEAD")
+
+
+def resources_for(path: str):
+    """
+    Find the resources a path depends on.
+
+    Args:
+        path (str): Request path.
+
+    Returns:
+        tuple[str, ...] | None: Resource names, or None if the path is not tracked.
+    """
+    for prefix, resources in RESOURCE_DEPENDENCIES.items():
+        if path == prefix or path.startswith(prefix + "/"):
+            return resources
+    return None
+
+
+def _matches(if_none_match: str, etag: str) -> bool:
+    """Weak comparison of an If-None-Match header with an ETag."""
+    tags = {tag.strip().removeprefix("W/") for tag in if_none_match.split(",")}
+    return "*" in tags or etag.removeprefix("W/") in tags
+
+
+class ConditionalGetMiddleware:
+    """
+    Pure ASGI middleware adding ETag/Last-Modified and answering 304.
+
+    Args:
+        app: Wrapped ASGI application.
+    """
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+        path = scope["path"]
+        resources = resources_for(path)
+        written = EXTRA_WRITES.get(path)
+        if written is None and resources is not None and scope["method"] not in SAFE_METHODS:
+            written = resources[0]
+
+        if written is not None:
+            async def send_write(message):
+                if message["type"] == "http.response.start" and message["status"] < 400:
+                    resource_versions.bump(written)
+                await send(message)
+
+            await self.app(scope, receive, send_write)
+            return
+        if resources is None or path in UNCACHEABLE_PATHS:
+            await self.app(scope, receive, send)
+            return
+
+        headers = Headers(scope=scope)
+        version, modified = resource_versions.snapshot(resources)
+        key = b"\0".join((
+            path.encode(),
+            scope.get("query_string", b""),
+            headers.get("authorization", "").encode(),
+            version.encode(),
+        ))
+        etag = f'W/"{hashlib.blake2b(key, digest_size=12).hexdigest()}"'
+        validators = [
+            (b"etag", etag.encode()),
+            (b"last-modified", formatdate(modified, usegmt=True).encode()),
+            (b"cache-control", b"private, no-cache"),
+            (b"vary", b"Authorization"),
+        ]
+
+        if_none_match = headers.get("if-none-match")
+        if if_none_match and _matches(if_none_match, etag):
+            await send({"type": "http.response.start", "status": 304, "headers": validators})
+            await send({"type": "http.response.body", "body": b""})
+            return
+
+        async def send_read(message):
+            if message["type"] == "http.response.start" and message["status"] == 200:
+                response_headers = MutableHeaders(raw=message["headers"])
+                for name, value in validators:
+                    if name == b"vary":
+                        response_headers.add_vary_header(value.decode())
+                    else:
+                        response_headers[name.decode()] = value.decode()
+            await send(message)
+
+        await self.app(scope, receive, send_read)
@@ -0,0 +1,98 @@
+"""
+app/middleware/rate_limit.py
+
+Token-bucket rate limiting per operation and principal.
+
+Description:
+    The route is resolved the same way the router does it, and its
+    `operation_id` selects the rule of `api_limiter`
+    (app/services/rate_limiter.py). The principal is the `sub` of the bearer
+    token – checked through the verified-token cache, so no DB query is made –
+    or the client IP for anonymous and invalid tokens (those get 401 later anyway).
+
+    A request over the limit is answered with 429 and Retry-After before the
+    endpoint runs. Allowed requests to limited operations get
+    X-RateLimit-Limit / X-RateLimit-Remaining headers.
+"""
+from starlette.datastructures import Headers, MutableHeaders
+from starlette.responses import JSONResponse
+from starlette.routing import Match
+
+from app.services import token_service
+from app.services.rate_limiter import TokenBucketLimiter, api_limiter
+
+
+def operation_of(scope) -> str | None:
+    """
+    Find the operation_id of the route that will handle the request.
+
+    Args:
+        scope: ASGI scope with "app" set by the application.
+
+    Returns:
+        str | None: operation_id (or route name when none is set), None if no route matches.
+    """
+    app = scope.get("app")
+    for route in getattr(app, "routes", ()):
+        match, _ = route.matches(scope)
+        if match == Match.FULL:
+            return getattr(route, "operation_id", None) or getattr(route, "name", None)
+    return None
+
+
+def principal_of(scope) -> str:
+    """Return "user:<sub>" for a valid bearer token, otherwise "ip:<client address>"."""
+    authorization = Headers(scope=scope).get("authorization", "")
+    scheme, _, token = authorization.partition(" ")
+    if scheme.lower() == "bearer" and token:
+        try:
+            subject = token_service.decode_access_token(token).get("sub")
+        except token_service.TokenError:
+            subject = None
+        if subject:
+            return f"user:{subject}"
+    client = scope.get("client")
+    return f"ip:{client[0] if client else 'unknown'}"
+
+
+class RateLimitMiddleware:
+    """
+    Pure ASGI middleware applying a TokenBucketLimiter.
+
+    Args:
+        app: Wrapped ASGI application.
+        limiter (TokenBucketLimiter, optional): Limiter, the shared `api_limiter` by default.
+    """
+
+    def __init__(self, app, limiter: TokenBucketLimiter = None):
+        self.app = app
+        self.limiter = limiter or api_limiter
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http" or (not self.limiter.rules and self.limiter.default is None):
+            await self.app(scope, receive, send)
+            return
+        operation = operation_of(scope)
+        rule = self.limiter.rule_for(operation) if operation else None
+        if rule is None:
+            await self.app(scope, receive, send)
+            return
+
+        allowed, remaining, retry_after = self.limiter.take(principal_of(scope), operation)
+        if not allowed:
+            response = JSONResponse(
+                {"detail": "Rate limit exceeded, try again later"},
+                status_code=429,
+                headers={"Retry-After": str(retry_after), "X-RateLimit-Limit": str(rule[0])},
+            )
+            await response(scope, receive, send)
+            return
+
+        async def send_with_headers(message):
+            if message["type"] == "http.response.start":
+                headers = MutableHeaders(raw=message["headers"])
+                headers["X-RateLimit-Limit"] = str(rule[0])
+                headers["X-RateLimit-Remaining"] = str(remaining)
+            await send(message)
+
+        await self.app(scope, receive, send_with_headers)
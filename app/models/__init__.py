@@ -21,6 +21,12 @@ from .invoice import Invoice
 from .client_support import ClientSupport
 from .location import Location
 from .reservation import Reservation
+from .change_log import ChangeLog
+from .idempotency_key import IdempotencyKey
+from .job import Job
+from .client_stats import ClientStats
+from .used_refresh_token import UsedRefreshToken
+from .bonus_usage import BonusUsage
 #from .geocode import Geocode
 
 __all__ = [
@@ -32,5 +38,11 @@ __all__ = [
     "ClientSupport",
     "Location",
     "Reservation",
+    "ChangeLog",
+    "IdempotencyKey",
+    "Job",
+    "ClientStats",
+    "UsedRefreshToken",
+    "BonusUsage",
     #"Geocode"
 ]
@@ -0,0 +1,35 @@
+"""
+app/models/bonus_usage.py
+
+SQLAlchemy BonusUsage model for the 'Bonusu_Naudojimas' table.
+
+Description:
+    Bonus points a client redeemed on an order. Read by
+    app/services/client_stats.py to compute the client's point balance.
+"""
+from datetime import datetime
+
+from sqlalchemy import Column, DateTime, Integer
+from app.db.base import Base
+
+class BonusUsage(Base):
+    """
+    SQLAlchemy ORM model for one row of the 'Bonusu_Naudojimas' table.
+
+    Attributes:
+        naudojimo_id (int): Primary key.
+        kliento_id (int): Client who redeemed the points.
+        uzsakymo_id (int): Order the points were redeemed on.
+        panaudoti_taskai (int): Redeemed points.
+        nuolaidos_id (int): Discount the points were exchanged for.
+        data (DateTime): Time of the redemption.
+    """
+    __tablename__ = "Bonusu_Naudojimas"
+
+    naudojimo_id = Column(Integer, primary_key=True, autoincrement=True)
+    # Išoriniai raktai ir jų indeksai apibrėžti app/init_db.sql
+    kliento_id = Column(Integer, nullable=False)
+    uzsakymo_id = Column(Integer, nullable=False)
+    panaudoti_taskai = Column(Integer, nullable=False)
+    nuolaidos_id = Column(Integer, nullable=False)
+    data = Column(DateTime, nullable=False, default=datetime.utcnow)
@@ -8,7 +8,7 @@ Author: Gabrielė Tamaševičiūtė <gabriele.tamaseviciute@stud.viko.lt>
 Description:
     Defines the Car ORM model, its fields, and relationships for car rental operations.
 """
-from sqlalchemy import Column, ForeignKey, Integer, String, Boolean, DECIMAL, Date
+from sqlalchemy import Column, ForeignKey, Index, Integer, String, Boolean, DECIMAL, Date
 from app.db.base import Base
 from sqlalchemy.orm import relationship
 from app.models.location import Location
@@ -44,6 +44,16 @@ class Car(Base):
     Author: Gabrielė Tamaševičiūtė <gabriele.tamaseviciute@stud.viko.lt>
     """
     __tablename__ = "Automobiliai"
+    # Paieškos filtrų ir rikiavimo indeksai (žr. app/init_db.sql)
+    __table_args__ = (
+        Index("ix_automobiliai_statusas_kaina", "automobilio_statusas", "kaina_parai"),
+        Index("ix_automobiliai_kuras_metai", "kuro_tipas", "metai"),
+        Index("ix_automobiliai_vietos_kaina", "sedimos_vietos", "kaina_parai"),
+        Index("ix_automobiliai_kaina", "kaina_parai"),
+        Index("ix_automobiliai_metai", "metai"),
+        Index("ix_automobiliai_rida", "rida"),
+        Index("ix_automobiliai_galia", "galia_kw"),
+    )
 
     automobilio_id = Column(Integer, primary_key=True, index=True)
     marke = Column(String(50), nullable=False)
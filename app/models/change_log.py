@@ -0,0 +1,36 @@
+"""
+app/models/change_log.py
+
+SQLAlchemy ChangeLog model for the 'pakeitimu_zurnalas' table.
+
+Description:
+    Append-only log of committed writes. Every API worker tails it to
+    invalidate its in-process caches after writes made by other workers
+    (see app/services/change_log.py).
+"""
+from datetime import datetime
+
+from sqlalchemy import Column, DateTime, Index, Integer, String
+from app.db.base import Base
+
+class ChangeLog(Base):
+    """
+    SQLAlchemy ORM model for one entry of the 'pakeitimu_zurnalas' table.
+
+    Attributes:
+        pakeitimo_id (int): Primary key, increasing – workers read entries after the last seen id.
+        resursas (str): Changed resource ("cars", "reservations", ...).
+        iraso_id (int): Primary key of the changed row (nullable).
+        veiksmas (str): "insert", "update" or "delete".
+        saltinis (str): Process that made the change (its own entries are skipped).
+        sukurta (DateTime): Time of the change.
+    """
+    __tablename__ = "pakeitimu_zurnalas"
+    __table_args__ = (Index("ix_pakeitimu_zurnalas_sukurta", "sukurta"),)
+
+    pakeitimo_id = Column(Integer, primary_key=True, autoincrement=True)
+    resursas = Column(String(50), nullable=False)
+    iraso_id = Column(Integer, nullable=True)
+    veiksmas = Column(String(10), nullable=False)
+    saltinis = Column(String(64), nullable=False)
+    sukurta = Column(DateTime, nullable=False, default=datetime.utcnow)
@@ -25,7 +25,9 @@ class Client(Base):
         telefono_nr (str): Phone number.
         gimimo_data (Date): Date of birth.
         registracijos_data (DateTime): Registration date.
-        bonus_taskai (int): Loyalty bonus points.
+        bonus_taskai (int): Loyalty bonus point balance, derived by
+            app/services/client_stats.py (earned - redeemed + bonus_korekcija).
+        bonus_korekcija (int): Manual bonus point adjustment.
         uzsakymai (list): Relationship to Order.
         uzklausos (list): Relationship to ClientSupport.
 
@@ -41,6 +43,7 @@ class Client(Base):
     gimimo_data = Column(Date)
     registracijos_data = Column(DateTime, default=datetime.utcnow)
     bonus_taskai = Column(Integer, default=0, nullable=False)
+    bonus_korekcija = Column(Integer, default=0, nullable=False)
 
     uzsakymai = relationship("Order", back_populates="klientas")
     uzklausos = relationship("ClientSupport", back_populates="kliento")
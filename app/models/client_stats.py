@@ -0,0 +1,41 @@
+"""
+app/models/client_stats.py
+
+SQLAlchemy ClientStats model for the 'kliento_statistika' table.
+
+Description:
+    Precomputed per-client order statistics (order counts, spend, bonus points) maintained
+    by app/services/client_stats.py and read by GET /clients/{id}/stats.
+"""
+from datetime import datetime
+
+from sqlalchemy import Column, Date, DateTime, Float, Integer
+from app.db.base import Base
+
+class ClientStats(Base):
+    """
+    SQLAlchemy ORM model for one row of the 'kliento_statistika' table.
+
+    Attributes:
+        kliento_id (int): Primary key, the client.
+        uzsakymu_skaicius (int): Orders that were not cancelled.
+        uzbaigti_uzsakymai (int): Completed ('užbaigta') orders.
+        islaidos (float): Sum of the client's invoices.
+        uzdirbti_taskai (int): Bonus points earned from the spend.
+        panaudoti_taskai (int): Bonus points redeemed ('Bonusu_Naudojimas').
+        pirmas_uzsakymas (Date): Rental start of the first order.
+        paskutinis_uzsakymas (Date): Rental start of the latest order.
+        perskaiciuota (DateTime): Time of the last recomputation.
+    """
+    __tablename__ = "kliento_statistika"
+
+    # Be išorinio rakto – kliento trynimo neblokuoja; eilutė pašalinama perskaičiuojant
+    kliento_id = Column(Integer, primary_key=True)
+    uzsakymu_skaicius = Column(Integer, nullable=False, default=0)
+    uzbaigti_uzsakymai = Column(Integer, nullable=False, default=0)
+    islaidos = Column(Float, nullable=False, default=0)
+    uzdirbti_taskai = Column(Integer, nullable=False, default=0)
+    panaudoti_taskai = Column(Integer, nullable=False, default=0)
+    pirmas_uzsakymas = Column(Date, nullable=True)
+    paskutinis_uzsakymas = Column(Date, nullable=True)
+    perskaiciuota = Column(DateTime, nullable=False, default=datetime.utcnow)
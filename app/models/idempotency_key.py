@@ -0,0 +1,43 @@
+"""
+app/models/idempotency_key.py
+
+SQLAlchemy IdempotencyKey model for the 'pakartojimo_raktai' table.
+
+Description:
+    Stores the response of a create request sent with an `Idempotency-Key`
+    header, so a retry of the same request gets the stored response instead
+    of creating a duplicate (see app/api/idempotency.py).
+"""
+from datetime import datetime
+
+from sqlalchemy import Column, DateTime, Index, Integer, String, Text, UniqueConstraint
+from app.db.base import Base
+
+class IdempotencyKey(Base):
+    """
+    SQLAlchemy ORM model for the 'pakartojimo_raktai' table.
+
+    Attributes:
+        rakto_id (int): Primary key.
+        subjektas (str): Caller the key belongs to ("user:<email>" or "ip:<address>").
+        raktas (str): Value of the Idempotency-Key header.
+        operacija (str): operation_id of the endpoint.
+        uzklausos_maisa (str): SHA-256 of the request body; a reused key with another body is rejected.
+        busenos_kodas (int): Stored response status, NULL while the first request is running.
+        atsakymas (str): Stored JSON response body.
+        sukurta (DateTime): Time of the first request.
+    """
+    __tablename__ = "pakartojimo_raktai"
+    __table_args__ = (
+        UniqueConstraint("subjektas", "raktas", name="uq_pakartojimo_raktai_subjektas_raktas"),
+        Index("ix_pakartojimo_raktai_sukurta", "sukurta"),
+    )
+
+    rakto_id = Column(Integer, primary_key=True, autoincrement=True)
+    subjektas = Column(String(120), nullable=False)
+    raktas = Column(String(255), nullable=False)
+    operacija = Column(String(64), nullable=False)
+    uzklausos_maisa = Column(String(64), nullable=False)
+    busenos_kodas = Column(Integer, nullable=True)
+    atsakymas = Column(Text, nullable=True)
+    sukurta = Column(DateTime, nullable=False, default=datetime.utcnow)
@@ -8,7 +8,7 @@ Author: Vytautas Petronis <vytautas.petronis@stud.viko.lt>
 Description:
     Defines the Invoice ORM model, its fields, and relationship to the Order model for car rental invoices.
 """
-from sqlalchemy import Column, Integer, Float, Date, ForeignKey
+from sqlalchemy import Column, Integer, Float, Date, ForeignKey, Index
 from sqlalchemy.orm import relationship
 from app.db.base import Base
 from app.models.order import Order
@@ -27,9 +27,12 @@ class Invoice(Base):
     Author: Vytautas Petronis <vytautas.petronis@stud.viko.lt>
     """
     __tablename__ = "saskaitos"
+    # Ataskaitos pagal datą: intervalas pagal saskaitos_data, suma ir užsakymas – iš indekso
+    __table_args__ = (Index("ix_saskaitos_data_suma", "saskaitos_data", "uzsakymo_id", "suma"),)
 
     saskaitos_id = Column(Integer, primary_key=True, index=True)
-    uzsakymo_id = Column(Integer, ForeignKey("uzsakymai.uzsakymo_id"))
+    # Vienas užsakymas – viena sąskaita (unikalus indeksas ix_saskaitos_uzsakymo_id)
+    uzsakymo_id = Column(Integer, ForeignKey("uzsakymai.uzsakymo_id"), index=True, unique=True)
     suma = Column(Float, nullable=False)
     saskaitos_data = Column(Date, nullable=False)
 
@@ -0,0 +1,47 @@
+"""
+app/models/job.py
+
+SQLAlchemy Job model for the 'uzduociu_eile' table.
+
+Description:
+    Durable queue of background jobs (e-mails, PDF rendering, statistics)
+    enqueued by endpoints and executed by the workers in
+    app/services/job_queue.py.
+"""
+from datetime import datetime
+
+from sqlalchemy import Column, DateTime, Index, Integer, String, Text
+from app.db.base import Base
+
+class Job(Base):
+    """
+    SQLAlchemy ORM model for one job of the 'uzduociu_eile' table.
+
+    Attributes:
+        uzduoties_id (int): Primary key.
+        tipas (str): Registered job type, e.g. "email.invoice_created".
+        duomenys (str): JSON payload passed to the handler.
+        busena (str): 'laukia', 'vykdoma', 'atlikta' or 'klaida'.
+        bandymai (int): Number of started attempts.
+        max_bandymai (int): Attempts before the job is marked 'klaida'.
+        paleisti_po (DateTime): Earliest time of the next attempt.
+        uzrakinta_iki (DateTime): Visibility timeout of a running job; after it
+            passes another worker may take the job again.
+        klaida (str): Last error message.
+        sukurta (DateTime): Enqueue time.
+        atnaujinta (DateTime): Last state change.
+    """
+    __tablename__ = "uzduociu_eile"
+    __table_args__ = (Index("ix_uzduociu_eile_busena_paleisti_po", "busena", "paleisti_po"),)
+
+    uzduoties_id = Column(Integer, primary_key=True, autoincrement=True)
+    tipas = Column(String(64), nullable=False)
+    duomenys = Column(Text, nullable=False)
+    busena = Column(String(10), nullable=False, default="laukia")
+    bandymai = Column(Integer, nullable=False, default=0)
+    max_bandymai = Column(Integer, nullable=False, default=5)
+    paleisti_po = Column(DateTime, nullable=False, default=datetime.utcnow)
+    uzrakinta_iki = Column(DateTime, nullable=True)
+    klaida = Column(Text, nullable=True)
+    sukurta = Column(DateTime, nullable=False, default=datetime.utcnow)
+    atnaujinta = Column(DateTime, nullable=False, default=datetime.utcnow)
@@ -8,7 +8,7 @@ Author: Astijus Grinevičius <astijus.grinevicius@stud.viko.lt>
 Description:
     Defines the Order ORM model, its fields, and relationships for car rental orders.
 """
-from sqlalchemy import Column, Integer, Date, String, Boolean, ForeignKey, Float
+from sqlalchemy import Column, Integer, Date, String, Boolean, ForeignKey, Float, Index
 from sqlalchemy.orm import relationship
 from app.db.base import Base
 
@@ -34,6 +34,10 @@ class Order(Base):
     Author: Astijus Grinevičius <astijus.grinevicius@stud.viko.lt>
     """
     __tablename__ = "uzsakymai"
+    __table_args__ = (
+        Index("ix_uzsakymai_busena", "uzsakymo_busena"),
+        Index("ix_uzsakymai_klientas", "kliento_id", "uzsakymo_id"),
+    )
 
     uzsakymo_id = Column(Integer, primary_key=True, index=True)
     kliento_id = Column(Integer, ForeignKey("klientai.kliento_id"))
@@ -8,9 +8,12 @@ Author: Vytautas Petronis <vytautas.petronis@stud.viko.lt>
 Description:
     Defines the Reservation ORM model, its fields, and relationships for reservation records in the car rental system.
 """
-from sqlalchemy import Column, Integer, Date, String, ForeignKey
+from sqlalchemy import Column, Integer, Date, String, ForeignKey, Index
 from app.db.base import Base
 
+# Atšauktos rezervacijos automobilio neužima (persidengimai, laisvi automobiliai, bitmap'ai)
+NON_BLOCKING_STATUSES = ("atšaukta",)
+
 class Reservation(Base):
     """
     SQLAlchemy ORM model for representing a reservation in the 'rezervavimas' table.
@@ -26,6 +29,10 @@ class Reservation(Base):
     Author: Vytautas Petronis <vytautas.petronis@stud.viko.lt>
     """
     __tablename__ = "rezervavimas"
+    # Persidengimo paieška pagal automobilį ir datas (žr. app/init_db.sql)
+    __table_args__ = (
+        Index("ix_rezervavimas_automobilis_datos", "automobilio_id", "rezervacijos_pradzia", "rezervacijos_pabaiga"),
+    )
 
     rezervacijos_id = Column(Integer, primary_key=True, index=True)
     kliento_id = Column(Integer, ForeignKey("klientai.kliento_id"))
@@ -0,0 +1,26 @@
+"""
+app/models/used_refresh_token.py
+
+SQLAlchemy UsedRefreshToken model for the 'panaudoti_atnaujinimo_zetonai' table.
+
+Description:
+    `jti` of every refresh token exchanged for a new token pair. The primary
+    key makes a refresh token single-use across all workers and restarts
+    (see app/services/token_service.py).
+"""
+from sqlalchemy import Column, DateTime, Index, String
+from app.db.base import Base
+
+class UsedRefreshToken(Base):
+    """
+    SQLAlchemy ORM model for one used refresh token.
+
+    Attributes:
+        jti (str): Primary key, unique id of the refresh token.
+        galioja_iki (DateTime): Expiry of the token; afterwards the row is deleted.
+    """
+    __tablename__ = "panaudoti_atnaujinimo_zetonai"
+    __table_args__ = (Index("ix_panaudoti_atnaujinimo_zetonai_galioja_iki", "galioja_iki"),)
+
+    jti = Column(String(64), primary_key=True)
+    galioja_iki = Column(DateTime, nullable=False)
@@ -9,23 +9,208 @@ Description:
     Provides functions for interacting with the Automobiliai table:
     create, read, update, delete, search, status update, and statistics.
 """
+from datetime import date
 from sqlalchemy.orm import Session
 from sqlalchemy import func
 from app.models.car import Car
-from sqlalchemy import func
+from app.models.location import Location
+from app.models.reservation import NON_BLOCKING_STATUSES, Reservation
+from app.models.order import Order
+from app.services import change_log
+
+def rows_query(db: Session, fields: tuple[str, ...], location_fields: tuple[str, ...] = ()):
+    """
+    Build a column-projected query over cars (no ORM entity hydration).
+
+    Rows contain the requested car columns in the order of `fields`,
+    followed by the requested location columns.
+
+    Args:
+        db (Session): SQLAlchemy session.
+        fields (tuple[str, ...]): Car column names to select.
+        location_fields (tuple[str, ...]): Location column names; when given,
+            the current location is outer-joined.
+
+    Returns:
+        Query: Query yielding lightweight Row tuples; filters on Car columns can be chained.
+    """
+    query = db.query(*(getattr(Car, name) for name in fields))
+    if location_fields:
+        query = query.add_columns(*(getattr(Location, name) for name in location_fields)).outerjoin(
+            Location, Car.dabartine_vieta_id == Location.vietos_id
+        )
+    return query
 
-def get_all(db: Session):
+def get_all(db: Session, fields: tuple[str, ...] = None, location_fields: tuple[str, ...] = ()):
     """
     Retrieve all cars from the database.
 
     Args:
         db (Session): SQLAlchemy session.
+        fields (tuple[str, ...], optional): Select only these columns and return Row tuples.
+        location_fields (tuple[str, ...]): With `fields`, location columns appended to each row.
 
     Returns:
-        list[Car]: All car records.
+        list[Car] | list[Row]: All car records.
     """
+    if fields:
+        return rows_query(db, fields, location_fields).all()
     return db.query(Car).all()
 
+def get_available(db: Session, date_from: date, date_to: date, fields: tuple[str, ...], location_fields: tuple[str, ...] = (), busy_ids: list[int] = None):
+    """
+    Retrieve cars without reservations overlapping [date_from, date_to) as projected rows.
+
+    Overlap rule:
+        A reservation blocks a car if NOT (reservation_end <= date_from OR reservation_start >= date_to).
+        Cancelled reservations (NON_BLOCKING_STATUSES) never block.
+
+    Args:
+        db (Session): SQLAlchemy session.
+        date_from (date): Start date (inclusive).
+        date_to (date): End date (exclusive).
+        fields (tuple[str, ...]): Car column names to select.
+        location_fields (tuple[str, ...]): Location columns appended to each row.
+        busy_ids (list[int], optional): Busy car IDs already known (e.g. from the
+            availability index); the overlap subquery is skipped.
+
+    Returns:
+        list[Row]: Available cars.
+    """
+    if busy_ids is not None:
+        query = rows_query(db, fields, location_fields)
+        if busy_ids:
+            query = query.filter(Car.automobilio_id.notin_(busy_ids))
+        return query.all()
+    busy_car_ids_subq = (
+        db.query(Reservation.automobilio_id)
+        .filter(
+            ~(
+                (Reservation.rezervacijos_pabaiga <= date_from) |
+                (Reservation.rezervacijos_pradzia >= date_to)
+            ),
+            Reservation.busena.notin_(NON_BLOCKING_STATUSES),
+        )
+        .subquery()
+    )
+    return (
+        rows_query(db, fields, location_fields)
+        .filter(~Car.automobilio_id.in_(busy_car_ids_subq))
+        .all()
+    )
+
+# Laukai, pagal kuriuos grupuojamas užimtumo kalendorius
+CALENDAR_GROUP_FIELDS = ("kebulo_tipas", "kuro_tipas", "marke", "sedimos_vietos", "pavarų_deze", "dabartine_vieta_id")
+
+def _busy_intervals(reservations, date_from: date, date_to: date):
+    """
+    Merge the reservations of each car into disjoint busy day offsets.
+
+    Args:
+        reservations (Iterable[tuple]): (car_id, start, end) sorted by car and start.
+        date_from (date): First day of the calendar (offset 0).
+        date_to (date): Day after the last one.
+
+    Yields:
+        tuple[int, int, int]: (car_id, first busy offset, first free offset after it).
+    """
+    days = (date_to - date_from).days
+    current, start, end = None, 0, 0
+    for car_id, res_start, res_end in reservations:
+        s = max((res_start - date_from).days, 0)
+        e = min((res_end - date_from).days, days)
+        if s >= e:
+            continue
+        if car_id == current and s <= end:
+            end = max(end, e)
+            continue
+        if current is not None:
+            yield current, start, end
+        current, start, end = car_id, s, e
+    if current is not None:
+        yield current, start, end
+
+def used_days(db: Session, date_from: date, date_to: date, statuses: list[str] = None) -> dict:
+    """
+    Count reserved days per car in [date_from, date_to) with SQL.
+
+    Overlapping reservations of one car count each day once.
+
+    Args:
+        db (Session): SQLAlchemy session.
+        date_from (date): Start date (inclusive).
+        date_to (date): End date (exclusive).
+        statuses (list[str], optional): Count only reservations with these statuses.
+
+    Returns:
+        dict[int, int]: Busy days by car ID (cars without any are omitted).
+    """
+    reservations = (
+        db.query(Reservation.automobilio_id, Reservation.rezervacijos_pradzia, Reservation.rezervacijos_pabaiga)
+        .filter(Reservation.rezervacijos_pradzia < date_to, Reservation.rezervacijos_pabaiga > date_from)
+    )
+    if statuses:
+        reservations = reservations.filter(Reservation.busena.in_(statuses))
+    reservations = reservations.order_by(Reservation.automobilio_id, Reservation.rezervacijos_pradzia)
+    days: dict[int, int] = {}
+    for car_id, start, end in _busy_intervals(reservations, date_from, date_to):
+        days[car_id] = days.get(car_id, 0) + end - start
+    return days
+
+def availability_calendar(db: Session, date_from: date, date_to: date, group_by: str):
+    """
+    Count free cars per group for every day of [date_from, date_to) in one pass.
+
+    A car is free on day d when no reservation other than a cancelled one
+    covers [d, d + 1), with the same overlap rule as `get_available`. Reservations of each car are merged,
+    then every busy interval adds -1/+1 at its boundaries in a per-group
+    difference array; a running sum gives the busy count per day.
+
+    Args:
+        db (Session): SQLAlchemy session.
+        date_from (date): First day (inclusive).
+        date_to (date): Last day (exclusive).
+        group_by (str): One of CALENDAR_GROUP_FIELDS.
+
+    Returns:
+        tuple[list, list[int], list[list[int]]]: Group values, number of cars
+        per group and free counts per group and day.
+    """
+    column = getattr(Car, group_by)
+    group_of = dict(db.query(Car.automobilio_id, column).all())
+    groups = sorted(set(group_of.values()), key=lambda value: (value is None, str(value)))
+    index = {value: i for i, value in enumerate(groups)}
+    totals = [0] * len(groups)
+    for value in group_of.values():
+        totals[index[value]] += 1
+
+    days = (date_to - date_from).days
+    diff = [[0] * (days + 1) for _ in groups]
+    reservations = (
+        db.query(Reservation.automobilio_id, Reservation.rezervacijos_pradzia, Reservation.rezervacijos_pabaiga)
+        .filter(
+            Reservation.rezervacijos_pradzia < date_to,
+            Reservation.rezervacijos_pabaiga > date_from,
+            Reservation.busena.notin_(NON_BLOCKING_STATUSES),
+        )
+        .order_by(Reservation.automobilio_id, Reservation.rezervacijos_pradzia)
+    )
+    for car_id, start, end in _busy_intervals(reservations, date_from, date_to):
+        if car_id not in group_of:
+            continue
+        row = diff[index[group_of[car_id]]]
+        row[start] += 1
+        row[end] -= 1
+
+    free = []
+    for total, row in zip(totals, diff):
+        busy, counts = 0, []
+        for day in range(days):
+            busy += row[day]
+            counts.append(total - busy)
+        free.append(counts)
+    return groups, totals, free
+
 def get_by_id(db: Session, car_id: int):
     """
     Get a car by its ID.
@@ -114,6 +299,70 @@ def update_status(db: Session, car_id: int, status: str):
     db.commit()
     return car
 
+def bulk_update_status(db: Session, status: str, ids: list[int] = None, from_status: str = None) -> int:
+    """
+    Set the status of many cars with one UPDATE statement.
+
+    Args:
+        db (Session): SQLAlchemy session.
+        status (str): New status.
+        ids (list[int], optional): Update only these cars.
+        from_status (str, optional): Update only cars currently in this status.
+
+    Returns:
+        int: Number of updated cars.
+    """
+    query = db.query(Car)
+    if ids is not None:
+        query = query.filter(Car.automobilio_id.in_(ids))
+    if from_status is not None:
+        query = query.filter(Car.automobilio_statusas == from_status)
+    updated = query.update({Car.automobilio_statusas: status}, synchronize_session=False)
+    if updated:
+        change_log.record(db, "cars")
+    db.commit()
+    return updated
+
+def release_returned(db: Session, today: date) -> int:
+    """
+    Set rented cars without an active rental back to 'laisvas' with one UPDATE.
+
+    A car stays 'isnuomotas' while an order in 'patvirtinta' or 'vykdoma'
+    status or a confirmed reservation covers today.
+
+    Args:
+        db (Session): SQLAlchemy session.
+        today (date): Current day.
+
+    Returns:
+        int: Number of released cars.
+    """
+    active_orders = db.query(Order.automobilio_id).filter(
+        Order.automobilio_id.isnot(None),
+        Order.uzsakymo_busena.in_(("patvirtinta", "vykdoma")),
+        Order.nuomos_data <= today,
+        Order.grazinimo_data > today,
+    )
+    active_reservations = db.query(Reservation.automobilio_id).filter(
+        Reservation.automobilio_id.isnot(None),
+        Reservation.busena == "patvirtinta",
+        Reservation.rezervacijos_pradzia <= today,
+        Reservation.rezervacijos_pabaiga > today,
+    )
+    released = (
+        db.query(Car)
+        .filter(
+            Car.automobilio_statusas == "isnuomotas",
+            Car.automobilio_id.notin_(active_orders),
+            Car.automobilio_id.notin_(active_reservations),
+        )
+        .update({Car.automobilio_statusas: "laisvas"}, synchronize_session=False)
+    )
+    if released:
+        change_log.record(db, "cars")
+    db.commit()
+    return released
+
 def get_car_counts_by_status(db: Session):
     """
     Get a count of cars grouped by their status.
@@ -141,34 +390,42 @@ def get_car_counts_by_status(db: Session):
         for status, count in results
     ]
 
-def search_cars(
-    db: Session,
+# Stulpeliai, pagal kuriuos leidžiami intervalai ir rikiavimas (visi indeksuoti)
+RANGE_FIELDS = ("kaina_parai", "metai", "rida", "galia_kw")
+SORT_FIELDS = ("kaina_parai", "metai", "rida", "galia_kw", "automobilio_id")
+
+def apply_search_filters(
+    query,
     marke: str = None,
     modelis: str = None,
     spalva: str = None,
     status: str = None,
     kuro_tipas: str = None,
     metai: int = None,
-    sedimos_vietos: int = None
+    sedimos_vietos: int = None,
+    ranges: dict = None,
 ):
     """
-    Search for cars using optional filters.
+    Add search filters to a car query.
+
+    Text fields (brand, model, color) match substrings; status, fuel type,
+    year and seats match exactly, so they can use the composite indexes.
 
     Args:
-        db (Session): SQLAlchemy session.
-        marke (str): Brand.
-        modelis (str): Model.
-        spalva (str): Color.
+        query (Query): Query over Car (entity or projected columns).
+        marke (str): Brand substring.
+        modelis (str): Model substring.
+        spalva (str): Color substring.
         status (str): Status.
         kuro_tipas (str): Fuel type.
         metai (int): Year.
         sedimos_vietos (int): Seat count.
+        ranges (dict[str, tuple], optional): {field: (min, max)} for RANGE_FIELDS,
+            bounds are inclusive and None means open.
 
     Returns:
-        list[Car]: Filtered cars matching criteria.
+        Query: Filtered query.
     """
-    query = db.query(Car)
-
     if marke:
         query = query.filter(Car.marke.ilike(f"%{marke}%"))
     if modelis:
@@ -178,10 +435,29 @@ def search_cars(
     if status:
         query = query.filter(Car.automobilio_statusas == status)
     if kuro_tipas:
-        query = query.filter(Car.kuro_tipas.ilike(f"%{kuro_tipas}%"))
+        query = query.filter(Car.kuro_tipas == kuro_tipas)
     if metai:
         query = query.filter(Car.metai == metai)
     if sedimos_vietos:
         query = query.filter(Car.sedimos_vietos == sedimos_vietos)
+    for name, (low, high) in (ranges or {}).items():
+        column = getattr(Car, name)
+        if low is not None:
+            query = query.filter(column >= low)
+        if high is not None:
+            query = query.filter(column <= high)
+    return query
+
+def search_cars(db: Session, ranges: dict = None, **filters):
+    """
+    Search for cars using optional filters.
 
-    return query.all()
+    Args:
+        db (Session): SQLAlchemy session.
+        ranges (dict, optional): {field: (min, max)} for RANGE_FIELDS.
+        **filters: Equality/substring filters of `apply_search_filters`.
+
+    Returns:
+        list[Car]: Filtered cars matching criteria.
+    """
+    return apply_search_filters(db.query(Car), ranges=ranges, **filters).all()
@@ -12,18 +12,34 @@ from sqlalchemy.orm import Session
 from app.models.client import Client
 from app.schemas.client import ClientCreate
 
-def get_all(db: Session):
+def rows_query(db: Session, fields: tuple[str, ...]):
+    """
+    Build a column-projected query over clients (no ORM entity hydration).
+
+    Args:
+        db (Session): SQLAlchemy session.
+        fields (tuple[str, ...]): Client column names to select, in row order.
+
+    Returns:
+        Query: Query yielding lightweight Row tuples.
+    """
+    return db.query(*(getattr(Client, name) for name in fields))
+
+def get_all(db: Session, fields: tuple[str, ...] = None):
     """
     Retrieve all client records from the database.
 
     Args:
         db (Session): SQLAlchemy session.
+        fields (tuple[str, ...], optional): Select only these columns and return Row tuples.
 
     Returns:
-        List[Client]: List of all clients.
+        List[Client] | List[Row]: List of all clients.
 
     Author: Ivan Bruner <ivan.bruner@stud.viko.lt>
     """
+    if fields:
+        return rows_query(db, fields).all()
     return db.query(Client).all()
 
 def get_by_id(db: Session, kliento_id: int):
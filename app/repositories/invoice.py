@@ -8,51 +8,90 @@ Author: Vytautas Petronis <vytautas.petronis@stud.viko.lt>
 Description:
     Provides CRUD operations and utility queries for Invoice objects using SQLAlchemy.
 """
+from sqlalchemy import insert
+from sqlalchemy.exc import IntegrityError
 from sqlalchemy.orm import Session
 from app.models.invoice import Invoice
 from app.models.order import Order
 from app.models import client as klientas_model
 from app.schemas.invoice import InvoiceCreate, InvoiceStatusUpdate
-from datetime import datetime
+from app.services import change_log, client_stats
+from datetime import date, datetime
 from app.models.invoice import Invoice
 
-def get_invoice(db: Session):
+# InvoiceOut laukų pavadinimai -> stulpeliai
+INVOICE_COLUMNS = {
+    "invoice_id": Invoice.saskaitos_id,
+    "order_id": Invoice.uzsakymo_id,
+    "kliento_id": Order.kliento_id,
+    "total": Invoice.suma,
+    "invoice_date": Invoice.saskaitos_data,
+    "status": Order.uzsakymo_busena,
+    "client_first_name": klientas_model.Client.vardas,
+    "client_last_name": klientas_model.Client.pavarde,
+}
+
+
+def rows_query(db: Session, fields: tuple[str, ...] = None):
+    """
+    Build a projected invoice query joined with its order and client.
+
+    Args:
+        db (Session): SQLAlchemy session.
+        fields (tuple[str, ...], optional): InvoiceOut field names to select (all by default).
+
+    Returns:
+        Query: Query yielding Row tuples labelled with the InvoiceOut field names.
+    """
+    return (
+        db.query(*(INVOICE_COLUMNS[name].label(name) for name in (fields or INVOICE_COLUMNS)))
+        .select_from(Invoice)
+        .join(Order, Invoice.uzsakymo_id == Order.uzsakymo_id)
+        .join(klientas_model.Client, Order.kliento_id == klientas_model.Client.kliento_id)
+    )
+
+
+def _row_to_dict(keys: tuple[str, ...], row) -> dict:
+    """Convert a projected row to a dict, normalizing `invoice_date` to a date."""
+    d = dict(zip(keys, row))
+    # Paversk jei reikia
+    if isinstance(d.get("invoice_date"), datetime):
+        d["invoice_date"] = d["invoice_date"].date()
+    return d
+
+
+def get_invoice(db: Session, fields: tuple[str, ...] = None):
     """
     Retrieve all invoice records with related order and client information.
 
     Args:
         db (Session): SQLAlchemy session.
+        fields (tuple[str, ...], optional): Only select these InvoiceOut fields.
 
     Returns:
         List[dict]: List of invoice records with detailed fields.
 
     Author: Vytautas Petronis <vytautas.petronis@stud.viko.lt>
     """
-    query = (
-        db.query(
-            Invoice.saskaitos_id.label("invoice_id"),
-            Invoice.uzsakymo_id.label("order_id"),
-            Order.kliento_id.label("kliento_id"),
-            Invoice.suma.label("total"),
-            Invoice.saskaitos_data.label("invoice_date"),
-            Order.uzsakymo_busena.label("status"),
-            klientas_model.Client.vardas.label("client_first_name"),
-            klientas_model.Client.pavarde.label("client_last_name"),
-        )
-        .join(Order, Invoice.uzsakymo_id == Order.uzsakymo_id)
-        .join(klientas_model.Client, Order.kliento_id == klientas_model.Client.kliento_id)
-    )
+    keys = fields or tuple(INVOICE_COLUMNS)
+    return [_row_to_dict(keys, row) for row in rows_query(db, keys).all()]
+
 
-    results = query.all()
-    keys = [col['name'] for col in query.column_descriptions]
-    invoices = []
-    for row in results:
-        d = dict(zip(keys, row))
-        # Paversk jei reikia
-        if isinstance(d["invoice_date"], datetime):
-            d["invoice_date"] = d["invoice_date"].date()
-        invoices.append(d)
-    return invoices
+def get_invoice_details(db: Session, invoice_id: int, fields: tuple[str, ...] = None):
+    """
+    Retrieve one invoice with its order and client information in a single query.
+
+    Args:
+        db (Session): SQLAlchemy session.
+        invoice_id (int): Invoice ID.
+        fields (tuple[str, ...], optional): Only select these InvoiceOut fields.
+
+    Returns:
+        dict | None: Invoice record or None if not found.
+    """
+    keys = fields or tuple(INVOICE_COLUMNS)
+    row = rows_query(db, keys).filter(Invoice.saskaitos_id == invoice_id).first()
+    return _row_to_dict(keys, row) if row else None
 
 
 
@@ -61,6 +100,9 @@ def create_invoice(db: Session, invoice_data: InvoiceCreate):
     """
     Create a new invoice record in the database.
 
+    The row is flushed, not committed: the endpoint commits it together
+    with its `Idempotency-Key` response.
+
     Args:
         db (Session): SQLAlchemy session.
         invoice_data (InvoiceCreate): Pydantic schema with invoice data.
@@ -68,6 +110,9 @@ def create_invoice(db: Session, invoice_data: InvoiceCreate):
     Returns:
         Invoice: The created invoice object.
 
+    Raises:
+        IntegrityError: If the order already has an invoice (the transaction is rolled back).
+
     Author: Vytautas Petronis <vytautas.petronis@stud.viko.lt>
     """
     data = invoice_data.dict()
@@ -77,11 +122,67 @@ def create_invoice(db: Session, invoice_data: InvoiceCreate):
         saskaitos_data=data["invoice_date"]
     )
     db.add(invoice)
-    db.commit()
+    try:
+        db.flush()
+    except IntegrityError:
+        # Lygiagreti užklausa spėjo išrašyti sąskaitą tam pačiam užsakymui
+        db.rollback()
+        raise
     db.refresh(invoice)
     return invoice
 
 
+# Užsakymo būsena, kuriai išrašoma mėnesio sąskaita
+COMPLETED_ORDER_STATUS = "užbaigta"
+# Kiek sąskaitų įterpiama vienu executemany
+GENERATE_CHUNK = 1000
+
+
+def generate_missing(db: Session, invoice_date: date, chunk: int = GENERATE_CHUNK) -> list[int]:
+    """
+    Create invoices for all completed orders that do not have one.
+
+    The orders are found with one anti-join (orders LEFT JOIN invoices where
+    the invoice is missing), locked, so a parallel run waits and then finds
+    them invoiced, and the invoices are inserted with executemany in chunks.
+    The invoice amount is the order's `bendra_kaina`; orders without a price
+    are skipped. The caller commits (so follow-up jobs can be enqueued in the
+    same transaction). An invoice created for one of the orders meanwhile
+    (POST /invoices does not lock the order) fails the unique index on
+    `uzsakymo_id` with IntegrityError.
+
+    Args:
+        db (Session): SQLAlchemy session.
+        invoice_date (date): Date of the new invoices.
+        chunk (int): Rows per INSERT statement.
+
+    Returns:
+        list[int]: IDs of the invoiced orders.
+    """
+    orders = (
+        db.query(Order.uzsakymo_id, Order.bendra_kaina)
+        .outerjoin(Invoice, Invoice.uzsakymo_id == Order.uzsakymo_id)
+        .filter(
+            Order.uzsakymo_busena == COMPLETED_ORDER_STATUS,
+            Order.bendra_kaina.isnot(None),
+            Invoice.saskaitos_id.is_(None),
+        )
+        .order_by(Order.uzsakymo_id)
+        .with_for_update()
+        .all()
+    )
+    rows = [
+        {"uzsakymo_id": order_id, "suma": price, "saskaitos_data": invoice_date}
+        for order_id, price in orders
+    ]
+    for start in range(0, len(rows), chunk):
+        db.execute(insert(Invoice), rows[start:start + chunk])
+    if rows:
+        change_log.record(db, "invoices", action="insert")
+        client_stats.enqueue_refresh(db, orders=[row["uzsakymo_id"] for row in rows])
+    return [row["uzsakymo_id"] for row in rows]
+
+
 def delete_invoice(db: Session, invoice_id: int):
     """
     Delete an invoice record from the database.
@@ -128,6 +229,36 @@ def update_invoice_status(db: Session, invoice_id: int, status_data: InvoiceStat
         return invoice
     return None
 
+def bulk_update_status(db: Session, status: str, ids: list[int] = None, from_status: str = None) -> int:
+    """
+    Set the status of many invoices with one UPDATE statement.
+
+    As in `update_invoice_status`, the status of an invoice is the status of
+    its order, so the orders of the selected invoices are updated.
+
+    Args:
+        db (Session): SQLAlchemy session.
+        status (str): New status.
+        ids (list[int], optional): Update only orders of these invoices.
+        from_status (str, optional): Update only invoices currently in this status.
+
+    Returns:
+        int: Number of updated orders.
+    """
+    invoices = db.query(Invoice.uzsakymo_id)
+    if ids is not None:
+        invoices = invoices.filter(Invoice.saskaitos_id.in_(ids))
+    query = db.query(Order).filter(Order.uzsakymo_id.in_(invoices))
+    if from_status is not None:
+        query = query.filter(Order.uzsakymo_busena == from_status)
+    clients = [row[0] for row in query.with_entities(Order.kliento_id).distinct()]
+    updated = query.update({Order.uzsakymo_busena: status}, synchronize_session=False)
+    if updated:
+        change_log.record(db, "orders")
+        client_stats.enqueue_refresh(db, clients=clients)
+    db.commit()
+    return updated
+
 def get_invoice_by_id(db: Session, invoice_id: int):
     """
     Gauti sąskaitą pagal jos ID.
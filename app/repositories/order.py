@@ -10,21 +10,39 @@ Description:
 """
 from sqlalchemy.orm import Session
 from sqlalchemy import func
+from app.models.invoice import Invoice
 from app.models.order import Order
 from app.schemas.order import OrderCreate
+from app.services import change_log, client_stats
 
-def get_all(db: Session):
+def rows_query(db: Session, fields: tuple[str, ...]):
+    """
+    Build a column-projected query over orders (no ORM entity hydration).
+
+    Args:
+        db (Session): SQLAlchemy session.
+        fields (tuple[str, ...]): Order column names to select, in row order.
+
+    Returns:
+        Query: Query yielding lightweight Row tuples.
+    """
+    return db.query(*(getattr(Order, name) for name in fields))
+
+def get_all(db: Session, fields: tuple[str, ...] = None):
     """
     Retrieve all order records from the database.
 
     Args:
         db (Session): SQLAlchemy session.
+        fields (tuple[str, ...], optional): Select only these columns and return Row tuples.
 
     Returns:
-        List[Order]: List of all orders.
+        List[Order] | List[Row]: List of all orders.
 
     Author: Astijus Grinevičius <astijus.grinevicius@stud.viko.lt>
     """
+    if fields:
+        return rows_query(db, fields).all()
     return db.query(Order).all()
 
 def get_by_id(db: Session, uzsakymo_id: int):
@@ -42,25 +60,58 @@ def get_by_id(db: Session, uzsakymo_id: int):
     """
     return db.query(Order).filter(Order.uzsakymo_id == uzsakymo_id).first()
 
-def get_by_client_id(db: Session, kliento_id: int):
+def get_by_client_id(db: Session, kliento_id: int, fields: tuple[str, ...] = None):
     """
     Retrieve all orders for a specific client.
 
     Args:
         db (Session): SQLAlchemy session.
         kliento_id (int): Client ID.
+        fields (tuple[str, ...], optional): Select only these columns and return Row tuples.
 
     Returns:
-        List[Order]: List of orders for the specified client.
+        List[Order] | List[Row]: List of orders for the specified client.
 
     Author: Astijus Grinevičius <astijus.grinevicius@stud.viko.lt>
     """
-    return db.query(Order).filter(Order.kliento_id == kliento_id).all()
+    query = rows_query(db, fields) if fields else db.query(Order)
+    return query.filter(Order.kliento_id == kliento_id).all()
+
+HISTORY_FIELDS = (
+    "uzsakymo_id", "kliento_id", "automobilio_id", "darbuotojo_id", "nuomos_data", "grazinimo_data",
+    "paemimo_vietos_id", "grazinimo_vietos_id", "bendra_kaina", "uzsakymo_busena", "turi_papildomas_paslaugas",
+)
+HISTORY_INVOICE_FIELDS = ("saskaitos_id", "saskaitos_suma", "saskaitos_data")
+
+def history_query(db: Session, kliento_id: int):
+    """
+    Build the order history query of a client with the invoice of each order.
+
+    One LEFT JOIN with 'saskaitos' (orders without an invoice have NULL invoice
+    columns); the client's rows are found with the (kliento_id, uzsakymo_id)
+    index. The caller orders and pages the query (`utils.pagination.keyset`).
+
+    Args:
+        db (Session): SQLAlchemy session.
+        kliento_id (int): Client ID.
+
+    Returns:
+        Query: Row tuples of HISTORY_FIELDS followed by HISTORY_INVOICE_FIELDS.
+    """
+    return (
+        rows_query(db, HISTORY_FIELDS)
+        .add_columns(Invoice.saskaitos_id, Invoice.suma, Invoice.saskaitos_data)
+        .outerjoin(Invoice, Invoice.uzsakymo_id == Order.uzsakymo_id)
+        .filter(Order.kliento_id == kliento_id)
+    )
 
 def create(db: Session, order: OrderCreate):
     """
     Create a new order record in the database.
 
+    The row is flushed, not committed: the endpoint commits it together
+    with its `Idempotency-Key` response.
+
     Args:
         db (Session): SQLAlchemy session.
         order (OrderCreate): Pydantic schema with order data.
@@ -72,7 +123,7 @@ def create(db: Session, order: OrderCreate):
     """
     db_order = Order(**order.dict())
     db.add(db_order)
-    db.commit()
+    db.flush()
     db.refresh(db_order)
     return db_order
 
@@ -96,6 +147,33 @@ def delete(db: Session, uzsakymo_id: int):
         return True
     return False
 
+def bulk_update_status(db: Session, status: str, ids: list[int] = None, from_status: str = None) -> int:
+    """
+    Set the status of many orders with one UPDATE statement.
+
+    Args:
+        db (Session): SQLAlchemy session.
+        status (str): New uzsakymo_busena.
+        ids (list[int], optional): Update only these orders.
+        from_status (str, optional): Update only orders currently in this status.
+
+    Returns:
+        int: Number of updated orders.
+    """
+    query = db.query(Order)
+    if ids is not None:
+        query = query.filter(Order.uzsakymo_id.in_(ids))
+    if from_status is not None:
+        query = query.filter(Order.uzsakymo_busena == from_status)
+    # Klientai nustatomi prieš UPDATE – po jo from_status filtras nebeatitinka
+    clients = [row[0] for row in query.with_entities(Order.kliento_id).distinct()]
+    updated = query.update({Order.uzsakymo_busena: status}, synchronize_session=False)
+    if updated:
+        change_log.record(db, "orders")
+        client_stats.enqueue_refresh(db, clients=clients)
+    db.commit()
+    return updated
+
 def get_order_counts_by_status(db: Session):
     """
     Retrieve a count of orders grouped by their status.
@@ -0,0 +1,75 @@
+"""
+app/repositories/report.py
+
+Aggregate report queries.
+
+Description:
+    Reports are computed by the database (GROUP BY over invoices joined with
+    their orders), so only one row per group is transferred. The invoice date
+    range is served by the index on `saskaitos.saskaitos_data`.
+"""
+from datetime import date, timedelta
+
+from sqlalchemy import extract, func
+from sqlalchemy.orm import Session
+
+from app.models import Car, Client, Invoice, Location, Order
+from app.schemas.report import RevenueGroup
+
+# Eilučių kiekis, kurį DB tvarkyklė grąžina vienu kartu srautiniam atsakymui
+STREAM_BATCH = 500
+
+
+def _group_columns(group_by: RevenueGroup):
+    """Grouping columns, joins and a row -> (key, label) converter of a report grouping."""
+    if group_by == RevenueGroup.DAY:
+        day = func.date(Invoice.saskaitos_data)
+        return (day,), (), lambda row: (str(row[0]), None)
+    if group_by == RevenueGroup.MONTH:
+        year, month = extract("year", Invoice.saskaitos_data), extract("month", Invoice.saskaitos_data)
+        return (year, month), (), lambda row: (f"{int(row[0]):04d}-{int(row[1]):02d}", None)
+    if group_by == RevenueGroup.CAR:
+        columns = (Order.automobilio_id, Car.marke, Car.modelis, Car.numeris)
+        joins = ((Car, Car.automobilio_id == Order.automobilio_id),)
+        return columns, joins, lambda row: (row[0], f"{row[1]} {row[2]} ({row[3]})" if row[1] else None)
+    if group_by == RevenueGroup.CLIENT:
+        columns = (Order.kliento_id, Client.vardas, Client.pavarde)
+        joins = ((Client, Client.kliento_id == Order.kliento_id),)
+        return columns, joins, lambda row: (row[0], " ".join(filter(None, (row[1], row[2]))) or None)
+    columns = (Order.paemimo_vietos_id, Location.pavadinimas)
+    joins = ((Location, Location.vietos_id == Order.paemimo_vietos_id),)
+    return columns, joins, lambda row: (row[0], row[1])
+
+
+def revenue(db: Session, group_by: RevenueGroup, date_from: date = None, date_to: date = None):
+    """
+    Sum invoice amounts per group, streaming the grouped rows.
+
+    Args:
+        db (Session): SQLAlchemy session (must stay open while iterating).
+        group_by (RevenueGroup): Grouping.
+        date_from (date, optional): First invoice day (inclusive).
+        date_to (date, optional): Last invoice day (inclusive).
+
+    Yields:
+        dict: key, label, revenue and invoices of each group, ordered by key.
+    """
+    columns, joins, convert = _group_columns(group_by)
+    query = (
+        db.query(*columns, func.sum(Invoice.suma), func.count(Invoice.saskaitos_id))
+        .select_from(Invoice)
+        .join(Order, Order.uzsakymo_id == Invoice.uzsakymo_id)
+    )
+    for entity, condition in joins:
+        query = query.outerjoin(entity, condition)
+    if date_from is not None:
+        query = query.filter(Invoice.saskaitos_data >= date_from)
+    if date_to is not None:
+        # saskaitos_data MySQL'e yra TIMESTAMP – imama iki kitos dienos pradžios
+        query = query.filter(Invoice.saskaitos_data < date_to + timedelta(days=1))
+    query = query.group_by(*columns).order_by(*columns)
+
+    size = len(columns)
+    for row in query.yield_per(STREAM_BATCH):
+        key, label = convert(row)
+        yield {"key": key, "label": label, "revenue": round(float(row[size] or 0), 2), "invoices": row[size + 1]}
@@ -13,24 +13,41 @@ from sqlalchemy.orm import Session
 from app.models.reservation import Reservation
 from app.schemas.reservation import ReservationCreate
 from sqlalchemy import desc
-from app.models.reservation import Reservation
+from app.models.reservation import NON_BLOCKING_STATUSES, Reservation
 from app.models.car import Car
 from app.models.client import Client
+from app.services import change_log
+
+
+
+def rows_query(db: Session, fields: tuple[str, ...]):
+    """
+    Build a column-projected query over reservations (no ORM entity hydration).
 
+    Args:
+        db (Session): SQLAlchemy session.
+        fields (tuple[str, ...]): Reservation column names to select, in row order.
 
+    Returns:
+        Query: Query yielding lightweight Row tuples.
+    """
+    return db.query(*(getattr(Reservation, name) for name in fields))
 
-def get_all(db: Session):
+def get_all(db: Session, fields: tuple[str, ...] = None):
     """
     Retrieve all reservation records from the database.
 
     Args:
         db (Session): SQLAlchemy session.
+        fields (tuple[str, ...], optional): Select only these columns and return Row tuples.
 
     Returns:
-        List[Reservation]: List of all reservations.
+        List[Reservation] | List[Row]: List of all reservations.
 
     Author: Vytautas Petronis <vytautas.petronis@stud.viko.lt>
     """
+    if fields:
+        return rows_query(db, fields).all()
     return db.query(Reservation).all()
 
 def get_by_id(db: Session, rezervacijos_id: int):
@@ -52,6 +69,9 @@ def create(db: Session, reservation: ReservationCreate):
     """
     Create a new reservation record in the database.
 
+    The row is flushed, not committed: the endpoint commits it together
+    with its `Idempotency-Key` response.
+
     Args:
         db (Session): SQLAlchemy session.
         reservation (ReservationCreate): Pydantic schema with reservation data.
@@ -63,10 +83,115 @@ def create(db: Session, reservation: ReservationCreate):
     """
     db_res = Reservation(**reservation.dict())
     db.add(db_res)
-    db.commit()
+    db.flush()
     db.refresh(db_res)
     return db_res
 
+def create_batch(db: Session, items: list[ReservationCreate]):
+    """
+    Create many reservations in one transaction, skipping overlapping ones.
+
+    The items are sorted by car and start date. Existing reservations of all
+    requested cars in the covered period are read with one query (locked
+    with FOR UPDATE where supported, so a concurrent batch cannot book the
+    same days), each item is checked against them and against the items
+    accepted before it, and the accepted ones are inserted in one flush. The
+    endpoint commits them together with its `Idempotency-Key` response.
+
+    Overlap rule (as in car availability): two reservations of a car overlap if
+    start_a < end_b and start_b < end_a. Cancelled reservations never block.
+
+    Args:
+        db (Session): SQLAlchemy session.
+        items (list[ReservationCreate]): Requested reservations.
+
+    Returns:
+        list[dict]: Per-item outcome in request order: index, status
+        ("created", "conflict", "invalid"), rezervacijos_id, conflicts_with
+        (existing reservation IDs), conflicts_with_items (batch indexes), detail.
+    """
+    results = [{"index": i, "status": "created", "rezervacijos_id": None,
+                "conflicts_with": [], "conflicts_with_items": [], "detail": None}
+               for i in range(len(items))]
+    valid = []
+    for i, item in enumerate(items):
+        if item.rezervacijos_pradzia >= item.rezervacijos_pabaiga:
+            results[i].update(status="invalid", detail="rezervacijos_pradzia must be earlier than rezervacijos_pabaiga")
+        else:
+            valid.append(i)
+    if not valid:
+        return results
+
+    car_ids = {items[i].automobilio_id for i in valid}
+    existing = (
+        db.query(Reservation.rezervacijos_id, Reservation.automobilio_id,
+                 Reservation.rezervacijos_pradzia, Reservation.rezervacijos_pabaiga)
+        .filter(
+            Reservation.automobilio_id.in_(car_ids),
+            Reservation.rezervacijos_pradzia < max(items[i].rezervacijos_pabaiga for i in valid),
+            Reservation.rezervacijos_pabaiga > min(items[i].rezervacijos_pradzia for i in valid),
+            Reservation.busena.notin_(NON_BLOCKING_STATUSES),
+        )
+        .with_for_update()
+        .all()
+    )
+    # automobilis -> [(pradžia, pabaiga, rezervacijos_id arba None, paketo indeksas arba None)]
+    busy: dict[int, list] = {}
+    for rezervacijos_id, car_id, start, end in existing:
+        busy.setdefault(car_id, []).append((start, end, rezervacijos_id, None))
+
+    accepted = []
+    for i in sorted(valid, key=lambda i: (items[i].automobilio_id, items[i].rezervacijos_pradzia, i)):
+        item = items[i]
+        intervals = busy.setdefault(item.automobilio_id, [])
+        overlapping = [
+            (rezervacijos_id, index) for start, end, rezervacijos_id, index in intervals
+            if start < item.rezervacijos_pabaiga and item.rezervacijos_pradzia < end
+        ]
+        if overlapping:
+            results[i].update(
+                status="conflict",
+                conflicts_with=sorted(r for r, _ in overlapping if r is not None),
+                conflicts_with_items=sorted(x for _, x in overlapping if x is not None),
+            )
+            continue
+        if item.busena not in NON_BLOCKING_STATUSES:
+            intervals.append((item.rezervacijos_pradzia, item.rezervacijos_pabaiga, None, i))
+        accepted.append(i)
+
+    if accepted:
+        # ORM flush (ne Core insert), kad rezervacijas pamatytų užimtumo indeksas ir pakeitimų žurnalas
+        created = [Reservation(**items[i].dict()) for i in accepted]
+        db.add_all(created)
+        db.flush()
+        for i, reservation in zip(accepted, created):
+            results[i]["rezervacijos_id"] = reservation.rezervacijos_id
+    return results
+
+def finish_expired(db: Session, today: date) -> int:
+    """
+    Mark confirmed reservations that ended (end date is exclusive) as 'baigta'.
+
+    One UPDATE statement. Pending reservations are left to the staff: a
+    reservation is never cancelled just because its start day passed.
+
+    Args:
+        db (Session): SQLAlchemy session.
+        today (date): Current day.
+
+    Returns:
+        int: Number of finished reservations.
+    """
+    finished = (
+        db.query(Reservation)
+        .filter(Reservation.busena == "patvirtinta", Reservation.rezervacijos_pabaiga <= today)
+        .update({Reservation.busena: "baigta"}, synchronize_session=False)
+    )
+    if finished:
+        change_log.record(db, "reservations")
+    db.commit()
+    return finished
+
 def delete(db: Session, rezervacijos_id: int):
     """
     Delete a reservation record from the database.
@@ -126,7 +251,8 @@ def search_reservations(
     automobilio_id: int = None,
     nuo: date = None,
     iki: date = None,
-    busena: str = None
+    busena: str = None,
+    fields: tuple[str, ...] = None
 ):
     """
     Search for reservations by multiple optional filters.
@@ -138,13 +264,14 @@ def search_reservations(
         nuo (date, optional): Start date filter.
         iki (date, optional): End date filter.
         busena (str, optional): Reservation status filter.
+        fields (tuple[str, ...], optional): Select only these columns and return Row tuples.
 
     Returns:
-        List[Reservation]: List of reservations matching filters.
+        List[Reservation] | List[Row]: List of reservations matching filters.
 
     Author: Vytautas Petronis <vytautas.petronis@stud.viko.lt>
     """
-    query = db.query(Reservation)
+    query = rows_query(db, fields) if fields else db.query(Reservation)
 
     if kliento_id:
         query = query.filter(Reservation.kliento_id == kliento_id)
@@ -0,0 +1,88 @@
+"""
+app/schemas/analytics.py
+
+Pydantic schemas for the analytics endpoints in the Car Rental API.
+
+Description:
+    Response models of the `/analytics/*` endpoints, which are computed from
+    the Parquet snapshot (app/services/analytics.py), not from the live tables.
+"""
+
+from datetime import datetime
+from enum import Enum
+from typing import Dict, List, Optional
+
+from pydantic import BaseModel
+
+
+class RevenuePeriod(str, Enum):
+    """Time bucket of the revenue trend."""
+    DAY = "day"
+    WEEK = "week"
+    MONTH = "month"
+
+
+class SnapshotInfo(BaseModel):
+    """
+    Current analytics snapshot.
+
+    Attributes:
+        snapshot (str): Snapshot directory name.
+        taken_at (datetime): UTC time the snapshot was taken.
+        rows (Dict[str, int]): Number of rows per table.
+    """
+    snapshot: str
+    taken_at: datetime
+    rows: Dict[str, int]
+
+
+class CarUtilization(BaseModel):
+    """
+    Utilization of one car in a period.
+
+    Attributes:
+        automobilio_id (int): Car ID.
+        marke (Optional[str]): Brand.
+        modelis (Optional[str]): Model.
+        numeris (Optional[str]): Registration number.
+        rented_days (int): Days covered by non-cancelled orders.
+        utilization (float): rented_days / days in the period (0..1).
+    """
+    automobilio_id: int
+    marke: Optional[str] = None
+    modelis: Optional[str] = None
+    numeris: Optional[str] = None
+    rented_days: int
+    utilization: float
+
+
+class RevenueTrend(BaseModel):
+    """
+    Invoice revenue of one time bucket.
+
+    Attributes:
+        period (str): Day or week start (YYYY-MM-DD), or month (YYYY-MM).
+        revenue (float): Sum of invoice amounts.
+        invoices (int): Number of invoices.
+        average (float): Average invoice amount.
+    """
+    period: str
+    revenue: float
+    invoices: int
+    average: float
+
+
+class Cohort(BaseModel):
+    """
+    Clients whose first order was in the same month.
+
+    Attributes:
+        cohort (str): Month of the first order (YYYY-MM).
+        clients (int): Number of clients.
+        revenue (float): Sum of the cohort's order prices.
+        retention (List[float]): Share of the cohort ordering in each month since the first.
+    """
+    cohort: str
+    clients: int
+    revenue: float
+    retention: List[float]
@@ -11,6 +11,7 @@ Description:
 """
 from pydantic import BaseModel
 from datetime import date
+from typing import Optional
 
 class LoginRequest(BaseModel):
     """
@@ -32,11 +33,13 @@ class TokenResponse(BaseModel):
     Fields:
         access_token (str): JWT token string.
         token_type (str): Token type (default: 'bearer').
+        refresh_token (Optional[str]): Single-use token for POST /refresh.
 
     Author: Gabrielė Tamaševičiūtė <gabriele.tamaseviciute@stud.viko.lt>
     """
     access_token: str
     token_type: str = "bearer"
+    refresh_token: Optional[str] = None
 
 class RegisterRequest(BaseModel):
     """
@@ -96,3 +99,12 @@ class ChangePasswordRequest(BaseModel):
     """
     senas_slaptazodis: str
     naujas_slaptazodis: str
+
+class RefreshRequest(BaseModel):
+    """
+    Schema for exchanging a refresh token for a new token pair.
+
+    Fields:
+        refresh_token (str): Refresh token from the previous login or refresh.
+    """
+    refresh_token: str
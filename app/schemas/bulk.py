@@ -0,0 +1,50 @@
+"""
+app/schemas/bulk.py
+
+Pydantic schemas for bulk status updates in the Car Rental API.
+
+Description:
+    Shared request and response models of the `PATCH /<resource>/status`
+    endpoints that change the status of many cars, orders or invoices with
+    one set-based UPDATE.
+"""
+
+from pydantic import BaseModel, Field, model_validator
+from typing import List, Optional
+
+# Daugiausia ID viename užklausime
+BULK_MAX_IDS = 5000
+
+
+class BulkStatusUpdate(BaseModel):
+    """
+    Schema for a bulk status change.
+
+    At least one filter is required, so an empty body cannot update every row.
+
+    Attributes:
+        ids (Optional[List[int]]): Rows to update.
+        from_status (Optional[str]): Update only rows currently in this status.
+        status (str): New status.
+    """
+    ids: Optional[List[int]] = Field(None, min_length=1, max_length=BULK_MAX_IDS)
+    from_status: Optional[str] = None
+    status: str
+
+    @model_validator(mode="after")
+    def require_filter(self):
+        if self.ids is None and self.from_status is None:
+            raise ValueError("Provide `ids`, `from_status` or both")
+        return self
+
+
+class BulkStatusResult(BaseModel):
+    """
+    Result of a bulk status change.
+
+    Attributes:
+        updated (int): Number of updated rows.
+        status (str): The new status.
+    """
+    updated: int
+    status: str
@@ -10,7 +10,7 @@ Description:
     Used for API request validation, response serialization, and OpenAPI documentation.
 """
 from pydantic import BaseModel
-from typing import Optional, List, Dict
+from typing import Any, Optional, List, Dict
 from datetime import date
 
 from app.schemas.location import LocationOut
@@ -136,3 +136,36 @@ class CarStatusUpdate(BaseModel):
     Author: Gabrielė Tamaševičiūtė <gabriele.tamaseviciute@stud.viko.lt>
     """
     status: str
+
+class CarSearchResult(BaseModel):
+    """
+    Schema for free-text car search results.
+
+    Fields:
+        total (int): Number of matching cars (before `limit`).
+        items (List[CarOut]): Best matching cars, best first.
+        facets (Dict[str, Dict[str, int]]): Counts of marke, kuro_tipas,
+            sedimos_vietos and metai values over all matches.
+    """
+    total: int
+    items: List[CarOut]
+    facets: Dict[str, Dict[str, int]]
+
+class CarAvailabilityCalendar(BaseModel):
+    """
+    Schema for per-day free car counts grouped by a car attribute.
+
+    Fields:
+        date_from (date): First day.
+        date_to (date): Day after the last one.
+        group_by (str): Car field the groups come from.
+        groups (List[Any]): Group values (row labels of `free`).
+        totals (List[int]): Number of cars in each group.
+        free (List[List[int]]): free[g][d] – free cars of group g on day date_from + d.
+    """
+    date_from: date
+    date_to: date
+    group_by: str
+    groups: List[Any]
+    totals: List[int]
+    free: List[List[int]]
@@ -11,7 +11,7 @@ Description:
 """
 from pydantic import BaseModel, EmailStr
 from datetime import date,datetime
-from typing import List, Dict
+from typing import List, Dict, Optional
 
 class ClientBase(BaseModel):
     """
@@ -24,7 +24,7 @@ class ClientBase(BaseModel):
         telefono_nr (str): Client phone number.
         gimimo_data (date): Date of birth.
         registracijos_data (datetime): Registration date and time.
-        bonus_taskai (int): Loyalty bonus points.
+        bonus_korekcija (int): Manual bonus point adjustment, added to the computed balance.
 
     Author: Ivan Bruner <ivan.bruner@stud.viko.lt>
     """
@@ -34,7 +34,7 @@ class ClientBase(BaseModel):
     telefono_nr: str = None
     gimimo_data: date = None
     registracijos_data: datetime = None
-    bonus_taskai: int = 0
+    bonus_korekcija: int = 0
 
 class ClientCreate(ClientBase):
     """
@@ -62,6 +62,7 @@ class ClientOut(ClientBase):
 
     Fields:
         kliento_id (int): Client unique identifier.
+        bonus_taskai (int): Bonus point balance (read-only, kept by the client statistics).
         links (List[Dict]): HATEOAS links for related actions.
 
     Inherits all fields from ClientBase.
@@ -74,3 +75,37 @@ class ClientOut(ClientBase):
 
     class Config:
         orm_mode = True
+
+
+class ClientStatsOut(BaseModel):
+    """
+    Precomputed order statistics of a client.
+
+    Fields:
+        kliento_id (int): Client unique identifier.
+        uzsakymu_skaicius (int): Orders that were not cancelled.
+        uzbaigti_uzsakymai (int): Completed orders.
+        islaidos (float): Sum of the client's invoices.
+        uzdirbti_taskai (int): Bonus points earned from the spend.
+        panaudoti_taskai (int): Bonus points redeemed.
+        bonus_korekcija (int): Manual adjustment of the balance.
+        taskai_likutis (int): Earned - redeemed + adjustment (not below zero), as in `bonus_taskai`.
+        pirmas_uzsakymas (Optional[date]): Rental start of the first order.
+        paskutinis_uzsakymas (Optional[date]): Rental start of the latest order.
+        perskaiciuota (Optional[datetime]): Time of the last recomputation (None if not computed yet).
+        loyalty_eligible (bool): Whether the LOYALTY quote discount applies.
+        links (List[Dict]): HATEOAS links.
+    """
+    kliento_id: int
+    uzsakymu_skaicius: int
+    uzbaigti_uzsakymai: int
+    islaidos: float
+    uzdirbti_taskai: int
+    panaudoti_taskai: int
+    bonus_korekcija: int
+    taskai_likutis: int
+    pirmas_uzsakymas: Optional[date] = None
+    paskutinis_uzsakymas: Optional[date] = None
+    perskaiciuota: Optional[datetime] = None
+    loyalty_eligible: bool
+    links: List[Dict]
@@ -50,6 +50,17 @@ class InvoiceStatusUpdate(BaseModel):
     """
     status: str
 
+class InvoiceGenerateResult(BaseModel):
+    """
+    Result of generating invoices for completed orders without one.
+
+    Attributes:
+        created (int): Number of created invoices.
+        invoice_date (date): Date of the created invoices.
+    """
+    created: int
+    invoice_date: date
+
 class InvoiceOut(InvoiceBase):
     """
     Schema for returning invoice information to the client, with additional fields.
@@ -88,3 +88,17 @@ class OrderOut(OrderBase):
 
     class Config:
         from_attributes = True
+
+
+class ClientOrderHistoryOut(OrderOut):
+    """
+    Order of a client's history with its invoice.
+
+    Attributes:
+        saskaitos_id (Optional[int]): Invoice of the order (None if not invoiced yet).
+        saskaitos_suma (Optional[float]): Invoice amount.
+        saskaitos_data (Optional[date]): Invoice date.
+    """
+    saskaitos_id: Optional[int] = None
+    saskaitos_suma: Optional[float] = None
+    saskaitos_data: Optional[date] = None
@@ -0,0 +1,39 @@
+"""
+app/schemas/report.py
+
+Pydantic schemas for aggregate reports in the Car Rental API.
+
+Description:
+    Defines the grouping options and the row model of the revenue report
+    (invoice amounts aggregated by day, month, car, client or location).
+"""
+
+from enum import Enum
+from typing import Optional, Union
+
+from pydantic import BaseModel
+
+
+class RevenueGroup(str, Enum):
+    """Grouping of the revenue report."""
+    DAY = "day"
+    MONTH = "month"
+    CAR = "car"
+    CLIENT = "client"
+    LOCATION = "location"
+
+
+class RevenueRow(BaseModel):
+    """
+    One group of the revenue report.
+
+    Attributes:
+        key (Union[str, int]): Day (YYYY-MM-DD), month (YYYY-MM), or car/client/location ID.
+        label (Optional[str]): Car, client or location name (None for dates).
+        revenue (float): Sum of invoice amounts.
+        invoices (int): Number of invoices.
+    """
+    key: Union[str, int, None]
+    label: Optional[str] = None
+    revenue: float
+    invoices: int
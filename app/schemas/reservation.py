@@ -6,11 +6,11 @@ Pydantic schemas for reservation operations in the Car Rental API.
 Author: Vytautas Petronis <vytautas.petronis@stud.viko.lt>
 
 Description:
-    Defines data models for reservation creation, update, full responses,
-    and reservation summary with HATEOAS support.
+    Defines data models for reservation creation, batch creation, update,
+    full responses, and reservation summary with HATEOAS support.
 """
 
-from pydantic import BaseModel
+from pydantic import BaseModel, Field
 from datetime import date
 from typing import List, Dict, Optional
 
@@ -41,6 +41,56 @@ class ReservationCreate(ReservationBase):
     pass
 
 
+# Daugiausia rezervacijų viename paketiniame užklausime
+BATCH_MAX_ITEMS = 200
+
+
+class ReservationBatchCreate(BaseModel):
+    """
+    Schema for creating many reservations in one request.
+
+    Attributes:
+        items (List[ReservationCreate]): Reservations to create (1..200).
+    """
+    items: List[ReservationCreate] = Field(..., min_length=1, max_length=BATCH_MAX_ITEMS)
+
+
+class ReservationBatchItem(BaseModel):
+    """
+    Outcome of one item of a batch.
+
+    Attributes:
+        index (int): Position of the item in the request.
+        status (str): "created", "conflict" or "invalid".
+        rezervacijos_id (Optional[int]): ID of the created reservation.
+        conflicts_with (List[int]): Existing reservations the item overlaps.
+        conflicts_with_items (List[int]): Earlier batch items (by index) the item overlaps.
+        detail (Optional[str]): Reason of an "invalid" item.
+        links (List[Dict]): HATEOAS links of the created reservation.
+    """
+    index: int
+    status: str
+    rezervacijos_id: Optional[int] = None
+    conflicts_with: List[int] = []
+    conflicts_with_items: List[int] = []
+    detail: Optional[str] = None
+    links: List[Dict] = []
+
+
+class ReservationBatchResult(BaseModel):
+    """
+    Result of a batch reservation request.
+
+    Attributes:
+        created (int): Number of created reservations.
+        rejected (int): Number of conflicting or invalid items.
+        items (List[ReservationBatchItem]): Per-item outcomes in request order.
+    """
+    created: int
+    rejected: int
+    items: List[ReservationBatchItem]
+
+
 class ReservationUpdate(BaseModel):
     """
     Schema used for partially updating a reservation.
@@ -0,0 +1,354 @@
+"""
+app/services/analytics.py
+
+Columnar analytics snapshot and reporting queries.
+
+Description:
+    Heavy reporting queries (utilization, revenue trends, client cohorts)
+    should not scan the OLTP tables while clients book cars. The snapshot job
+    copies orders, reservations, invoices and cars to Parquet files in
+    ANALYTICS_DIR, streaming the rows in batches:
+
+        ANALYTICS_DIR/<UTC time>/{orders,reservations,invoices,cars}.parquet
+        ANALYTICS_DIR/CURRENT          – name of the latest complete snapshot
+
+    CURRENT is replaced only after every file is written, so readers never
+    see a partial snapshot; older snapshots are removed (ANALYTICS_KEEP are
+    kept). The scheduler takes a new snapshot when the current one is older
+    than ANALYTICS_SNAPSHOT_MINUTES; `python -m app.services.analytics` takes
+    one immediately. When the API runs on several hosts ANALYTICS_DIR must be
+    shared storage, because only the scheduler leader writes it.
+
+    Queries read the files memory-mapped with pyarrow, convert only the
+    columns they need to pandas and compute with vectorized operations. The
+    loaded frames are cached until CURRENT changes.
+"""
+import logging
+import os
+import shutil
+import threading
+from datetime import date, datetime, timedelta
+from decimal import Decimal
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+import pyarrow as pa
+import pyarrow.parquet as pq
+from sqlalchemy import select
+from sqlalchemy.orm import Session
+
+from app.models import Car, Invoice, Order, Reservation
+from app.services.job_queue import task
+
+logger = logging.getLogger(__name__)
+
+ANALYTICS_DIR = Path(os.getenv("ANALYTICS_DIR", "analytics"))
+ANALYTICS_SNAPSHOT_MINUTES = int(os.getenv("ANALYTICS_SNAPSHOT_MINUTES", "60"))
+ANALYTICS_KEEP = int(os.getenv("ANALYTICS_KEEP", "2"))
+# Eilučių kiekis vienoje Parquet eilučių grupėje (ir viename DB gabale)
+SNAPSHOT_BATCH = 50_000
+
+CURRENT_FILE = "CURRENT"
+CANCELLED_ORDER_STATUS = "atšaukta"
+
+# Lentelė -> (stulpelis, Arrow tipas); kopijuojami tik analizei reikalingi stulpeliai
+TABLES = {
+    "orders": (Order, (
+        ("uzsakymo_id", pa.int64()), ("kliento_id", pa.int64()), ("automobilio_id", pa.int64()),
+        ("nuomos_data", pa.date32()), ("grazinimo_data", pa.date32()),
+        ("paemimo_vietos_id", pa.int64()), ("bendra_kaina", pa.float64()), ("uzsakymo_busena", pa.string()),
+    )),
+    "reservations": (Reservation, (
+        ("rezervacijos_id", pa.int64()), ("kliento_id", pa.int64()), ("automobilio_id", pa.int64()),
+        ("rezervacijos_pradzia", pa.date32()), ("rezervacijos_pabaiga", pa.date32()), ("busena", pa.string()),
+    )),
+    "invoices": (Invoice, (
+        ("saskaitos_id", pa.int64()), ("uzsakymo_id", pa.int64()), ("suma", pa.float64()),
+        ("saskaitos_data", pa.date32()),
+    )),
+    "cars": (Car, (
+        ("automobilio_id", pa.int64()), ("marke", pa.string()), ("modelis", pa.string()),
+        ("numeris", pa.string()), ("kuro_tipas", pa.string()), ("kaina_parai", pa.float64()),
+        ("automobilio_statusas", pa.string()), ("dabartine_vieta_id", pa.int64()),
+    )),
+}
+
+
+class SnapshotMissing(RuntimeError):
+    """No analytics snapshot has been taken yet."""
+
+
+def _convert(value, arrow_type):
+    """Normalize a DB value for Arrow (MySQL TIMESTAMP -> date, Decimal -> float)."""
+    if value is None:
+        return None
+    if arrow_type == pa.date32():
+        if isinstance(value, datetime):
+            return value.date()
+        if isinstance(value, str):
+            return date.fromisoformat(value[:10])
+    elif arrow_type == pa.float64() and isinstance(value, Decimal):
+        return float(value)
+    return value
+
+
+def _write_table(db: Session, model, columns, path: Path) -> int:
+    """Stream one table into a Parquet file in SNAPSHOT_BATCH row groups."""
+    schema = pa.schema([pa.field(name, arrow_type) for name, arrow_type in columns])
+    statement = select(*(getattr(model, name) for name, _ in columns))
+    result = db.execute(statement.execution_options(stream_results=True, yield_per=SNAPSHOT_BATCH))
+    rows = 0
+    with pq.ParquetWriter(path, schema) as writer:
+        for batch in result.partitions(SNAPSHOT_BATCH):
+            arrays = [
+                pa.array([_convert(row[i], arrow_type) for row in batch], type=arrow_type)
+                for i, (_, arrow_type) in enumerate(columns)
+            ]
+            writer.write_table(pa.Table.from_arrays(arrays, schema=schema))
+            rows += len(batch)
+    return rows
+
+
+def take_snapshot(db: Session, now: datetime = None) -> dict:
+    """
+    Copy the analytics tables to a new Parquet snapshot and make it current.
+
+    Args:
+        db (Session): Session to read from (only SELECTs are run).
+        now (datetime, optional): Snapshot time in UTC (for tests).
+
+    Returns:
+        dict: Number of rows written per table.
+    """
+    now = now or datetime.utcnow()
+    name = now.strftime("%Y%m%dT%H%M%S%f")
+    target = ANALYTICS_DIR / name
+    target.mkdir(parents=True, exist_ok=True)
+    try:
+        counts = {
+            table: _write_table(db, model, columns, target / f"{table}.parquet")
+            for table, (model, columns) in TABLES.items()
+        }
+    except BaseException:
+        shutil.rmtree(target, ignore_errors=True)
+        raise
+    tmp = ANALYTICS_DIR / f"{CURRENT_FILE}.tmp"
+    tmp.write_text(name)
+    os.replace(tmp, ANALYTICS_DIR / CURRENT_FILE)
+
+    old = sorted(p for p in ANALYTICS_DIR.iterdir() if p.is_dir() and p.name != name)
+    for path in old[:max(len(old) - ANALYTICS_KEEP + 1, 0)]:
+        shutil.rmtree(path, ignore_errors=True)
+    logger.info("Analytics snapshot %s: %s", name, counts)
+    return counts
+
+
+def current_snapshot() -> str | None:
+    """Name of the current snapshot directory, or None."""
+    try:
+        return (ANALYTICS_DIR / CURRENT_FILE).read_text().strip() or None
+    except FileNotFoundError:
+        return None
+
+
+def snapshot_time(name: str) -> datetime:
+    """UTC time a snapshot was taken, parsed from its directory name."""
+    return datetime.strptime(name, "%Y%m%dT%H%M%S%f")
+
+
+def snapshot_if_stale(db: Session, now: datetime = None) -> dict | None:
+    """
+    Take a snapshot when none exists or the current one is older than ANALYTICS_SNAPSHOT_MINUTES.
+
+    Returns:
+        dict | None: Row counts of the new snapshot, or None if it was fresh.
+    """
+    now = now or datetime.utcnow()
+    name = current_snapshot()
+    if name and now - snapshot_time(name) < timedelta(minutes=ANALYTICS_SNAPSHOT_MINUTES):
+        return None
+    return take_snapshot(db, now)
+
+
+class _Frames:
+    """Memory-mapped tables of one snapshot and the pandas frames built from them."""
+
+    def __init__(self, name: str):
+        self.name = name
+        self.taken_at = snapshot_time(name)
+        self._tables = {
+            table: pq.read_table(ANALYTICS_DIR / name / f"{table}.parquet", memory_map=True)
+            for table in TABLES
+        }
+        self._frames = {}
+        self._lock = threading.Lock()
+
+    def rows(self) -> dict:
+        return {table: data.num_rows for table, data in self._tables.items()}
+
+    def frame(self, table: str, *columns: str) -> pd.DataFrame:
+        """Columns of a table as a DataFrame (dates as datetime64), built once per snapshot."""
+        key = (table, columns)
+        with self._lock:
+            df = self._frames.get(key)
+            if df is None:
+                df = self._tables[table].select(list(columns)).to_pandas(date_as_object=False)
+                self._frames[key] = df
+            return df
+
+
+_loaded: _Frames | None = None
+_loaded_lock = threading.Lock()
+
+
+def frames() -> _Frames:
+    """
+    Tables of the current snapshot (reloaded when CURRENT changes).
+
+    Raises:
+        SnapshotMissing: If no snapshot has been taken.
+    """
+    global _loaded
+    name = current_snapshot()
+    if name is None:
+        raise SnapshotMissing("No analytics snapshot yet")
+    with _loaded_lock:
+        if _loaded is None or _loaded.name != name:
+            _loaded = _Frames(name)
+        return _loaded
+
+
+def snapshot_info() -> dict:
+    """Name, time and row counts of the current snapshot."""
+    data = frames()
+    return {"snapshot": data.name, "taken_at": data.taken_at, "rows": data.rows()}
+
+
+def _range(date_from: date, date_to: date) -> tuple[pd.Timestamp, pd.Timestamp]:
+    return pd.Timestamp(date_from), pd.Timestamp(date_to)
+
+
+def utilization(date_from: date, date_to: date) -> list[dict]:
+    """
+    Share of days each car was rented (non-cancelled orders) in [date_from, date_to].
+
+    Args:
+        date_from (date): First day.
+        date_to (date): Last day (inclusive).
+
+    Returns:
+        list[dict]: automobilio_id, marke, modelis, numeris, rented_days and
+        utilization (0..1) per car, most utilized first.
+    """
+    data = frames()
+    start, end = _range(date_from, date_to)
+    period_days = (end - start).days + 1
+    orders = data.frame("orders", "automobilio_id", "nuomos_data", "grazinimo_data", "uzsakymo_busena")
+    orders = orders[(orders["uzsakymo_busena"] != CANCELLED_ORDER_STATUS) & orders["nuomos_data"].notna()]
+    # Nuomos intervalas apkarpomas iki laikotarpio; paskutinė diena įskaičiuojama
+    first = orders["nuomos_data"].clip(lower=start)
+    last = orders["grazinimo_data"].fillna(orders["nuomos_data"]).clip(upper=end)
+    days = ((last - first).dt.days + 1).clip(lower=0)
+    rented = days.groupby(orders["automobilio_id"]).sum()
+
+    cars = data.frame("cars", "automobilio_id", "marke", "modelis", "numeris").set_index("automobilio_id")
+    result = cars.assign(rented_days=rented.reindex(cars.index, fill_value=0).astype("int64"))
+    result["utilization"] = np.round(np.minimum(result["rented_days"] / period_days, 1.0), 4)
+    result = result.sort_values(["utilization", "rented_days"], ascending=False).reset_index()
+    return result.to_dict("records")
+
+
+def revenue(date_from: date, date_to: date, period: str = "month") -> list[dict]:
+    """
+    Invoice revenue per day, week or month in [date_from, date_to].
+
+    Args:
+        date_from (date): First day.
+        date_to (date): Last day (inclusive).
+        period (str): "day", "week" or "month".
+
+    Returns:
+        list[dict]: period (start date, YYYY-MM for months), revenue, invoices
+        and average invoice amount, in time order.
+    """
+    data = frames()
+    start, end = _range(date_from, date_to)
+    invoices = data.frame("invoices", "saskaitos_data", "suma")
+    invoices = invoices[(invoices["saskaitos_data"] >= start) & (invoices["saskaitos_data"] <= end)]
+    code = {"day": "D", "week": "W", "month": "M"}[period]
+    keys = invoices["saskaitos_data"].dt.to_period(code)
+    grouped = invoices["suma"].groupby(keys).agg(["sum", "count", "mean"])
+    return [
+        {
+            "period": str(key) if period == "month" else key.start_time.date().isoformat(),
+            "revenue": round(float(row["sum"]), 2),
+            "invoices": int(row["count"]),
+            "average": round(float(row["mean"]), 2),
+        }
+        for key, row in grouped.iterrows()
+    ]
+
+
+def cohorts(months: int = 12) -> list[dict]:
+    """
+    Monthly client cohorts by the month of their first non-cancelled order.
+
+    Args:
+        months (int): Number of months after the first order to report.
+
+    Returns:
+        list[dict]: cohort (YYYY-MM), clients, revenue (sum of order prices)
+        and retention – share of the cohort ordering again in each following
+        month (index 0 is the cohort month, always 1.0).
+    """
+    data = frames()
+    orders = data.frame("orders", "kliento_id", "nuomos_data", "bendra_kaina", "uzsakymo_busena")
+    # Užsakymai be kliento (pvz., ištrintas klientas) į kohortas nepatenka
+    orders = orders[
+        (orders["uzsakymo_busena"] != CANCELLED_ORDER_STATUS)
+        & orders["nuomos_data"].notna() & orders["kliento_id"].notna()
+    ]
+    if orders.empty:
+        return []
+    month = orders["nuomos_data"].dt.year * 12 + orders["nuomos_data"].dt.month - 1
+    first = month.groupby(orders["kliento_id"]).transform("min")
+    offset = month - first
+
+    sizes = orders["kliento_id"].groupby(first).nunique()
+    spend = orders["bendra_kaina"].groupby(first).sum()
+    visits = pd.DataFrame({"cohort": first, "offset": offset, "client": orders["kliento_id"]})
+    active = (
+        visits[visits["offset"] < months]
+        .drop_duplicates()
+        .groupby(["cohort", "offset"]).size()
+        .unstack(fill_value=0)
+        .reindex(columns=range(months), fill_value=0)
+    )
+    retention = np.round(active.to_numpy() / sizes.reindex(active.index).to_numpy()[:, None], 4)
+    return [
+        {
+            "cohort": f"{cohort // 12:04d}-{cohort % 12 + 1:02d}",
+            "clients": int(sizes[cohort]),
+            "revenue": round(float(spend[cohort]), 2),
+            "retention": retention[i].tolist(),
+        }
+        for i, cohort in enumerate(active.index)
+    ]
+
+
+@task("analytics.snapshot")
+def snapshot_job(db: Session, payload: dict) -> None:
+    """Take a snapshot now (POST /analytics/snapshot). Payload: none."""
+    take_snapshot(db)
+
+
+if __name__ == "__main__":
+    from app.db.session import SessionLocal
+
+    logging.basicConfig(level=logging.INFO)
+    session = SessionLocal()
+    try:
+        print(take_snapshot(session))
+    finally:
+        session.close()
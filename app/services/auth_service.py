@@ -8,18 +8,34 @@ Author: Gabrielė Tamaševičiūtė <gabriele.tamaseviciute@stud.viko.lt>
 Description:
     Contains helper functions for verifying and hashing passwords using passlib,
     and creating access tokens using JOSE JWT for authentication purposes.
+    Token signing, key rotation and the verified-token cache live in
+    app/services/token_service.py.
+
+    The bcrypt cost factor comes from BCRYPT_ROUNDS (default 12). With
+    PASSWORD_REHASH_ON_LOGIN=1 hashes with another cost are upgraded (or
+    downgraded) on the next successful login, see `verify_and_update_password`.
+    Endpoints run these functions through app/services/password_hasher.py.
 """
+import os
 
 from passlib.context import CryptContext
-from jose import jwt
-from datetime import datetime, timedelta
+from datetime import timedelta
+
+from app.services import token_service
+
+SECRET_KEY = token_service.KEYS[token_service.ACTIVE_KID]
+ALGORITHM = token_service.ALGORITHM
+ACCESS_TOKEN_EXPIRE_MINUTES = token_service.ACCESS_TOKEN_EXPIRE_MINUTES
 
-SECRET_KEY = "super-secret-key"
-ALGORITHM = "HS256"
-ACCESS_TOKEN_EXPIRE_MINUTES = 60
+BCRYPT_ROUNDS = int(os.getenv("BCRYPT_ROUNDS", "12"))
+PASSWORD_REHASH_ON_LOGIN = os.getenv("PASSWORD_REHASH_ON_LOGIN", "0").lower() in ("1", "true", "yes")
 
 # Bcrypt kontekstas slaptažodžių maišymui
-pwd_context = CryptContext(schemes=["bcrypt"], deprecated="auto")
+_rounds_policy = {"bcrypt__rounds": BCRYPT_ROUNDS}
+if PASSWORD_REHASH_ON_LOGIN:
+    # Kitokio kaštų faktoriaus maišos laikomos pasenusiomis
+    _rounds_policy.update(bcrypt__min_rounds=BCRYPT_ROUNDS, bcrypt__max_rounds=BCRYPT_ROUNDS)
+pwd_context = CryptContext(schemes=["bcrypt"], deprecated="auto", **_rounds_policy)
 
 def verify_password(plain_password, hashed_password):
     """
@@ -36,6 +52,20 @@ def verify_password(plain_password, hashed_password):
     """
     return pwd_context.verify(plain_password, hashed_password)
 
+def verify_and_update_password(plain_password, hashed_password):
+    """
+    Verify a password and return a new hash if the stored one uses an outdated cost.
+
+    Args:
+        plain_password (str): The plain text password provided by the user.
+        hashed_password (str): The hashed password stored in the database.
+
+    Returns:
+        tuple[bool, str | None]: Whether the password matches, and the replacement
+        hash (only when PASSWORD_REHASH_ON_LOGIN is enabled and the cost differs).
+    """
+    return pwd_context.verify_and_update(plain_password, hashed_password)
+
 def get_password_hash(password):
     """
     Hash a plain password using bcrypt.
@@ -64,8 +94,20 @@ def create_access_token(data: dict, expires_delta: timedelta = None):
 
     Author: Gabrielė Tamaševičiūtė <gabriele.tamaseviciute@stud.viko.lt>
     """
-    to_encode = data.copy()
-    expire = datetime.utcnow() + (expires_delta or timedelta(minutes=ACCESS_TOKEN_EXPIRE_MINUTES))
-    to_encode.update({"exp": expire})
-    return jwt.encode(to_encode, SECRET_KEY, algorithm=ALGORITHM)
+    return token_service.create_access_token(data, expires_delta)
+
+def decode_access_token(token: str) -> dict:
+    """
+    Verify an access token and return its claims.
+
+    Args:
+        token (str): The encoded JWT token.
+
+    Returns:
+        dict: Token claims.
+
+    Raises:
+        TokenError: If the token is invalid or expired.
+    """
+    return token_service.decode_access_token(token)
 
@@ -0,0 +1,284 @@
+"""
+app/services/availability.py
+
+In-memory per-car day bitmaps of reservations.
+
+Description:
+    For a rolling horizon (AVAILABILITY_PAST_DAYS back and
+    AVAILABILITY_FUTURE_DAYS ahead of the build day, ~18 months by default)
+    every car that has reservations gets a NumPy uint8 row with one cell per
+    day holding the number of reservations covering that day (a cell > 0 is a
+    busy bit). Cancelled reservations (NON_BLOCKING_STATUSES) do not block a
+    car and stay out of the total. Next to the total there is one matrix per
+    reservation status, so utilization can count only selected statuses.
+
+    "Which cars are busy in [from, to)" is then `total[:, a:b].any(axis=1)`
+    and "busy days per car" is `count_nonzero(..., axis=1)` – vectorized over
+    the fleet, microseconds instead of a SQL overlap query per request.
+
+    The index is built from `rezervavimas` at application startup (or on
+    first use) and kept current by SQLAlchemy session events: reservations
+    inserted, updated or deleted in a committed session are applied after the
+    commit. Reservation changes made by other workers or by set-based UPDATEs
+    arrive through the change log (app/services/change_log.py) and drop the
+    index, which is rebuilt on the next use. Requests outside the horizon return None and callers fall back to SQL.
+"""
+import os
+import threading
+from datetime import date, timedelta
+
+import numpy as np
+from sqlalchemy import event
+from sqlalchemy.orm import Session
+
+from app.models.reservation import NON_BLOCKING_STATUSES, Reservation
+from app.services import change_log
+
+AVAILABILITY_PAST_DAYS = int(os.getenv("AVAILABILITY_PAST_DAYS", "183"))
+AVAILABILITY_FUTURE_DAYS = int(os.getenv("AVAILABILITY_FUTURE_DAYS", "365"))
+
+# Kiek dienų po sukūrimo horizontas dar laikomas tinkamu (po to perstatomas)
+REBUILD_AFTER_DAYS = 30
+
+_CHANGES_KEY = "availability_changes"
+
+
+class AvailabilityIndex:
+    """
+    Reservation day bitmaps of all cars over a fixed horizon.
+
+    Args:
+        past_days (int): Days before the build day kept in the horizon.
+        future_days (int): Days after the build day kept in the horizon.
+    """
+
+    def __init__(self, past_days: int, future_days: int):
+        self.past_days = past_days
+        self.future_days = future_days
+        self.days = past_days + future_days
+        self._lock = threading.RLock()
+        self._reset(None)
+
+    def _reset(self, start):
+        self.start = start
+        self._rows: dict[int, int] = {}
+        self._ids = np.zeros(0, dtype=np.int64)
+        self._total = np.zeros((0, self.days), dtype=np.uint8)
+        self._layers: dict[str, np.ndarray] = {}
+        self._reservations: dict[int, tuple] = {}
+
+    def _row(self, car_id: int) -> int:
+        """Return the matrix row of a car, growing the matrices when needed."""
+        row = self._rows.get(car_id)
+        if row is not None:
+            return row
+        row = len(self._rows)
+        if row >= len(self._ids):
+            capacity = max(64, 2 * len(self._ids))
+            self._ids = np.resize(self._ids, capacity)
+            self._total = _grow(self._total, capacity)
+            for status, layer in self._layers.items():
+                self._layers[status] = _grow(layer, capacity)
+        self._rows[car_id] = row
+        self._ids[row] = car_id
+        return row
+
+    def _offsets(self, date_from: date, date_to: date) -> tuple[int, int]:
+        a = max((date_from - self.start).days, 0)
+        b = min((date_to - self.start).days, self.days)
+        return a, b
+
+    def _mark(self, car_id: int, start: date, end: date, status: str, add: bool) -> None:
+        a, b = self._offsets(start, end)
+        if a >= b:
+            return
+        row = self._row(car_id)
+        layer = self._layers.get(status)
+        if layer is None:
+            layer = self._layers[status] = np.zeros_like(self._total)
+        matrices = (layer,) if status in NON_BLOCKING_STATUSES else (self._total, layer)
+        for matrix in matrices:
+            if add:
+                matrix[row, a:b] += 1
+            else:
+                matrix[row, a:b] -= 1
+
+    def build(self, db: Session) -> None:
+        """
+        Load the reservations overlapping the horizon from the database.
+
+        Args:
+            db (Session): SQLAlchemy session.
+        """
+        start = date.today() - timedelta(days=self.past_days)
+        end = start + timedelta(days=self.days)
+        rows = (
+            db.query(
+                Reservation.rezervacijos_id, Reservation.automobilio_id,
+                Reservation.rezervacijos_pradzia, Reservation.rezervacijos_pabaiga, Reservation.busena,
+            )
+            .filter(Reservation.rezervacijos_pradzia < end, Reservation.rezervacijos_pabaiga > start)
+            .all()
+        )
+        self.load(start, rows)
+
+    def load(self, start: date, rows) -> None:
+        """
+        Replace the index contents.
+
+        Args:
+            start (date): First day of the horizon.
+            rows (Iterable[tuple]): (rezervacijos_id, automobilio_id, start, end, busena).
+        """
+        with self._lock:
+            self._reset(start)
+            for rezervacijos_id, car_id, res_start, res_end, status in rows:
+                self._apply(rezervacijos_id, car_id, res_start, res_end, status)
+
+    def _stale(self) -> bool:
+        return self.start is None or (date.today() - self.start).days > self.past_days + REBUILD_AFTER_DAYS
+
+    def ensure(self, db: Session) -> None:
+        """Build the index if it was never built or its horizon became stale."""
+        if self._stale():
+            with self._lock:
+                if self._stale():
+                    self.build(db)
+
+    def _apply(self, rezervacijos_id, car_id, start, end, status) -> None:
+        self._remove(rezervacijos_id)
+        if car_id is None or start is None or end is None:
+            return
+        self._reservations[rezervacijos_id] = (car_id, start, end, status)
+        self._mark(car_id, start, end, status, add=True)
+
+    def _remove(self, rezervacijos_id) -> None:
+        old = self._reservations.pop(rezervacijos_id, None)
+        if old is not None:
+            self._mark(*old, add=False)
+
+    def apply(self, rezervacijos_id: int, car_id: int, start: date, end: date, status: str) -> None:
+        """Insert or replace one reservation."""
+        with self._lock:
+            if self.start is not None:
+                self._apply(rezervacijos_id, car_id, start, end, status)
+
+    def remove(self, rezervacijos_id: int) -> None:
+        """Remove one reservation."""
+        with self._lock:
+            if self.start is not None:
+                self._remove(rezervacijos_id)
+
+    def invalidate(self) -> None:
+        """Drop the index; the next `ensure` rebuilds it."""
+        with self._lock:
+            self._reset(None)
+
+    def covers(self, date_from: date, date_to: date) -> bool:
+        """Whether [date_from, date_to) lies inside the built horizon."""
+        return (
+            self.start is not None
+            and date_from >= self.start
+            and (date_to - self.start).days <= self.days
+        )
+
+    def busy_car_ids(self, db: Session, date_from: date, date_to: date):
+        """
+        Cars with at least one reservation day in [date_from, date_to).
+
+        Args:
+            db (Session): Session used if the index has to be built.
+            date_from (date): Start (inclusive).
+            date_to (date): End (exclusive).
+
+        Returns:
+            list[int] | None: Car IDs, or None if the range is outside the horizon.
+        """
+        self.ensure(db)
+        with self._lock:
+            if not self.covers(date_from, date_to):
+                return None
+            a, b = self._offsets(date_from, date_to)
+            count = len(self._rows)
+            mask = self._total[:count, a:b].any(axis=1)
+            return self._ids[:count][mask].tolist()
+
+    def used_days(self, db: Session, date_from: date, date_to: date, statuses=None):
+        """
+        Number of reserved days per car in [date_from, date_to).
+
+        Overlapping reservations of one car count each day once.
+
+        Args:
+            db (Session): Session used if the index has to be built.
+            date_from (date): Start (inclusive).
+            date_to (date): End (exclusive).
+            statuses (list[str], optional): Count only reservations with these statuses.
+
+        Returns:
+            dict[int, int] | None: Busy days by car ID (cars without any are
+            omitted), or None if the range is outside the horizon.
+        """
+        self.ensure(db)
+        with self._lock:
+            if not self.covers(date_from, date_to):
+                return None
+            a, b = self._offsets(date_from, date_to)
+            count = len(self._rows)
+            if statuses:
+                busy = np.zeros((count, b - a), dtype=bool)
+                for status in statuses:
+                    layer = self._layers.get(status)
+                    if layer is not None:
+                        busy |= layer[:count, a:b] > 0
+            else:
+                busy = self._total[:count, a:b]
+            days = np.count_nonzero(busy, axis=1)
+            ids = self._ids[:count]
+            nonzero = days > 0
+            return dict(zip(ids[nonzero].tolist(), days[nonzero].tolist()))
+
+
+def _grow(matrix: np.ndarray, capacity: int) -> np.ndarray:
+    """Copy a matrix into a new one with `capacity` rows."""
+    grown = np.zeros((capacity, matrix.shape[1]), dtype=matrix.dtype)
+    grown[:len(matrix)] = matrix
+    return grown
+
+
+availability_index = AvailabilityIndex(AVAILABILITY_PAST_DAYS, AVAILABILITY_FUTURE_DAYS)
+
+
+@event.listens_for(Session, "after_flush")
+def _collect_reservation_changes(session, flush_context):
+    """Remember flushed reservation changes until the transaction commits."""
+    changes = session.info.setdefault(_CHANGES_KEY, [])
+    for obj in session.new | session.dirty:
+        if isinstance(obj, Reservation):
+            changes.append((obj.rezervacijos_id, obj.automobilio_id, obj.rezervacijos_pradzia,
+                            obj.rezervacijos_pabaiga, obj.busena))
+    for obj in session.deleted:
+        if isinstance(obj, Reservation):
+            changes.append((obj.rezervacijos_id, None, None, None, None))
+
+
+@event.listens_for(Session, "after_commit")
+def _apply_reservation_changes(session):
+    """Apply committed reservation changes to the index."""
+    for change in session.info.pop(_CHANGES_KEY, ()):
+        availability_index.apply(*change)
+
+
+@event.listens_for(Session, "after_rollback")
+def _discard_reservation_changes(session):
+    session.info.pop(_CHANGES_KEY, None)
+
+
+def _invalidate_on_external_changes(changes) -> None:
+    """Drop the index after changes it did not see: other processes or set-based UPDATEs."""
+    if any(change.origin != change_log.ORIGIN or change.entity_id is None for change in changes):
+        availability_index.invalidate()
+
+
+# Tokius pakeitimus indeksas pats praleidžia – perstatome kitą kartą jį naudojant
+change_log.on_change("reservations", _invalidate_on_external_changes)
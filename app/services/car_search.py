@@ -0,0 +1,216 @@
+"""
+app/services/car_search.py
+
+In-memory full-text index over cars with prefix, typo-tolerant matching and facets.
+
+Description:
+    `ILIKE '%x%'` filters cannot use a B-tree index and scan the whole
+    Automobiliai table. The cars are few (thousands) and change rarely, so the
+    text fields are kept in an inverted index in the process:
+
+      - token -> car ids, over marke, modelis, spalva, kuro_tipas,
+        kebulo_tipas, pavarų_deze, numeris and metai (lowercased, accents removed);
+      - a sorted vocabulary for prefix matching ("toy" -> "toyota");
+      - trigram -> tokens for typo tolerance: a term with no prefix match is
+        matched against tokens sharing its trigrams within a small edit distance
+        ("tayota" -> "toyota").
+
+    Every term of the query must match (AND). Results are ranked by
+    exact > prefix > fuzzy matches and come with facet counts (marke,
+    kuro_tipas, sedimos_vietos, metai) in the same call.
+
+    The index is rebuilt lazily when the "cars" version in
+    app/services/resource_versions.py changes, i.e. after any successful car write.
+"""
+import threading
+import unicodedata
+from bisect import bisect_left
+from collections import Counter, defaultdict
+
+from sqlalchemy.orm import Session
+
+from app.models.car import Car
+from app.services import resource_versions
+
+TEXT_FIELDS = ("marke", "modelis", "spalva", "kuro_tipas", "kebulo_tipas", "pavarų_deze", "numeris", "metai")
+FACET_FIELDS = ("marke", "kuro_tipas", "sedimos_vietos", "metai")
+
+EXACT, PREFIX, FUZZY = 3, 2, 1
+
+
+def normalize(text: str) -> str:
+    """Lowercase and strip accents ("Ž" -> "z")."""
+    decomposed = unicodedata.normalize("NFKD", str(text).lower())
+    return "".join(ch for ch in decomposed if not unicodedata.combining(ch))
+
+
+def tokenize(text: str) -> list[str]:
+    """Split normalized text into alphanumeric tokens."""
+    token, tokens = [], []
+    for ch in normalize(text):
+        if ch.isalnum():
+            token.append(ch)
+        elif token:
+            tokens.append("".join(token))
+            token = []
+    if token:
+        tokens.append("".join(token))
+    return tokens
+
+
+def trigrams(token: str) -> set[str]:
+    """Trigrams of a token padded with spaces, so short tokens get some too."""
+    padded = f"  {token} "
+    return {padded[i:i + 3] for i in range(len(padded) - 2)}
+
+
+def edit_distance(a: str, b: str, limit: int) -> int:
+    """
+    Levenshtein distance with adjacent transpositions, cut off above `limit`.
+
+    Returns:
+        int: The distance, or limit + 1 if it is larger than `limit`.
+    """
+    if abs(len(a) - len(b)) > limit:
+        return limit + 1
+    prev2, prev = None, list(range(len(b) + 1))
+    for i, ca in enumerate(a, 1):
+        row = [i] + [0] * len(b)
+        for j, cb in enumerate(b, 1):
+            row[j] = min(prev[j] + 1, row[j - 1] + 1, prev[j - 1] + (ca != cb))
+            if i > 1 and j > 1 and ca == b[j - 2] and a[i - 2] == cb:
+                row[j] = min(row[j], prev2[j - 2] + 1)
+        if min(row) > limit:
+            return limit + 1
+        prev2, prev = prev, row
+    return prev[-1]
+
+
+class CarSearchIndex:
+    """
+    Inverted index of car text fields with facet values.
+
+    Attributes:
+        version (str | None): resource_versions token the index was built from.
+    """
+
+    def __init__(self):
+        self.version = None
+        self._postings: dict[str, set[int]] = {}
+        self._vocabulary: list[str] = []
+        self._trigrams: dict[str, set[str]] = {}
+        self._facets: dict[int, dict] = {}
+        self._lock = threading.Lock()
+
+    def build(self, rows) -> None:
+        """
+        Replace the index contents.
+
+        Args:
+            rows (Iterable[dict]): Cars with automobilio_id, TEXT_FIELDS and FACET_FIELDS.
+        """
+        postings, grams, facets = defaultdict(set), defaultdict(set), {}
+        for row in rows:
+            car_id = row["automobilio_id"]
+            for field in TEXT_FIELDS:
+                for token in tokenize(row[field] or ""):
+                    postings[token].add(car_id)
+            facets[car_id] = {field: row[field] for field in FACET_FIELDS}
+        for token in postings:
+            for gram in trigrams(token):
+                grams[gram].add(token)
+        self._postings = dict(postings)
+        self._vocabulary = sorted(postings)
+        self._trigrams = dict(grams)
+        self._facets = facets
+
+    def refresh(self, db: Session) -> None:
+        """Rebuild the index from the database if cars changed since the last build."""
+        version, _ = resource_versions.snapshot(("cars",))
+        if version == self.version:
+            return
+        with self._lock:
+            if version == self.version:
+                return
+            columns = ("automobilio_id",) + tuple(dict.fromkeys(TEXT_FIELDS + FACET_FIELDS))
+            rows = db.query(*(getattr(Car, name) for name in columns)).all()
+            self.build(dict(zip(columns, row)) for row in rows)
+            self.version = version
+
+    def invalidate(self) -> None:
+        """Force a rebuild on the next search."""
+        self.version = None
+
+    def _match_term(self, term: str) -> dict[int, int]:
+        """Return {car_id: score} for one query term."""
+        scores: dict[int, int] = {}
+        start = bisect_left(self._vocabulary, term)
+        for token in self._vocabulary[start:]:
+            if not token.startswith(term):
+                break
+            score = EXACT if token == term else PREFIX
+            for car_id in self._postings[token]:
+                scores[car_id] = max(scores.get(car_id, 0), score)
+        if scores or len(term) < 3:
+            return scores
+
+        # Nėra nė vieno prefikso – ieškome panašių žodžių (rašybos klaidos)
+        limit = 1 if len(term) <= 5 else 2
+        candidates = {token for gram in trigrams(term) for token in self._trigrams.get(gram, ())}
+        for token in candidates:
+            # Lyginame ir su žodžio pradžia, kad "tayo" rastų "toyota"
+            lengths = range(max(1, len(term) - limit), min(len(token), len(term) + limit) + 1)
+            if any(edit_distance(term, token[:n], limit) <= limit for n in lengths):
+                for car_id in self._postings[token]:
+                    scores.setdefault(car_id, FUZZY)
+        return scores
+
+    def search(self, q: str = "", filters: dict = None, limit: int = 50):
+        """
+        Find cars matching all query terms and facet filters.
+
+        Args:
+            q (str): Free text; empty matches every car.
+            filters (dict, optional): Exact facet values, e.g. {"kuro_tipas": "Dyzelinas"}.
+            limit (int): Maximum number of ids returned.
+
+        Returns:
+            tuple[list[int], int, dict]: Ranked car ids, total number of matches
+            and facet counts {field: {value: count}} over all matches.
+        """
+        with self._lock:
+            return self._search(q, filters, limit)
+
+    def _search(self, q: str, filters: dict, limit: int):
+        scores = None
+        for term in dict.fromkeys(tokenize(q or "")):
+            matched = self._match_term(term)
+            if scores is None:
+                scores = matched
+            else:
+                scores = {car_id: scores[car_id] + s for car_id, s in matched.items() if car_id in scores}
+            if not scores:
+                break
+        if scores is None:
+            scores = dict.fromkeys(self._facets, 0)
+
+        wanted = {field: normalize(value) for field, value in (filters or {}).items() if value is not None}
+        if wanted:
+            scores = {
+                car_id: s for car_id, s in scores.items()
+                if all(normalize(self._facets[car_id][field]) == value for field, value in wanted.items())
+            }
+
+        facets = {field: Counter() for field in FACET_FIELDS}
+        for car_id in scores:
+            for field, value in self._facets[car_id].items():
+                facets[field][str(value)] += 1
+        ranked = sorted(scores, key=lambda car_id: (-scores[car_id], car_id))
+        return (
+            ranked[:limit],
+            len(scores),
+            {field: dict(counts.most_common()) for field, counts in facets.items()},
+        )
+
+
+car_index = CarSearchIndex()
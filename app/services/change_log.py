@@ -0,0 +1,300 @@
+"""
+app/services/change_log.py
+
+Cross-process cache invalidation through the 'pakeitimu_zurnalas' change log.
+
+Description:
+    In-process caches (resource versions behind ETags, the car search index,
+    reservation bitmaps) only see writes made by their own worker. To keep
+    several uvicorn workers coherent:
+
+      1. Every ORM flush that inserts, updates or deletes a tracked model
+         (cars, reservations, orders, clients, invoices, employees, support)
+         writes one ChangeLog row per entity in the same transaction, so the
+         log entry exists exactly when the write is committed. This covers the
+         repository write functions and the endpoints writing directly.
+      2. After the commit the changes are dispatched to local handlers and
+         handed to the notifier.
+      3. A background task in every worker polls the notifier
+         (CHANGE_LOG_POLL_SECONDS) and dispatches changes made by other
+         processes to the same handlers.
+
+    The default `DatabaseChangeNotifier` tails the table by increasing id
+    (one indexed range query per poll) and prunes entries older than
+    CHANGE_LOG_RETENTION_HOURS. Ids are assigned at flush time, so a long
+    transaction can commit its entry after a later id was already read: ids
+    skipped by a poll are re-queried for CHANGE_LOG_GAP_SECONDS (rolled back
+    transactions leave gaps that never fill). A pub/sub backend implements `ChangeNotifier`
+    (publish after commit, poll received messages) and is installed with
+    `set_notifier`.
+
+    Bulk `Query.update()`/`delete()` statements bypass the ORM flush; their
+    callers log the whole batch with one `record` call.
+
+Usage:
+    from app.services import change_log
+
+    change_log.on_change("reservations", lambda changes: index.invalidate(), remote_only=True)
+"""
+import asyncio
+import logging
+import os
+import socket
+import time
+import uuid
+from collections import namedtuple
+from datetime import datetime, timedelta
+
+from fastapi.concurrency import run_in_threadpool
+from sqlalchemy import delete, event, func, select
+from sqlalchemy.orm import Session
+
+from app.models import Car, Client, ClientSupport, Employee, Invoice, Location, Order, Reservation
+from app.models.change_log import ChangeLog
+from app.services import resource_versions
+
+logger = logging.getLogger(__name__)
+
+CHANGE_LOG_POLL_SECONDS = float(os.getenv("CHANGE_LOG_POLL_SECONDS", "1"))
+CHANGE_LOG_RETENTION_HOURS = int(os.getenv("CHANGE_LOG_RETENTION_HOURS", "24"))
+# Kiek laiko laukiama praleisto id (ilgos transakcijos įrašo)
+CHANGE_LOG_GAP_SECONDS = float(os.getenv("CHANGE_LOG_GAP_SECONDS", "120"))
+
+# Šio proceso žymė – savų įrašų iš žurnalo nebeapdorojame
+ORIGIN = f"{socket.gethostname()}:{os.getpid()}:{uuid.uuid4().hex[:6]}"[:64]
+
+# Modelis -> resursas (tie patys pavadinimai kaip resource_versions / ETag)
+TRACKED_MODELS = {
+    Car: "cars",
+    Location: "cars",
+    Reservation: "reservations",
+    Order: "orders",
+    Client: "clients",
+    Invoice: "invoices",
+    Employee: "employees",
+    ClientSupport: "support",
+}
+
+Change = namedtuple("Change", "resource entity_id action origin")
+
+_CHANGES_KEY = "change_log_pending"
+
+
+class ChangeNotifier:
+    """Interface of a change transport between processes."""
+
+    def publish(self, changes: list[Change]) -> None:
+        """Send changes committed by this process (called after commit)."""
+        raise NotImplementedError
+
+    def poll(self) -> list[Change]:
+        """Return changes made by other processes since the previous call."""
+        raise NotImplementedError
+
+
+class DatabaseChangeNotifier(ChangeNotifier):
+    """
+    Notifier reading the 'pakeitimu_zurnalas' table.
+
+    The entries are written in the committing transaction, so `publish` has
+    nothing to do; `poll` reads entries after the last seen id plus the
+    still missing ids below it.
+
+    Args:
+        session_factory (Callable[[], Session]): Creates short-lived sessions for polling.
+        batch (int): Maximum entries read per poll.
+    """
+
+    def __init__(self, session_factory, batch: int = 1000):
+        self.session_factory = session_factory
+        self.batch = batch
+        self.last_id = None
+        self._gaps: dict[int, float] = {}
+        self._polls = 0
+
+    def publish(self, changes: list[Change]) -> None:
+        pass
+
+    def poll(self) -> list[Change]:
+        db = self.session_factory()
+        try:
+            if self.last_id is None:
+                # Pirmą kartą – tik naujesni nei dabartiniai įrašai
+                self.last_id = db.execute(select(func.max(ChangeLog.pakeitimo_id))).scalar() or 0
+                return []
+            columns = (ChangeLog.pakeitimo_id, ChangeLog.resursas, ChangeLog.iraso_id,
+                       ChangeLog.veiksmas, ChangeLog.saltinis)
+            late = []
+            if self._gaps:
+                late = db.execute(
+                    select(*columns)
+                    .where(ChangeLog.pakeitimo_id.in_(list(self._gaps)))
+                    .order_by(ChangeLog.pakeitimo_id)
+                ).all()
+            rows = db.execute(
+                select(*columns)
+                .where(ChangeLog.pakeitimo_id > self.last_id)
+                .order_by(ChangeLog.pakeitimo_id)
+                .limit(self.batch)
+            ).all()
+            self._track_gaps(late, rows)
+            rows = late + rows
+            self._polls += 1
+            if self._polls % 600 == 0:
+                self.prune(db)
+            return [Change(resource, entity_id, action, origin)
+                    for _, resource, entity_id, action, origin in rows if origin != ORIGIN]
+        finally:
+            db.close()
+
+    def _track_gaps(self, late: list, rows: list) -> None:
+        """Forget delivered or expired gaps and remember ids skipped by `rows`."""
+        now = time.monotonic()
+        for row in late:
+            self._gaps.pop(row[0], None)
+        for pakeitimo_id in [i for i, deadline in self._gaps.items() if deadline <= now]:
+            del self._gaps[pakeitimo_id]
+        deadline = now + CHANGE_LOG_GAP_SECONDS
+        expected = self.last_id + 1
+        for row in rows:
+            # Didelį šuolį (pvz., išvalytą žurnalą) sekame ne daugiau nei `batch` id
+            for missing in range(max(expected, row[0] - self.batch), row[0]):
+                self._gaps[missing] = deadline
+            expected = row[0] + 1
+        if rows:
+            self.last_id = rows[-1][0]
+
+    def prune(self, db: Session) -> None:
+        """Delete entries older than CHANGE_LOG_RETENTION_HOURS."""
+        cutoff = datetime.utcnow() - timedelta(hours=CHANGE_LOG_RETENTION_HOURS)
+        db.execute(delete(ChangeLog).where(ChangeLog.sukurta < cutoff))
+        db.commit()
+
+
+_notifier: ChangeNotifier = None
+_handlers: dict[str, list[tuple]] = {}
+
+
+def set_notifier(notifier: ChangeNotifier) -> None:
+    """Install the notifier used for publishing and polling."""
+    global _notifier
+    _notifier = notifier
+
+
+def get_notifier() -> ChangeNotifier:
+    """Return the installed notifier, the database one by default."""
+    global _notifier
+    if _notifier is None:
+        from app.db.session import SessionLocal
+        _notifier = DatabaseChangeNotifier(SessionLocal)
+    return _notifier
+
+
+def on_change(resource: str, handler, remote_only: bool = False) -> None:
+    """
+    Register a handler for changes of a resource.
+
+    Args:
+        resource (str): Resource name, or "*" for all resources.
+        handler (Callable[[list[Change]], None]): Called with the changes of that resource.
+        remote_only (bool): Call only for changes made by other processes
+            (for caches that already follow local writes themselves).
+    """
+    _handlers.setdefault(resource, []).append((handler, remote_only))
+
+
+def dispatch(changes: list[Change], remote: bool) -> None:
+    """
+    Call the registered handlers grouped by resource.
+
+    Args:
+        changes (list[Change]): Changes to deliver.
+        remote (bool): Whether they come from another process.
+    """
+    by_resource: dict[str, list[Change]] = {}
+    for change in changes:
+        by_resource.setdefault(change.resource, []).append(change)
+    for resource, items in by_resource.items():
+        for handler, remote_only in _handlers.get(resource, []) + _handlers.get("*", []):
+            if remote_only and not remote:
+                continue
+            try:
+                handler(items)
+            except Exception:
+                logger.exception("Change handler failed for %s", resource)
+
+
+async def poll_forever(interval: float = None) -> None:
+    """Background task: deliver changes of other processes until cancelled."""
+    interval = CHANGE_LOG_POLL_SECONDS if interval is None else interval
+    while True:
+        try:
+            changes = await run_in_threadpool(get_notifier().poll)
+            if changes:
+                dispatch(changes, remote=True)
+        except asyncio.CancelledError:
+            raise
+        except Exception:
+            logger.exception("Change log poll failed")
+        await asyncio.sleep(interval)
+
+
+@event.listens_for(Session, "after_flush")
+def _log_changes(session, flush_context):
+    """Write log entries for flushed tracked entities in the same transaction."""
+    entries = {}
+    for action, objects in (("insert", session.new), ("update", session.dirty), ("delete", session.deleted)):
+        for obj in objects:
+            resource = TRACKED_MODELS.get(type(obj))
+            if resource is None or (action == "update" and not session.is_modified(obj)):
+                continue
+            entity_id = obj.__mapper__.primary_key_from_instance(obj)[0]
+            entries[(resource, entity_id)] = action
+    if not entries:
+        return
+    now = datetime.utcnow()
+    session.connection().execute(ChangeLog.__table__.insert(), [
+        {"resursas": resource, "iraso_id": entity_id, "veiksmas": action, "saltinis": ORIGIN, "sukurta": now}
+        for (resource, entity_id), action in entries.items()
+    ])
+    session.info.setdefault(_CHANGES_KEY, []).extend(
+        Change(resource, entity_id, action, ORIGIN) for (resource, entity_id), action in entries.items()
+    )
+
+
+def record(db: Session, resource: str, action: str = "update", entity_id: int = None) -> None:
+    """
+    Log a change not seen by the ORM flush (e.g. a set-based UPDATE).
+
+    One entry stands for the whole statement; it is committed with the
+    session's transaction and dispatched after the commit like flushed changes.
+
+    Args:
+        db (Session): Session running the statement.
+        resource (str): Changed resource.
+        action (str): "insert", "update" or "delete".
+        entity_id (int, optional): Changed row, None for many rows.
+    """
+    db.connection().execute(ChangeLog.__table__.insert(), {
+        "resursas": resource, "iraso_id": entity_id, "veiksmas": action,
+        "saltinis": ORIGIN, "sukurta": datetime.utcnow(),
+    })
+    db.info.setdefault(_CHANGES_KEY, []).append(Change(resource, entity_id, action, ORIGIN))
+
+
+@event.listens_for(Session, "after_commit")
+def _publish_changes(session):
+    """Deliver committed changes locally and to the notifier."""
+    changes = session.info.pop(_CHANGES_KEY, None)
+    if changes:
+        dispatch(changes, remote=False)
+        get_notifier().publish(changes)
+
+
+@event.listens_for(Session, "after_rollback")
+def _discard_changes(session):
+    session.info.pop(_CHANGES_KEY, None)
+
+
+# Visi resursai: ETag versijos (automobilių paieškos indeksas seka "cars" versiją)
+on_change("*", lambda changes: resource_versions.bump(changes[0].resource))
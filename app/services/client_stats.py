@@ -0,0 +1,259 @@
+"""
+app/services/client_stats.py
+
+Incremental per-client order statistics and bonus points.
+
+Description:
+    'kliento_statistika' holds each client's order count, completed orders,
+    spend (sum of invoices), first/latest order and bonus points: earned from
+    the spend (one point per BONUS_EUR_PER_POINT EUR) and redeemed
+    ('Bonusu_Naudojimas'). The balance, earned - redeemed plus the manual
+    `Client.bonus_korekcija` (set through the client API) and never below
+    zero, is written back to `Client.bonus_taskai`, which the API only reads.
+
+    The LOYALTY quote discount is granted to clients with at least
+    LOYALTY_MIN_COMPLETED completed orders.
+
+    Writes mark the affected clients and a background job
+    ("clients.refresh_stats") recomputes only them:
+
+      - ORM writes of orders, invoices, bonus redemptions and manual
+        adjustments are collected by an after_flush hook, which adds the job
+        in the same transaction (old and new client of a changed order are
+        both refreshed);
+      - set-based writes (bulk status updates, month-end invoicing) call
+        `enqueue_refresh` with the IDs they touched.
+
+    The job recomputes CLIENT_STATS_BATCH clients per statement: the rows are
+    replaced with one INSERT ... SELECT aggregating orders joined with their
+    invoices (redeemed points come from a correlated subquery), and one
+    UPDATE copies the balances to `Client.bonus_taskai`.
+    `python -m app.services.client_stats` recomputes every client (backfill).
+"""
+import logging
+import os
+from datetime import datetime
+
+from sqlalchemy import DateTime, Integer, case, cast, delete, distinct, event, func, insert, inspect, literal, select, update
+from sqlalchemy.orm import Session
+
+from app.models import BonusUsage, Client, ClientStats, Invoice, Order
+from app.services import change_log, job_queue
+from app.services.job_queue import task
+
+logger = logging.getLogger(__name__)
+
+CLIENT_STATS_BATCH = int(os.getenv("CLIENT_STATS_BATCH", "500"))
+BONUS_EUR_PER_POINT = float(os.getenv("BONUS_EUR_PER_POINT", "10"))
+# LOYALTY nuolaidos kodas galioja nuo tiek užbaigtų užsakymų
+LOYALTY_MIN_COMPLETED = int(os.getenv("LOYALTY_MIN_COMPLETED", "3"))
+
+CANCELLED_ORDER_STATUS = "atšaukta"
+COMPLETED_ORDER_STATUS = "užbaigta"
+REFRESH_JOB = "clients.refresh_stats"
+
+# Stulpeliai, kurių pakeitimas keičia statistiką
+ORDER_FIELDS = ("kliento_id", "bendra_kaina", "uzsakymo_busena", "nuomos_data")
+INVOICE_FIELDS = ("uzsakymo_id", "suma")
+BONUS_FIELDS = ("kliento_id", "panaudoti_taskai")
+CLIENT_FIELDS = ("bonus_korekcija",)
+
+
+def enqueue_refresh(db: Session, clients=(), orders=(), invoices=(), all_clients: bool = False) -> None:
+    """
+    Queue recomputation of the clients of the given rows (the caller commits).
+
+    The IDs are split into jobs of at most CLIENT_STATS_BATCH IDs, so a
+    month-end run over many orders does not exceed the TEXT payload column.
+
+    Args:
+        db (Session): Session of the write.
+        clients (Iterable[int]): Client IDs.
+        orders (Iterable[int]): Order IDs (their clients are refreshed).
+        invoices (Iterable[int]): Invoice IDs (the clients of their orders are refreshed).
+        all_clients (bool): Recompute every client (set-based write without known IDs).
+    """
+    if all_clients:
+        job_queue.enqueue_many(db, REFRESH_JOB, [{"all": True}])
+        return
+    payloads = []
+    for key, ids in (("clients", clients), ("orders", orders), ("invoices", invoices)):
+        ids = sorted(set(ids))
+        payloads += [{key: ids[start:start + CLIENT_STATS_BATCH]} for start in range(0, len(ids), CLIENT_STATS_BATCH)]
+    job_queue.enqueue_many(db, REFRESH_JOB, payloads)
+
+
+def _affected(obj, fields: tuple, key: str, is_new: bool) -> set:
+    """Current and previous values of `key` of a flushed object, if a statistics field changed."""
+    attrs = inspect(obj).attrs
+    if not is_new and not any(attrs[name].history.has_changes() for name in fields):
+        return set()
+    values = {getattr(obj, key), *attrs[key].history.deleted}
+    values.discard(None)
+    return values
+
+
+@event.listens_for(Session, "after_flush")
+def _collect_changes(session, flush_context):
+    """Queue a refresh for the clients of flushed orders, invoices, bonus redemptions and adjustments."""
+    clients, orders = set(), set()
+    for objects, is_new in ((session.new, True), (session.dirty, False), (session.deleted, True)):
+        for obj in objects:
+            if isinstance(obj, Order):
+                clients |= _affected(obj, ORDER_FIELDS, "kliento_id", is_new)
+            elif isinstance(obj, Invoice):
+                orders |= _affected(obj, INVOICE_FIELDS, "uzsakymo_id", is_new)
+            elif isinstance(obj, BonusUsage):
+                clients |= _affected(obj, BONUS_FIELDS, "kliento_id", is_new)
+            elif isinstance(obj, Client) and obj not in session.deleted:
+                clients |= _affected(obj, CLIENT_FIELDS, "kliento_id", is_new)
+    if clients or orders:
+        enqueue_refresh(session, clients=clients, orders=orders)
+
+
+def _client_ids(db: Session, payload: dict) -> list[int]:
+    """Resolve the clients a refresh job covers."""
+    if payload.get("all"):
+        return [row[0] for row in db.execute(select(Client.kliento_id).order_by(Client.kliento_id))]
+    ids = set(payload.get("clients", ()))
+    orders = list(payload.get("orders", ()))
+    invoice_ids = payload.get("invoices", ())
+    for start in range(0, len(invoice_ids), CLIENT_STATS_BATCH):
+        chunk = invoice_ids[start:start + CLIENT_STATS_BATCH]
+        orders += db.execute(select(Invoice.uzsakymo_id).where(Invoice.saskaitos_id.in_(chunk))).scalars().all()
+    for start in range(0, len(orders), CLIENT_STATS_BATCH):
+        chunk = orders[start:start + CLIENT_STATS_BATCH]
+        ids.update(db.execute(select(Order.kliento_id).where(Order.uzsakymo_id.in_(chunk))).scalars().all())
+    ids.discard(None)
+    return sorted(ids)
+
+
+def _balance(earned, redeemed, adjustment):
+    """Points balance expression: earned - redeemed + adjustment, not below zero."""
+    total = earned - redeemed + adjustment
+    return case((total < 0, 0), else_=total)
+
+
+def refresh(db: Session, client_ids: list[int], now: datetime = None) -> int:
+    """
+    Recompute the statistics and bonus point balances of clients, batch by batch.
+
+    Args:
+        db (Session): SQLAlchemy session (the caller commits).
+        client_ids (list[int]): Clients to recompute.
+        now (datetime, optional): Recomputation time (for tests).
+
+    Returns:
+        int: Number of recomputed clients.
+    """
+    now = now or datetime.utcnow()
+    active = Order.uzsakymo_busena != CANCELLED_ORDER_STATUS
+    completed = case((Order.uzsakymo_busena == COMPLETED_ORDER_STATUS, Order.uzsakymo_id))
+    spend = func.coalesce(func.sum(Invoice.suma), 0)
+    redeemed = (
+        select(func.coalesce(func.sum(BonusUsage.panaudoti_taskai), 0))
+        .where(BonusUsage.kliento_id == Client.kliento_id)
+        .scalar_subquery()
+    )
+    balance = (
+        select(_balance(ClientStats.uzdirbti_taskai, ClientStats.panaudoti_taskai, Client.bonus_korekcija))
+        .where(ClientStats.kliento_id == Client.kliento_id)
+        .scalar_subquery()
+    )
+    done = 0
+    for start in range(0, len(client_ids), CLIENT_STATS_BATCH):
+        chunk = client_ids[start:start + CLIENT_STATS_BATCH]
+        aggregated = (
+            select(
+                Client.kliento_id,
+                func.count(distinct(Order.uzsakymo_id)),
+                func.count(distinct(completed)),
+                spend,
+                cast(func.floor(spend / BONUS_EUR_PER_POINT), Integer),
+                redeemed,
+                func.min(Order.nuomos_data),
+                func.max(Order.nuomos_data),
+                literal(now, DateTime),
+            )
+            .select_from(Client)
+            .outerjoin(Order, (Order.kliento_id == Client.kliento_id) & active)
+            .outerjoin(Invoice, Invoice.uzsakymo_id == Order.uzsakymo_id)
+            .where(Client.kliento_id.in_(chunk))
+            .group_by(Client.kliento_id)
+        )
+        db.execute(delete(ClientStats).where(ClientStats.kliento_id.in_(chunk)))
+        db.execute(insert(ClientStats).from_select(
+            ["kliento_id", "uzsakymu_skaicius", "uzbaigti_uzsakymai", "islaidos", "uzdirbti_taskai",
+             "panaudoti_taskai", "pirmas_uzsakymas", "paskutinis_uzsakymas", "perskaiciuota"],
+            aggregated,
+        ))
+        db.execute(
+            update(Client)
+            .where(Client.kliento_id.in_(chunk))
+            .values(bonus_taskai=balance)
+            .execution_options(synchronize_session=False)
+        )
+        done += len(chunk)
+    if done:
+        # /clients/{id}/stats ETag priklauso nuo "clients" versijos
+        change_log.record(db, "clients")
+    return done
+
+
+@task(REFRESH_JOB)
+def refresh_job(db: Session, payload: dict) -> None:
+    """Recompute the clients of a write. Payload: clients, orders, invoices (IDs) or all."""
+    refresh(db, _client_ids(db, payload))
+
+
+def get_stats(db: Session, kliento_id: int) -> dict | None:
+    """
+    Read the precomputed statistics of a client.
+
+    Args:
+        db (Session): SQLAlchemy session.
+        kliento_id (int): Client ID.
+
+    Returns:
+        dict | None: Statistics (zeros if not computed yet), or None if the client does not exist.
+    """
+    row = db.execute(
+        select(
+            Client.kliento_id, Client.bonus_korekcija,
+            ClientStats.uzsakymu_skaicius, ClientStats.uzbaigti_uzsakymai, ClientStats.islaidos,
+            ClientStats.uzdirbti_taskai, ClientStats.panaudoti_taskai,
+            ClientStats.pirmas_uzsakymas, ClientStats.paskutinis_uzsakymas, ClientStats.perskaiciuota,
+        )
+        .select_from(Client)
+        .outerjoin(ClientStats, ClientStats.kliento_id == Client.kliento_id)
+        .where(Client.kliento_id == kliento_id)
+    ).first()
+    if row is None:
+        return None
+    return {
+        "kliento_id": row.kliento_id,
+        "uzsakymu_skaicius": row.uzsakymu_skaicius or 0,
+        "uzbaigti_uzsakymai": row.uzbaigti_uzsakymai or 0,
+        "islaidos": round(float(row.islaidos or 0), 2),
+        "uzdirbti_taskai": row.uzdirbti_taskai or 0,
+        "panaudoti_taskai": row.panaudoti_taskai or 0,
+        "bonus_korekcija": row.bonus_korekcija or 0,
+        "taskai_likutis": max((row.uzdirbti_taskai or 0) - (row.panaudoti_taskai or 0) + (row.bonus_korekcija or 0), 0),
+        "pirmas_uzsakymas": row.pirmas_uzsakymas,
+        "paskutinis_uzsakymas": row.paskutinis_uzsakymas,
+        "perskaiciuota": row.perskaiciuota,
+        "loyalty_eligible": (row.uzbaigti_uzsakymai or 0) >= LOYALTY_MIN_COMPLETED,
+    }
+
+
+if __name__ == "__main__":
+    from app.db.session import SessionLocal
+
+    logging.basicConfig(level=logging.INFO)
+    session = SessionLocal()
+    try:
+        count = refresh(session, _client_ids(session, {"all": True}))
+        session.commit()
+        print(f"Recomputed {count} clients")
+    finally:
+        session.close()
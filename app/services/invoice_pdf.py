@@ -0,0 +1,350 @@
+"""
+app/services/invoice_pdf.py
+
+Invoice PDF rendering with a content-addressed disk cache.
+
+Description:
+    The invoice, its order, client, car and pick-up/drop-off locations are
+    loaded with one joined query. The page is laid out by the Jinja2 template
+    app/templates/invoice.pdf.j2, which produces a PDF content stream, and
+    `build_pdf` wraps it into a one-page PDF using the standard Helvetica
+    fonts (no PDF library is needed; Lithuanian letters are mapped with a
+    font encoding).
+
+    A rendered file is stored as INVOICE_PDF_DIR/<ab>/<sha256>.pdf, where the
+    hash is taken over the template and the data printed on the invoice. A
+    request for an unchanged invoice is served from disk; when the data or
+    the template changes the hash changes and the PDF is rendered again, so
+    the cache never needs explicit invalidation. Files not read for
+    INVOICE_PDF_RETENTION_DAYS are removed by the scheduler.
+
+    Month-end runs pre-render all invoices of a month in a background job
+    ("invoice.prerender_month"), loading the whole month with one query.
+"""
+import hashlib
+import json
+import logging
+import os
+import tempfile
+import time
+import zlib
+from datetime import date
+from functools import lru_cache
+from pathlib import Path
+
+from jinja2 import Environment, FileSystemLoader, StrictUndefined
+from sqlalchemy.orm import Session, aliased
+
+from app.models import Car, Client, Invoice, Location, Order
+from app.services.job_queue import task
+
+logger = logging.getLogger(__name__)
+
+INVOICE_PDF_DIR = Path(os.getenv("INVOICE_PDF_DIR", os.path.join(tempfile.gettempdir(), "car_rental_invoices")))
+INVOICE_PDF_RETENTION_DAYS = int(os.getenv("INVOICE_PDF_RETENTION_DAYS", "90"))
+INVOICE_SELLER_NAME = os.getenv("INVOICE_SELLER_NAME", "UAB AutoRent")
+INVOICE_SELLER_ADDRESS = os.getenv("INVOICE_SELLER_ADDRESS", "Gedimino pr. 1, Vilnius")
+
+TEMPLATE_DIR = Path(__file__).resolve().parent.parent / "templates"
+TEMPLATE_NAME = "invoice.pdf.j2"
+
+# Simboliai, kurių nėra WinAnsiEncoding – perkeliami į kodus 128.. per /Differences
+EXTRA_GLYPHS = (
+    ("Ą", "Aogonek"), ("ą", "aogonek"), ("Č", "Ccaron"), ("č", "ccaron"),
+    ("Ę", "Eogonek"), ("ę", "eogonek"), ("Ė", "Edotaccent"), ("ė", "edotaccent"),
+    ("Į", "Iogonek"), ("į", "iogonek"), ("Š", "Scaron"), ("š", "scaron"),
+    ("Ų", "Uogonek"), ("ų", "uogonek"), ("Ū", "Umacron"), ("ū", "umacron"),
+    ("Ž", "Zcaron"), ("ž", "zcaron"), ("–", "endash"), ("€", "Euro"),
+)
+_CODES = {char: 128 + i for i, (char, _) in enumerate(EXTRA_GLYPHS)}
+
+PickupLocation = aliased(Location)
+DropoffLocation = aliased(Location)
+
+
+def _invoice_query(db: Session):
+    """Invoice columns joined with the order, client, car and locations."""
+    return (
+        db.query(
+            Invoice.saskaitos_id, Invoice.suma, Invoice.saskaitos_data,
+            Order.uzsakymo_id, Order.nuomos_data, Order.grazinimo_data, Order.uzsakymo_busena,
+            Client.vardas, Client.pavarde, Client.el_pastas, Client.telefono_nr,
+            Car.marke, Car.modelis, Car.numeris,
+            PickupLocation.pavadinimas.label("paemimo_vieta"),
+            DropoffLocation.pavadinimas.label("grazinimo_vieta"),
+        )
+        .select_from(Invoice)
+        .join(Order, Order.uzsakymo_id == Invoice.uzsakymo_id)
+        .join(Client, Client.kliento_id == Order.kliento_id)
+        .outerjoin(Car, Car.automobilio_id == Order.automobilio_id)
+        .outerjoin(PickupLocation, PickupLocation.vietos_id == Order.paemimo_vietos_id)
+        .outerjoin(DropoffLocation, DropoffLocation.vietos_id == Order.grazinimo_vietos_id)
+    )
+
+
+def _context(row) -> dict:
+    """Template context of one joined row (only what is printed on the invoice)."""
+    days = None
+    if row.nuomos_data and row.grazinimo_data:
+        days = (row.grazinimo_data - row.nuomos_data).days
+    return {
+        "seller": {"pavadinimas": INVOICE_SELLER_NAME, "adresas": INVOICE_SELLER_ADDRESS},
+        "invoice": {
+            "saskaitos_id": row.saskaitos_id,
+            "suma": float(row.suma),
+            "saskaitos_data": str(row.saskaitos_data),
+        },
+        "order": {
+            "uzsakymo_id": row.uzsakymo_id,
+            "nuomos_data": str(row.nuomos_data or ""),
+            "grazinimo_data": str(row.grazinimo_data or ""),
+            "dienos": days,
+            "uzsakymo_busena": row.uzsakymo_busena,
+            "paemimo_vieta": row.paemimo_vieta,
+            "grazinimo_vieta": row.grazinimo_vieta,
+        },
+        "client": {
+            "vardas": row.vardas, "pavarde": row.pavarde,
+            "el_pastas": row.el_pastas, "telefono_nr": row.telefono_nr,
+        },
+        "car": {"marke": row.marke or "", "modelis": row.modelis or "", "numeris": row.numeris or ""},
+    }
+
+
+def load(db: Session, invoice_id: int) -> dict | None:
+    """
+    Load the template context of one invoice.
+
+    Args:
+        db (Session): SQLAlchemy session.
+        invoice_id (int): Invoice ID.
+
+    Returns:
+        dict | None: Template context, or None if the invoice does not exist.
+    """
+    row = _invoice_query(db).filter(Invoice.saskaitos_id == invoice_id).first()
+    return _context(row) if row else None
+
+
+def load_period(db: Session, date_from: date, date_to: date) -> list[dict]:
+    """
+    Load the template contexts of all invoices issued in [date_from, date_to).
+
+    Args:
+        db (Session): SQLAlchemy session.
+        date_from (date): First day (inclusive).
+        date_to (date): Last day (exclusive).
+
+    Returns:
+        list[dict]: Template contexts ordered by invoice ID.
+    """
+    rows = (
+        _invoice_query(db)
+        .filter(Invoice.saskaitos_data >= date_from, Invoice.saskaitos_data < date_to)
+        .order_by(Invoice.saskaitos_id)
+        .all()
+    )
+    return [_context(row) for row in rows]
+
+
+def pdf_string(value) -> str:
+    """
+    Jinja2 filter: a PDF literal string in the font encoding of `build_pdf`.
+
+    Characters without a glyph are replaced with '?'.
+    """
+    out = []
+    for char in str(value):
+        code = _CODES.get(char)
+        if code is None:
+            try:
+                code = char.encode("cp1252")[0]
+            except UnicodeEncodeError:
+                code = ord("?")
+            if 128 <= code < 128 + len(EXTRA_GLYPHS):
+                code = ord("?")
+        if char in "\\()":
+            out.append("\\")
+        out.append(chr(code))
+    return "(" + "".join(out) + ")"
+
+
+def _money(value) -> str:
+    """Jinja2 filter: amount with two decimals."""
+    return f"{float(value):.2f}"
+
+
+_env = Environment(loader=FileSystemLoader(TEMPLATE_DIR), autoescape=False, undefined=StrictUndefined)
+_env.filters["pdf"] = pdf_string
+_env.filters["money"] = _money
+
+
+@lru_cache(maxsize=1)
+def _template_digest() -> bytes:
+    """Hash of the template source (part of every cache key)."""
+    return hashlib.sha256(_env.loader.get_source(_env, TEMPLATE_NAME)[0].encode()).digest()
+
+
+def build_pdf(content: bytes) -> bytes:
+    """
+    Wrap a content stream into a one-page A4 PDF document.
+
+    The output does not depend on the current time, so equal content gives
+    byte-identical files.
+
+    Args:
+        content (bytes): Page content stream (PDF operators).
+
+    Returns:
+        bytes: PDF file.
+    """
+    differences = " ".join("/" + name for _, name in EXTRA_GLYPHS)
+    stream = zlib.compress(content)
+    objects = [
+        b"<< /Type /Catalog /Pages 2 0 R >>",
+        b"<< /Type /Pages /Kids [3 0 R] /Count 1 >>",
+        b"<< /Type /Page /Parent 2 0 R /MediaBox [0 0 595 842] "
+        b"/Resources << /Font << /F1 4 0 R /F2 5 0 R >> >> /Contents 6 0 R >>",
+        b"<< /Type /Font /Subtype /Type1 /BaseFont /Helvetica /Encoding 7 0 R >>",
+        b"<< /Type /Font /Subtype /Type1 /BaseFont /Helvetica-Bold /Encoding 7 0 R >>",
+        b"<< /Length %d /Filter /FlateDecode >>\nstream\n" % len(stream) + stream + b"\nendstream",
+        f"<< /Type /Encoding /BaseEncoding /WinAnsiEncoding /Differences [128 {differences}] >>".encode(),
+    ]
+    out = bytearray(b"%PDF-1.4\n%\xe2\xe3\xcf\xd3\n")
+    offsets = []
+    for number, body in enumerate(objects, start=1):
+        offsets.append(len(out))
+        out += b"%d 0 obj\n" % number + body + b"\nendobj\n"
+    xref = len(out)
+    out += b"xref\n0 %d\n0000000000 65535 f \n" % (len(objects) + 1)
+    for offset in offsets:
+        out += b"%010d 00000 n \n" % offset
+    out += b"trailer\n<< /Size %d /Root 1 0 R >>\nstartxref\n%d\n%%EOF\n" % (len(objects) + 1, xref)
+    return bytes(out)
+
+
+def render(context: dict) -> bytes:
+    """
+    Render an invoice PDF (CPU-bound; call it outside the event loop).
+
+    Args:
+        context (dict): Context returned by `load` / `load_period`.
+
+    Returns:
+        bytes: PDF file.
+    """
+    content = _env.get_template(TEMPLATE_NAME).render(**context)
+    return build_pdf(content.encode("latin-1"))
+
+
+def cache_path(context: dict) -> Path:
+    """
+    Cache file of an invoice: named by the hash of the template and the printed data.
+
+    Args:
+        context (dict): Template context.
+
+    Returns:
+        Path: File path (it may not exist yet).
+    """
+    digest = hashlib.sha256(_template_digest())
+    digest.update(json.dumps(context, sort_keys=True, default=str).encode())
+    key = digest.hexdigest()
+    return INVOICE_PDF_DIR / key[:2] / f"{key}.pdf"
+
+
+def get_or_render(context: dict) -> tuple[Path, bool]:
+    """
+    Return the cached PDF of an invoice, rendering and storing it on a miss.
+
+    Args:
+        context (dict): Template context.
+
+    Returns:
+        tuple[Path, bool]: File path and whether it was rendered now.
+    """
+    path = cache_path(context)
+    if path.exists():
+        # Paskutinio skaitymo laikas – pagal jį valomi seni failai
+        os.utime(path)
+        return path, False
+    path.parent.mkdir(parents=True, exist_ok=True)
+    data = render(context)
+    # Rašoma į laikiną failą ir pervadinama – lygiagretus skaitytojas nemato pusės failo
+    fd, tmp = tempfile.mkstemp(dir=path.parent, suffix=".tmp")
+    try:
+        with os.fdopen(fd, "wb") as fh:
+            fh.write(data)
+        os.replace(tmp, path)
+    except BaseException:
+        if os.path.exists(tmp):
+            os.unlink(tmp)
+        raise
+    return path, True
+
+
+def month_bounds(month: str) -> tuple[date, date]:
+    """
+    Parse 'YYYY-MM' into the first day of the month and of the next month.
+
+    Raises:
+        ValueError: If the value is not a valid month.
+    """
+    first = date.fromisoformat(f"{month}-01")
+    following = date(first.year + first.month // 12, first.month % 12 + 1, 1)
+    return first, following
+
+
+def prerender(db: Session, date_from: date, date_to: date) -> int:
+    """
+    Render and cache all invoices issued in [date_from, date_to).
+
+    Args:
+        db (Session): SQLAlchemy session.
+        date_from (date): First day (inclusive).
+        date_to (date): Last day (exclusive).
+
+    Returns:
+        int: Number of newly rendered files (already cached ones are skipped).
+    """
+    rendered = 0
+    for context in load_period(db, date_from, date_to):
+        rendered += get_or_render(context)[1]
+    return rendered
+
+
+def purge_cache(max_age_days: int = INVOICE_PDF_RETENTION_DAYS) -> int:
+    """
+    Delete cached PDFs that were not read for `max_age_days`.
+
+    Returns:
+        int: Number of deleted files.
+    """
+    if not INVOICE_PDF_DIR.exists():
+        return 0
+    cutoff = time.time() - max_age_days * 86400
+    deleted = 0
+    for path in INVOICE_PDF_DIR.glob("*/*.pdf"):
+        try:
+            if path.stat().st_mtime < cutoff:
+                path.unlink()
+                deleted += 1
+        except FileNotFoundError:
+            pass
+    return deleted
+
+
+@task("invoice.render_pdf")
+def render_pdf_job(db: Session, payload: dict) -> None:
+    """Render one invoice into the cache. Payload: uzsakymo_id (an order has one invoice)."""
+    row = _invoice_query(db).filter(Invoice.uzsakymo_id == payload["uzsakymo_id"]).first()
+    if row is not None:
+        get_or_render(_context(row))
+
+
+@task("invoice.prerender_month")
+def prerender_month_job(db: Session, payload: dict) -> None:
+    """Render all invoices of a month into the cache. Payload: month ('YYYY-MM')."""
+    date_from, date_to = month_bounds(payload["month"])
+    rendered = prerender(db, date_from, date_to)
+    logger.info("Pre-rendered %s invoice PDFs for %s", rendered, payload["month"])
@@ -0,0 +1,307 @@
+"""
+app/services/job_queue.py
+
+Database-backed background job queue.
+
+Description:
+    Endpoints enqueue follow-up work (e-mails, PDF rendering, statistics)
+    with `enqueue`, which adds a row to 'uzduociu_eile' in the caller's
+    session: the job is committed together with the data it refers to, and
+    the request returns without doing the work.
+
+    Workers take due jobs in batches. The selected rows are locked with
+    SELECT ... FOR UPDATE SKIP LOCKED on MySQL, so parallel workers never take
+    the same job, and each job gets a visibility timeout
+    (JOB_VISIBILITY_SECONDS). The timeout is renewed right before a job of
+    the batch starts; a job whose timeout passed while earlier jobs of the
+    batch ran and that another worker took meanwhile is skipped. A job whose
+    worker died becomes due again when the timeout passes. A failed job is retried with exponential backoff until
+    `max_bandymai`, then it is marked 'klaida'.
+
+    JOB_WORKERS worker coroutines are started with the application (handlers
+    run in the thread pool); a separate worker process can be run with
+    `python -m app.services.job_queue`.
+
+Usage:
+    @task("email.invoice_created")
+    def invoice_created(db, payload): ...
+
+    job_queue.enqueue(db, "email.invoice_created", {"uzsakymo_id": 5})
+    db.commit()
+"""
+import asyncio
+import json
+import logging
+import os
+from datetime import datetime, timedelta
+
+from fastapi.concurrency import run_in_threadpool
+from sqlalchemy import and_, delete, or_
+from sqlalchemy.orm import Session
+
+from app.db.session import SessionLocal
+from app.models.job import Job
+
+logger = logging.getLogger(__name__)
+
+JOB_WORKERS = int(os.getenv("JOB_WORKERS", "2"))
+JOB_POLL_SECONDS = float(os.getenv("JOB_POLL_SECONDS", "1"))
+JOB_BATCH = int(os.getenv("JOB_BATCH", "10"))
+JOB_VISIBILITY_SECONDS = int(os.getenv("JOB_VISIBILITY_SECONDS", "300"))
+JOB_RETRY_BASE_SECONDS = int(os.getenv("JOB_RETRY_BASE_SECONDS", "30"))
+JOB_RETENTION_DAYS = int(os.getenv("JOB_RETENTION_DAYS", "7"))
+
+# Ilgiausias laukimas tarp pakartojimų
+MAX_RETRY_DELAY = 3600
+
+_handlers: dict = {}
+
+
+def task(name: str):
+    """
+    Register a job handler.
+
+    Args:
+        name (str): Job type.
+
+    Returns:
+        Callable: Decorator for `handler(db: Session, payload: dict) -> None`.
+    """
+    def register(handler):
+        _handlers[name] = handler
+        return handler
+    return register
+
+
+def enqueue(db: Session, name: str, payload: dict, delay: float = 0, max_attempts: int = 5) -> Job:
+    """
+    Add a job to the caller's session; it becomes visible when the caller commits.
+
+    Args:
+        db (Session): Session of the work the job follows.
+        name (str): Registered job type.
+        payload (dict): JSON-serializable handler arguments.
+        delay (float): Seconds before the first attempt.
+        max_attempts (int): Attempts before the job is marked failed.
+
+    Returns:
+        Job: The pending job.
+    """
+    now = datetime.utcnow()
+    job = Job(
+        tipas=name, duomenys=json.dumps(payload, default=str), busena="laukia", bandymai=0,
+        max_bandymai=max_attempts, paleisti_po=now + timedelta(seconds=delay), sukurta=now, atnaujinta=now,
+    )
+    db.add(job)
+    return job
+
+
+def enqueue_many(db: Session, name: str, payloads: list[dict], max_attempts: int = 5) -> int:
+    """
+    Add many jobs of one type with a single executemany INSERT (caller commits).
+
+    Args:
+        db (Session): Session of the work the jobs follow.
+        name (str): Registered job type.
+        payloads (list[dict]): JSON-serializable handler arguments, one per job.
+        max_attempts (int): Attempts before a job is marked failed.
+
+    Returns:
+        int: Number of enqueued jobs.
+    """
+    if not payloads:
+        return 0
+    now = datetime.utcnow()
+    # Per jungtį, ne per sesiją – galima kviesti ir iš flush įvykių
+    db.connection().execute(Job.__table__.insert(), [
+        {"tipas": name, "duomenys": json.dumps(payload, default=str), "busena": "laukia", "bandymai": 0,
+         "max_bandymai": max_attempts, "paleisti_po": now, "sukurta": now, "atnaujinta": now}
+        for payload in payloads
+    ])
+    return len(payloads)
+
+
+def claim(db: Session, limit: int = JOB_BATCH, now: datetime = None) -> list[tuple]:
+    """
+    Take due jobs and start their attempt.
+
+    Args:
+        db (Session): Session used and committed for the claim.
+        limit (int): Maximum number of jobs.
+        now (datetime, optional): Current UTC time (for tests).
+
+    Returns:
+        list[tuple]: (uzduoties_id, tipas, duomenys, bandymai, max_bandymai) of the taken jobs.
+    """
+    now = now or datetime.utcnow()
+    due = or_(
+        and_(Job.busena == "laukia", Job.paleisti_po <= now),
+        and_(Job.busena == "vykdoma", Job.uzrakinta_iki < now),
+    )
+    ids = [
+        row[0] for row in
+        db.query(Job.uzduoties_id).filter(due).order_by(Job.uzduoties_id).limit(limit)
+        .with_for_update(skip_locked=True).all()
+    ]
+    if not ids:
+        db.commit()
+        return []
+    db.query(Job).filter(Job.uzduoties_id.in_(ids)).update({
+        Job.busena: "vykdoma",
+        Job.bandymai: Job.bandymai + 1,
+        Job.uzrakinta_iki: now + timedelta(seconds=JOB_VISIBILITY_SECONDS),
+        Job.atnaujinta: now,
+    }, synchronize_session=False)
+    db.commit()
+    return (
+        db.query(Job.uzduoties_id, Job.tipas, Job.duomenys, Job.bandymai, Job.max_bandymai)
+        .filter(Job.uzduoties_id.in_(ids)).order_by(Job.uzduoties_id).all()
+    )
+
+
+def renew(session_factory, job: tuple, now: datetime = None) -> bool:
+    """
+    Restart the visibility timeout of a claimed job before it runs.
+
+    Args:
+        session_factory (Callable[[], Session]): Session factory.
+        job (tuple): Row returned by `claim`.
+        now (datetime, optional): Current UTC time (for tests).
+
+    Returns:
+        bool: False if another worker took the job after its timeout passed.
+    """
+    job_id, _, _, attempt, _ = job
+    now = now or datetime.utcnow()
+    db = session_factory()
+    try:
+        renewed = db.query(Job).filter(
+            Job.uzduoties_id == job_id, Job.bandymai == attempt, Job.busena == "vykdoma"
+        ).update({
+            Job.uzrakinta_iki: now + timedelta(seconds=JOB_VISIBILITY_SECONDS),
+            Job.atnaujinta: now,
+        }, synchronize_session=False)
+        db.commit()
+    finally:
+        db.close()
+    return renewed == 1
+
+
+def execute(session_factory, job: tuple, now: datetime = None) -> bool:
+    """
+    Run one claimed job and record the outcome.
+
+    The outcome is written only if the attempt still owns the job (a job
+    re-taken after its visibility timeout is not overwritten by the old attempt).
+
+    Args:
+        session_factory (Callable[[], Session]): Creates the sessions of the handler and of the update.
+        job (tuple): Row returned by `claim`.
+        now (datetime, optional): Current UTC time (for tests).
+
+    Returns:
+        bool: Whether the handler succeeded.
+    """
+    job_id, name, payload, attempt, max_attempts = job
+    error = None
+    db = session_factory()
+    try:
+        handler = _handlers.get(name)
+        if handler is None:
+            raise LookupError(f"Unknown job type {name!r}")
+        handler(db, json.loads(payload))
+        db.commit()
+    except Exception as exc:
+        db.rollback()
+        error = f"{type(exc).__name__}: {exc}"
+        logger.warning("Job %s (%s) attempt %s failed: %s", job_id, name, attempt, error)
+    finally:
+        db.close()
+
+    now = now or datetime.utcnow()
+    if error is None:
+        values = {Job.busena: "atlikta", Job.uzrakinta_iki: None, Job.klaida: None}
+    elif attempt >= max_attempts:
+        values = {Job.busena: "klaida", Job.uzrakinta_iki: None, Job.klaida: error}
+    else:
+        delay = min(JOB_RETRY_BASE_SECONDS * 2 ** (attempt - 1), MAX_RETRY_DELAY)
+        values = {Job.busena: "laukia", Job.uzrakinta_iki: None, Job.klaida: error,
+                  Job.paleisti_po: now + timedelta(seconds=delay)}
+    values[Job.atnaujinta] = now
+    db = session_factory()
+    try:
+        db.query(Job).filter(Job.uzduoties_id == job_id, Job.bandymai == attempt).update(
+            values, synchronize_session=False
+        )
+        db.commit()
+    finally:
+        db.close()
+    return error is None
+
+
+def run_pending(session_factory=SessionLocal, limit: int = JOB_BATCH, now: datetime = None) -> int:
+    """
+    Claim one batch of due jobs and run them one after another.
+
+    Args:
+        session_factory (Callable[[], Session]): Session factory.
+        limit (int): Maximum number of jobs.
+        now (datetime, optional): Current UTC time (for tests).
+
+    Returns:
+        int: Number of jobs run.
+    """
+    db = session_factory()
+    try:
+        jobs = claim(db, limit, now)
+    finally:
+        db.close()
+    ran = 0
+    for job in jobs:
+        # Ankstesnės partijos užduotys galėjo užtrukti ilgiau nei matomumo laikas
+        if not renew(session_factory, job, now):
+            logger.info("Job %s was taken by another worker, skipping", job[0])
+            continue
+        execute(session_factory, job, now)
+        ran += 1
+    return ran
+
+
+def purge_finished(db: Session) -> int:
+    """
+    Delete completed jobs older than JOB_RETENTION_DAYS (failed ones are kept).
+
+    Returns:
+        int: Number of deleted jobs.
+    """
+    cutoff = datetime.utcnow() - timedelta(days=JOB_RETENTION_DAYS)
+    deleted = db.execute(delete(Job).where(Job.busena == "atlikta", Job.atnaujinta < cutoff)).rowcount
+    db.commit()
+    return deleted
+
+
+async def work(session_factory=SessionLocal) -> None:
+    """Worker coroutine: run due jobs, sleep JOB_POLL_SECONDS when there are none."""
+    while True:
+        try:
+            ran = await run_in_threadpool(run_pending, session_factory)
+        except asyncio.CancelledError:
+            raise
+        except Exception:
+            logger.exception("Job worker failed")
+            ran = 0
+        if not ran:
+            await asyncio.sleep(JOB_POLL_SECONDS)
+
+
+async def _main() -> None:
+    import app.services.analytics  # noqa: F401 – užregistruoja užduočių tipus
+    import app.services.client_stats  # noqa: F401
+    import app.services.invoice_pdf  # noqa: F401
+    import app.services.notifications  # noqa: F401
+    await asyncio.gather(*(work() for _ in range(max(JOB_WORKERS, 1))))
+
+
+if __name__ == "__main__":
+    logging.basicConfig(level=logging.INFO)
+    asyncio.run(_main())
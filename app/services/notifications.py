@@ -0,0 +1,102 @@
+"""
+app/services/notifications.py
+
+E-mail notifications sent by background jobs.
+
+Description:
+    The handlers are registered in the job queue (app/services/job_queue.py)
+    and load what they need by ID, so the request only enqueues a small
+    payload. Mail goes through SMTP_HOST; without it (development, tests)
+    messages are only logged.
+"""
+import logging
+import os
+import smtplib
+from email.message import EmailMessage
+
+from sqlalchemy.orm import Session
+
+from app.models import Client, ClientSupport, Invoice, Order
+from app.services.job_queue import task
+
+logger = logging.getLogger(__name__)
+
+SMTP_HOST = os.getenv("SMTP_HOST", "")
+SMTP_PORT = int(os.getenv("SMTP_PORT", "587"))
+SMTP_USER = os.getenv("SMTP_USER", "")
+SMTP_PASSWORD = os.getenv("SMTP_PASSWORD", "")
+SMTP_FROM = os.getenv("SMTP_FROM", "noreply@autorent.lt")
+SMTP_TIMEOUT = 10
+
+
+def send_email(to: str, subject: str, body: str) -> None:
+    """
+    Send a plain-text e-mail.
+
+    Args:
+        to (str): Recipient address.
+        subject (str): Subject line.
+        body (str): Message text.
+
+    Raises:
+        smtplib.SMTPException | OSError: If sending fails (the job is retried).
+    """
+    if not to:
+        return
+    if not SMTP_HOST:
+        logger.info("E-mail to %s: %s", to, subject)
+        return
+    message = EmailMessage()
+    message["From"] = SMTP_FROM
+    message["To"] = to
+    message["Subject"] = subject
+    message.set_content(body)
+    with smtplib.SMTP(SMTP_HOST, SMTP_PORT, timeout=SMTP_TIMEOUT) as smtp:
+        smtp.starttls()
+        if SMTP_USER:
+            smtp.login(SMTP_USER, SMTP_PASSWORD)
+        smtp.send_message(message)
+
+
+@task("email.invoice_created")
+def invoice_created(db: Session, payload: dict) -> None:
+    """Tell the client an invoice was issued. Payload: uzsakymo_id (an order has one invoice)."""
+    row = (
+        db.query(Invoice.saskaitos_id, Invoice.suma, Invoice.saskaitos_data, Client.el_pastas, Client.vardas)
+        .join(Order, Order.uzsakymo_id == Invoice.uzsakymo_id)
+        .join(Client, Client.kliento_id == Order.kliento_id)
+        .filter(Invoice.uzsakymo_id == payload["uzsakymo_id"])
+        .first()
+    )
+    if row is None:
+        return
+    send_email(
+        row.el_pastas,
+        f"Sąskaita Nr. {row.saskaitos_id}",
+        f"Sveiki, {row.vardas},\n\n{row.saskaitos_data} išrašyta sąskaita Nr. {row.saskaitos_id}, "
+        f"suma {row.suma} EUR.\n",
+    )
+
+
+@task("email.support_answered")
+def support_answered(db: Session, payload: dict) -> None:
+    """Send the answer of a support request to the client. Payload: uzklausos_id."""
+    row = (
+        db.query(ClientSupport.tema, ClientSupport.atsakymas, Client.el_pastas, Client.vardas)
+        .join(Client, Client.kliento_id == ClientSupport.kliento_id)
+        .filter(ClientSupport.uzklausos_id == payload["uzklausos_id"])
+        .first()
+    )
+    if row is None or not row.atsakymas:
+        return
+    send_email(row.el_pastas, f"Atsakymas: {row.tema}", f"Sveiki, {row.vardas},\n\n{row.atsakymas}\n")
+
+
+@task("email.welcome")
+def welcome(db: Session, payload: dict) -> None:
+    """Welcome a new employee account. Payload: el_pastas, vardas."""
+    send_email(
+        payload["el_pastas"],
+        "Sveiki prisijungę prie AutoRent",
+        f"Sveiki, {payload.get('vardas') or ''},\n\nJūsų paskyra sukurta.\n",
+    )
@@ -0,0 +1,142 @@
+"""
+app/services/password_hasher.py
+
+Bounded worker pool for bcrypt hashing and verification.
+
+Description:
+    bcrypt is deliberately slow (~0.2 s per call at cost 12). Running it in
+    FastAPI's shared threadpool lets a burst of logins starve every other
+    sync endpoint. Password work is therefore sent to a small dedicated pool
+    (PASSWORD_HASH_WORKERS threads; bcrypt releases the GIL while hashing).
+
+    At most PASSWORD_HASH_QUEUE calls may wait for a worker. When the queue is
+    full the call fails immediately with PasswordPoolSaturated, which the API
+    turns into 429 with a Retry-After header.
+
+Usage:
+    from app.services.password_hasher import password_hasher
+
+    valid, new_hash = await password_hasher.verify_and_update(plain, stored_hash)
+"""
+import asyncio
+import os
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from app.services import auth_service
+
+
+class PasswordPoolSaturated(Exception):
+    """Raised when the password pool has no free worker or queue slot."""
+
+    def __init__(self, retry_after: int):
+        super().__init__("Password hashing pool is saturated")
+        self.retry_after = retry_after
+
+
+class PasswordHasher:
+    """
+    Size-limited thread pool running the auth_service password functions.
+
+    Args:
+        workers (int): Number of hashing threads.
+        max_queue (int): Calls allowed to wait when all workers are busy.
+    """
+
+    def __init__(self, workers: int, max_queue: int):
+        self.workers = workers
+        self.max_queue = max_queue
+        self._executor = ThreadPoolExecutor(max_workers=workers, thread_name_prefix="pwhash")
+        self._lock = threading.Lock()
+        self._in_flight = 0
+        self._completed = 0
+        self._rejected = 0
+        self._wait_total = 0.0
+        self._run_total = 0.0
+        self._run_last = 0.0
+
+    def _retry_after(self) -> int:
+        """Seconds until a slot is likely free (queue drained at the last measured speed)."""
+        per_call = self._run_last or 0.25
+        return max(1, round(self.max_queue * per_call / self.workers))
+
+    def _timed(self, submitted: float, func, *args):
+        """Run `func` in a worker and record queue wait and run time."""
+        started = time.perf_counter()
+        try:
+            return func(*args)
+        finally:
+            finished = time.perf_counter()
+            with self._lock:
+                self._in_flight -= 1
+                self._completed += 1
+                self._wait_total += started - submitted
+                self._run_total += finished - started
+                self._run_last = finished - started
+
+    async def run(self, func, *args):
+        """
+        Run a password function in the pool.
+
+        Args:
+            func (Callable): Function from auth_service.
+            *args: Its arguments.
+
+        Returns:
+            Any: The function result.
+
+        Raises:
+            PasswordPoolSaturated: If all workers are busy and the queue is full.
+        """
+        with self._lock:
+            if self._in_flight >= self.workers + self.max_queue:
+                self._rejected += 1
+                raise PasswordPoolSaturated(self._retry_after())
+            self._in_flight += 1
+        try:
+            future = self._executor.submit(self._timed, time.perf_counter(), func, *args)
+        except BaseException:
+            with self._lock:
+                self._in_flight -= 1
+            raise
+        return await asyncio.wrap_future(future)
+
+    async def verify(self, plain_password: str, hashed_password: str) -> bool:
+        """Verify a password in the pool (see auth_service.verify_password)."""
+        return await self.run(auth_service.verify_password, plain_password, hashed_password)
+
+    async def verify_and_update(self, plain_password: str, hashed_password: str):
+        """Verify a password and get an optional rehash (see auth_service.verify_and_update_password)."""
+        return await self.run(auth_service.verify_and_update_password, plain_password, hashed_password)
+
+    async def hash(self, password: str) -> str:
+        """Hash a password in the pool (see auth_service.get_password_hash)."""
+        return await self.run(auth_service.get_password_hash, password)
+
+    def metrics(self) -> dict:
+        """
+        Return queueing metrics of the pool.
+
+        Returns:
+            dict: Pool size, current load and averages in milliseconds.
+        """
+        with self._lock:
+            completed = self._completed or 1
+            return {
+                "workers": self.workers,
+                "max_queue": self.max_queue,
+                "in_flight": self._in_flight,
+                "queued": max(0, self._in_flight - self.workers),
+                "completed": self._completed,
+                "rejected": self._rejected,
+                "avg_wait_ms": round(self._wait_total / completed * 1000, 2),
+                "avg_run_ms": round(self._run_total / completed * 1000, 2),
+                "bcrypt_rounds": auth_service.BCRYPT_ROUNDS,
+            }
+
+
+password_hasher = PasswordHasher(
+    workers=int(os.getenv("PASSWORD_HASH_WORKERS", str(min(4, os.cpu_count() or 1)))),
+    max_queue=int(os.getenv("PASSWORD_HASH_QUEUE", "32")),
+)
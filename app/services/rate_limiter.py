@@ -0,0 +1,285 @@
+"""
+app/services/rate_limiter.py
+
+Rate limiting: sliding windows for login attempts, token buckets for the API.
+
+Description:
+    `SlidingWindowLimiter` counts events per key within the last `window`
+    seconds. The events are kept in a `RateLimitStore`; the default
+    `MemoryRateLimitStore` is per process. A shared backend (e.g. Redis sorted
+    sets) only has to implement the three store methods and can be passed to
+    `LoginGuard`.
+
+    `login_guard` is used by /login and /token:
+      - every attempt counts against the client IP (LOGIN_IP_LIMIT per LOGIN_IP_WINDOW s),
+      - failed attempts count against the email (LOGIN_EMAIL_LIMIT per LOGIN_EMAIL_WINDOW s),
+        a successful login clears them.
+    Both limits are checked before the employee is loaded or bcrypt runs.
+
+    `TokenBucketLimiter` gives every (principal, operation) pair a bucket of
+    `capacity` requests refilled at `capacity / period` per second; it is used
+    by app/middleware/rate_limit.py. Rules come from API_RATE_LIMITS, e.g.
+        API_RATE_LIMITS="getCarsUtilization=10/60,getAllInvoices=30/60"
+    and API_RATE_LIMIT_DEFAULT (same "N/S" form, empty = other operations unlimited).
+"""
+import math
+import os
+import threading
+import time
+from collections import deque
+
+
+class RateLimitExceeded(Exception):
+    """Raised when a key has used up its limit; `retry_after` is in seconds."""
+
+    def __init__(self, retry_after: int):
+        super().__init__("Rate limit exceeded")
+        self.retry_after = retry_after
+
+
+class RateLimitStore:
+    """Interface of a sliding-window event store."""
+
+    def add(self, key: str, now: float, window: float) -> None:
+        """Record one event for `key` at time `now`."""
+        raise NotImplementedError
+
+    def count(self, key: str, now: float, window: float) -> tuple[int, float | None]:
+        """Return the number of events in (now - window, now] and the oldest of them."""
+        raise NotImplementedError
+
+    def clear(self, key: str) -> None:
+        """Forget all events of `key`."""
+        raise NotImplementedError
+
+
+class MemoryRateLimitStore(RateLimitStore):
+    """
+    In-process store keeping a deque of timestamps per key.
+
+    Args:
+        sweep_every (int): Drop idle keys after this many `add` calls.
+    """
+
+    def __init__(self, sweep_every: int = 1000):
+        self._events: dict[str, deque] = {}
+        self._lock = threading.Lock()
+        self._sweep_every = sweep_every
+        self._adds = 0
+
+    @staticmethod
+    def _prune(events: deque, now: float, window: float) -> None:
+        limit = now - window
+        while events and events[0] <= limit:
+            events.popleft()
+
+    def add(self, key: str, now: float, window: float) -> None:
+        with self._lock:
+            events = self._events.setdefault(key, deque())
+            self._prune(events, now, window)
+            events.append(now)
+            self._adds += 1
+            if self._adds % self._sweep_every == 0:
+                # Pašaliname raktus, kurių paskutinis įvykis jau už lango
+                for idle in [k for k, ev in self._events.items() if not ev or ev[-1] <= now - window]:
+                    del self._events[idle]
+
+    def count(self, key: str, now: float, window: float) -> tuple[int, float | None]:
+        with self._lock:
+            events = self._events.get(key)
+            if not events:
+                return 0, None
+            self._prune(events, now, window)
+            return len(events), (events[0] if events else None)
+
+    def clear(self, key: str) -> None:
+        with self._lock:
+            self._events.pop(key, None)
+
+
+class SlidingWindowLimiter:
+    """
+    Allow at most `limit` events per key within `window` seconds.
+
+    Args:
+        store (RateLimitStore): Event store.
+        limit (int): Allowed events per window.
+        window (float): Window length in seconds.
+        prefix (str): Namespace for keys in a shared store.
+    """
+
+    def __init__(self, store: RateLimitStore, limit: int, window: float, prefix: str):
+        self.store = store
+        self.limit = limit
+        self.window = window
+        self.prefix = prefix
+
+    def check(self, key: str, now: float = None) -> None:
+        """
+        Fail if the key has no attempts left.
+
+        Raises:
+            RateLimitExceeded: With the seconds until the oldest event leaves the window.
+        """
+        now = time.time() if now is None else now
+        count, oldest = self.store.count(f"{self.prefix}:{key}", now, self.window)
+        if count >= self.limit:
+            raise RateLimitExceeded(max(1, int(oldest + self.window - now + 0.999)))
+
+    def hit(self, key: str, now: float = None) -> None:
+        """Record one event for the key."""
+        self.store.add(f"{self.prefix}:{key}", time.time() if now is None else now, self.window)
+
+    def reset(self, key: str) -> None:
+        """Forget the events of the key."""
+        self.store.clear(f"{self.prefix}:{key}")
+
+
+class LoginGuard:
+    """
+    Per-IP and per-email throttling of login attempts.
+
+    Args:
+        store (RateLimitStore): Shared or in-process event store.
+        ip_limit (int): Attempts per IP within `ip_window`.
+        ip_window (float): Seconds.
+        email_limit (int): Failed attempts per email within `email_window`.
+        email_window (float): Seconds.
+    """
+
+    def __init__(self, store: RateLimitStore, ip_limit: int, ip_window: float,
+                 email_limit: int, email_window: float):
+        self.by_ip = SlidingWindowLimiter(store, ip_limit, ip_window, "login-ip")
+        self.by_email = SlidingWindowLimiter(store, email_limit, email_window, "login-email")
+
+    @staticmethod
+    def _email(email: str) -> str:
+        return (email or "").strip().lower()
+
+    def check(self, ip: str, email: str) -> None:
+        """
+        Count the attempt against the IP and reject it if either limit is used up.
+
+        Raises:
+            RateLimitExceeded: If the IP or the email is throttled.
+        """
+        self.by_ip.check(ip)
+        self.by_email.check(self._email(email))
+        self.by_ip.hit(ip)
+
+    def record(self, email: str, success: bool) -> None:
+        """Count a failed attempt against the email, or clear its failures after a success."""
+        if success:
+            self.by_email.reset(self._email(email))
+        else:
+            self.by_email.hit(self._email(email))
+
+
+login_guard = LoginGuard(
+    MemoryRateLimitStore(),
+    ip_limit=int(os.getenv("LOGIN_IP_LIMIT", "20")),
+    ip_window=float(os.getenv("LOGIN_IP_WINDOW", "60")),
+    email_limit=int(os.getenv("LOGIN_EMAIL_LIMIT", "5")),
+    email_window=float(os.getenv("LOGIN_EMAIL_WINDOW", "300")),
+)
+
+
+class TokenBucketLimiter:
+    """
+    Token buckets per (principal, operation) with per-operation rules.
+
+    Args:
+        rules (dict[str, tuple[int, float]]): operation_id -> (capacity, period in seconds).
+        default (tuple[int, float] | None): Rule for operations not listed, None = unlimited.
+        max_buckets (int): Drop refilled buckets when there are more than this many.
+    """
+
+    def __init__(self, rules: dict, default: tuple = None, max_buckets: int = 10000):
+        self.rules = rules
+        self.default = default
+        self.max_buckets = max_buckets
+        self._buckets: dict[tuple[str, str], tuple[float, float]] = {}
+        self._lock = threading.Lock()
+
+    def rule_for(self, operation: str):
+        """Return (capacity, period) of an operation or None if it is not limited."""
+        return self.rules.get(operation, self.default)
+
+    def take(self, principal: str, operation: str, now: float = None) -> tuple[bool, int, int]:
+        """
+        Take one token from the caller's bucket.
+
+        Args:
+            principal (str): Caller identity (token subject or client IP).
+            operation (str): Route operation_id.
+            now (float, optional): Current monotonic time.
+
+        Returns:
+            tuple[bool, int, int]: Whether the request is allowed, tokens left
+            and seconds until the next token when it is not.
+        """
+        rule = self.rule_for(operation)
+        if rule is None:
+            return True, -1, 0
+        capacity, period = rule
+        rate = capacity / period
+        now = time.monotonic() if now is None else now
+        key = (principal, operation)
+        with self._lock:
+            tokens, last = self._buckets.get(key, (capacity, now))
+            tokens = min(capacity, tokens + (now - last) * rate)
+            allowed = tokens >= 1
+            if allowed:
+                tokens -= 1
+            self._buckets[key] = (tokens, now)
+            if len(self._buckets) > self.max_buckets:
+                self._sweep(now)
+        if allowed:
+            return True, int(tokens), 0
+        return False, 0, max(1, math.ceil((1 - tokens) / rate))
+
+    def _sweep(self, now: float) -> None:
+        """Forget buckets that are full again – they behave like new ones."""
+        for key in [k for k, (tokens, last) in self._buckets.items()
+                    if tokens + (now - last) * self._rate(k[1]) >= self.rule_for(k[1])[0]]:
+            del self._buckets[key]
+
+    def _rate(self, operation: str) -> float:
+        capacity, period = self.rule_for(operation)
+        return capacity / period
+
+
+def parse_rule(value: str):
+    """
+    Parse a "N/S" rule (N requests per S seconds).
+
+    Returns:
+        tuple[int, float] | None: (capacity, period) or None for an empty value.
+
+    Raises:
+        ValueError: If the value is malformed.
+    """
+    value = (value or "").strip()
+    if not value:
+        return None
+    count, _, period = value.partition("/")
+    return int(count), float(period or 1)
+
+
+def parse_rules(value: str) -> dict:
+    """Parse "operationId=N/S,..." into {operation_id: (capacity, period)}."""
+    rules = {}
+    for item in (value or "").split(","):
+        operation, _, rule = item.strip().partition("=")
+        if operation and rule:
+            rules[operation] = parse_rule(rule)
+    return rules
+
+
+api_limiter = TokenBucketLimiter(
+    parse_rules(os.getenv(
+        "API_RATE_LIMITS",
+        "getCarsUtilization=10/60,getAllInvoices=30/60,searchReservations=30/60",
+    )),
+    default=parse_rule(os.getenv("API_RATE_LIMIT_DEFAULT", "")),
+)
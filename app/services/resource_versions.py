@@ -0,0 +1,54 @@
+"""
+app/services/resource_versions.py
+
+In-memory version counters of API resources.
+
+Description:
+    Every successful write to a resource bumps its version and modification
+    time. Conditional GET (app/middleware/conditional.py) builds ETags from the
+    versions of the resources a response depends on, so an unchanged resource
+    can be answered with 304 before the endpoint runs.
+
+    The counters live in the process. A new process starts from a random
+    epoch, so ETags issued by a previous process never match.
+"""
+import threading
+import time
+import uuid
+
+_lock = threading.Lock()
+_epoch = uuid.uuid4().hex[:8]
+_started = time.time()
+_versions: dict[str, int] = {}
+_modified: dict[str, float] = {}
+
+
+def bump(*resources: str) -> None:
+    """
+    Mark resources as changed.
+
+    Args:
+        *resources (str): Resource names, e.g. "cars", "reservations".
+    """
+    now = time.time()
+    with _lock:
+        for name in resources:
+            _versions[name] = _versions.get(name, 0) + 1
+            _modified[name] = now
+
+
+def snapshot(resources: tuple[str, ...]) -> tuple[str, float]:
+    """
+    Return the combined version token and last modification time of resources.
+
+    Args:
+        resources (tuple[str, ...]): Resource names the response depends on.
+
+    Returns:
+        tuple[str, float]: Version token (e.g. "3f2a9c1e:cars=4;reservations=1")
+        and the latest modification time as a UNIX timestamp.
+    """
+    with _lock:
+        token = ";".join(f"{name}={_versions.get(name, 0)}" for name in resources)
+        modified = max((_modified.get(name, _started) for name in resources), default=_started)
+    return f"{_epoch}:{token}", modified
@@ -0,0 +1,143 @@
+"""
+app/services/scheduler.py
+
+In-process periodic jobs with database leader election.
+
+Description:
+    Reservation `busena` and car `automobilio_statusas` do not change by
+    themselves. Every SCHEDULER_INTERVAL_SECONDS the scheduler runs set-based
+    transitions (see the repositories):
+
+      - confirmed reservations past their end -> 'baigta' (pending ones
+        are never cancelled automatically);
+      - rented cars without an active order or reservation -> 'laisvas';
+      - expired Idempotency-Key responses and used refresh token ids, old
+        completed background jobs and invoice PDFs not read for
+        INVOICE_PDF_RETENTION_DAYS are deleted;
+      - a new analytics snapshot is taken when the current one is older than
+        ANALYTICS_SNAPSHOT_MINUTES.
+
+    Every worker starts the scheduler from the FastAPI lifespan, but only the
+    holder of the MySQL named lock (GET_LOCK, kept on a dedicated connection)
+    runs the jobs. If the leader dies its connection closes, the lock is
+    released and another worker takes over on its next tick. Other databases
+    (SQLite in development) have no named locks and every process runs the jobs.
+
+    The first run happens one interval after startup. Disable the scheduler
+    with SCHEDULER_ENABLED=0.
+"""
+import asyncio
+import logging
+import os
+from datetime import date
+
+from fastapi.concurrency import run_in_threadpool
+from sqlalchemy import text
+
+from app.api.idempotency import purge_expired
+from app.db.session import SessionLocal, engine
+from app.repositories import car as car_repo
+from app.repositories import reservation as reservation_repo
+from app.services import analytics, invoice_pdf, job_queue, token_service
+
+logger = logging.getLogger(__name__)
+
+SCHEDULER_ENABLED = os.getenv("SCHEDULER_ENABLED", "1") == "1"
+SCHEDULER_INTERVAL_SECONDS = float(os.getenv("SCHEDULER_INTERVAL_SECONDS", "300"))
+SCHEDULER_LOCK_NAME = os.getenv("SCHEDULER_LOCK_NAME", "car_rental_scheduler")
+
+
+class LeaderLock:
+    """
+    MySQL named lock held on its own connection.
+
+    Args:
+        engine: SQLAlchemy engine.
+        name (str): Lock name shared by all workers.
+    """
+
+    def __init__(self, engine, name: str):
+        self.engine = engine
+        self.name = name
+        self._conn = None
+
+    def acquire(self) -> bool:
+        """
+        Take the lock if it is free, or confirm it is still held.
+
+        Returns:
+            bool: Whether this process is the leader.
+        """
+        if self.engine.dialect.name != "mysql":
+            return True
+        try:
+            if self._conn is None:
+                self._conn = self.engine.connect()
+            held = self._conn.execute(
+                text("SELECT IS_USED_LOCK(:name) = CONNECTION_ID()"), {"name": self.name}
+            ).scalar()
+            if not held:
+                held = self._conn.execute(text("SELECT GET_LOCK(:name, 0)"), {"name": self.name}).scalar() == 1
+            # Užrakinimas priklauso sesijai, ne transakcijai – transakcijos nelaikome atviros
+            self._conn.commit()
+            return bool(held)
+        except Exception:
+            logger.exception("Scheduler lock check failed")
+            self.release()
+            return False
+
+    def release(self) -> None:
+        """Release the lock by closing its connection."""
+        if self._conn is not None:
+            try:
+                self._conn.close()
+            except Exception:
+                pass
+            self._conn = None
+
+
+def run_jobs(today: date = None) -> dict:
+    """
+    Run all periodic jobs once, each in its own session and transaction.
+
+    Args:
+        today (date, optional): Current day (for tests).
+
+    Returns:
+        dict: Number of rows changed by each job.
+    """
+    today = today or date.today()
+    results = {}
+    jobs = (
+        ("reservations", lambda db: reservation_repo.finish_expired(db, today)),
+        ("cars", lambda db: car_repo.release_returned(db, today)),
+        ("idempotency_keys", purge_expired),
+        ("used_refresh_tokens", token_service.purge_used_refresh_tokens),
+        ("finished_jobs", job_queue.purge_finished),
+        ("invoice_pdfs", lambda db: invoice_pdf.purge_cache()),
+        ("analytics_snapshot", analytics.snapshot_if_stale),
+    )
+    for name, job in jobs:
+        db = SessionLocal()
+        try:
+            results[name] = job(db)
+        except Exception:
+            db.rollback()
+            logger.exception("Scheduled job %s failed", name)
+        finally:
+            db.close()
+    return results
+
+
+async def run_forever(lock: LeaderLock = None, interval: float = None) -> None:
+    """Background task: run the jobs every interval while this process is the leader."""
+    lock = lock or LeaderLock(engine, SCHEDULER_LOCK_NAME)
+    interval = SCHEDULER_INTERVAL_SECONDS if interval is None else interval
+    try:
+        while True:
+            await asyncio.sleep(interval)
+            if await run_in_threadpool(lock.acquire):
+                results = await run_in_threadpool(run_jobs)
+                logger.info("Scheduled jobs: %s", results)
+    finally:
+        lock.release()
@@ -0,0 +1,204 @@
+"""
+app/services/token_service.py
+
+JWT issuing and verification with rotating keys and a verified-token cache.
+
+Description:
+    Signing keys come from the environment:
+        JWT_KEYS="2025-01:first-secret,2025-02:second-secret"
+        JWT_ACTIVE_KID="2025-02"
+    New tokens are signed with the active key and carry its id in the `kid`
+    header; tokens signed with any other listed key stay valid until they
+    expire, so keys can be rotated without logging everybody out. Without
+    JWT_KEYS a single key from JWT_SECRET_KEY (default "super-secret-key")
+    is used under the id "default"; tokens without `kid` are checked with it.
+
+    Verified access tokens are kept in a small LRU cache until their `exp`,
+    so repeated requests with the same token skip the HMAC check and claims
+    parsing. Refresh tokens are never cached: each one can be used once and
+    is replaced by a new pair. Used refresh token ids are stored in
+    'panaudoti_atnaujinimo_zetonai', so a replayed token is rejected by every
+    worker and after restarts; the scheduler deletes expired ids.
+"""
+import os
+import threading
+import time
+import uuid
+from collections import OrderedDict
+from datetime import datetime, timedelta
+
+from jose import JWTError, jwt
+from sqlalchemy import delete
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.orm import Session
+
+from app.models.used_refresh_token import UsedRefreshToken
+
+ALGORITHM = "HS256"
+ACCESS_TOKEN_EXPIRE_MINUTES = int(os.getenv("ACCESS_TOKEN_EXPIRE_MINUTES", "60"))
+REFRESH_TOKEN_EXPIRE_DAYS = int(os.getenv("REFRESH_TOKEN_EXPIRE_DAYS", "7"))
+TOKEN_CACHE_SIZE = int(os.getenv("TOKEN_CACHE_SIZE", "4096"))
+
+DEFAULT_KID = "default"
+
+
+class TokenError(Exception):
+    """Raised when a token is malformed, expired, signed with an unknown key or of the wrong type."""
+
+
+def _load_keys() -> tuple[dict[str, str], str]:
+    """
+    Read signing keys and the active key id from the environment.
+
+    Returns:
+        tuple[dict[str, str], str]: Keys by id and the id used for new tokens.
+
+    Raises:
+        RuntimeError: If JWT_ACTIVE_KID is not one of the configured keys.
+    """
+    raw = os.getenv("JWT_KEYS", "").strip()
+    if not raw:
+        return {DEFAULT_KID: os.getenv("JWT_SECRET_KEY", "super-secret-key")}, DEFAULT_KID
+    keys = {}
+    for item in raw.split(","):
+        kid, _, secret = item.strip().partition(":")
+        if kid and secret:
+            keys[kid] = secret
+    active = os.getenv("JWT_ACTIVE_KID") or next(iter(keys))
+    if active not in keys:
+        raise RuntimeError(f"JWT_ACTIVE_KID '{active}' nėra tarp JWT_KEYS")
+    return keys, active
+
+
+KEYS, ACTIVE_KID = _load_keys()
+
+_cache: "OrderedDict[str, tuple[dict, float]]" = OrderedDict()
+_cache_lock = threading.Lock()
+
+
+def _encode(claims: dict, expires_delta: timedelta) -> str:
+    """Sign claims with the active key and add `exp`."""
+    to_encode = claims.copy()
+    to_encode["exp"] = datetime.utcnow() + expires_delta
+    return jwt.encode(to_encode, KEYS[ACTIVE_KID], algorithm=ALGORITHM, headers={"kid": ACTIVE_KID})
+
+
+def create_access_token(data: dict, expires_delta: timedelta = None) -> str:
+    """
+    Issue an access token.
+
+    Args:
+        data (dict): Claims to include (at least "sub").
+        expires_delta (timedelta, optional): Lifetime, ACCESS_TOKEN_EXPIRE_MINUTES by default.
+
+    Returns:
+        str: Encoded JWT.
+    """
+    return _encode(data, expires_delta or timedelta(minutes=ACCESS_TOKEN_EXPIRE_MINUTES))
+
+
+def create_refresh_token(subject: str) -> str:
+    """
+    Issue a single-use refresh token.
+
+    Args:
+        subject (str): Token subject (employee email).
+
+    Returns:
+        str: Encoded JWT with typ="refresh" and a unique `jti`.
+    """
+    claims = {"sub": subject, "typ": "refresh", "jti": uuid.uuid4().hex}
+    return _encode(claims, timedelta(days=REFRESH_TOKEN_EXPIRE_DAYS))
+
+
+def _decode(token: str) -> dict:
+    """Verify signature and expiry with the key named in the `kid` header."""
+    try:
+        kid = jwt.get_unverified_header(token).get("kid") or DEFAULT_KID
+    except JWTError as exc:
+        raise TokenError("Malformed token") from exc
+    key = KEYS.get(kid)
+    if key is None:
+        raise TokenError("Unknown signing key")
+    try:
+        return jwt.decode(token, key, algorithms=[ALGORITHM])
+    except JWTError as exc:
+        raise TokenError(str(exc)) from exc
+
+
+def decode_access_token(token: str) -> dict:
+    """
+    Verify an access token, using the cache for tokens verified before.
+
+    Args:
+        token (str): Encoded JWT from the Authorization header.
+
+    Returns:
+        dict: Token claims.
+
+    Raises:
+        TokenError: If the token is invalid, expired or a refresh token.
+    """
+    now = time.time()
+    with _cache_lock:
+        cached = _cache.get(token)
+        if cached is not None:
+            if cached[1] > now:
+                _cache.move_to_end(token)
+                return cached[0]
+            del _cache[token]
+
+    claims = _decode(token)
+    if claims.get("typ", "access") != "access":
+        raise TokenError("Not an access token")
+
+    with _cache_lock:
+        _cache[token] = (claims, float(claims.get("exp", now)))
+        if len(_cache) > TOKEN_CACHE_SIZE:
+            _cache.popitem(last=False)
+    return claims
+
+
+def use_refresh_token(db: Session, token: str) -> str:
+    """
+    Verify a refresh token and mark it as used (commits the mark).
+
+    Args:
+        db (Session): SQLAlchemy session.
+        token (str): Encoded refresh token.
+
+    Returns:
+        str: Token subject.
+
+    Raises:
+        TokenError: If the token is invalid, expired, not a refresh token or already used.
+    """
+    claims = _decode(token)
+    if claims.get("typ") != "refresh" or not claims.get("sub") or not claims.get("jti"):
+        raise TokenError("Not a refresh token")
+    try:
+        # Pirminis raktas – lygiagretus to paties žetono panaudojimas kitame procese nepavyks
+        with db.begin_nested():
+            db.add(UsedRefreshToken(jti=claims["jti"], galioja_iki=datetime.utcfromtimestamp(claims["exp"])))
+    except IntegrityError:
+        raise TokenError("Refresh token already used")
+    db.commit()
+    return claims["sub"]
+
+
+def purge_used_refresh_tokens(db: Session) -> int:
+    """
+    Delete ids of expired refresh tokens (`_decode` rejects those tokens anyway).
+
+    Returns:
+        int: Number of deleted ids.
+    """
+    deleted = db.execute(delete(UsedRefreshToken).where(UsedRefreshToken.galioja_iki <= datetime.utcnow())).rowcount
+    db.commit()
+    return deleted
+
+
+def clear_cache() -> None:
+    """Forget all verified tokens (e.g. after removing a compromised key)."""
+    with _cache_lock:
+        _cache.clear()
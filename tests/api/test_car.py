@@ -15,6 +15,12 @@ Usage:
 import pytest
 import uuid
 
+from sqlalchemy import text
+
+from app.models.car import Car
+from app.repositories import car as car_repo
+from utils.pagination import keyset
+
 @pytest.fixture(scope="module")
 def ensure_place_exists(db_session):
     """
@@ -110,6 +116,46 @@ def test_get_car_by_id(client, created_car_id):
     # Check some fields
     assert car["marke"] == CAR_SAMPLE["marke"]
 
+def test_get_cars_links_modes(client, created_car_id):
+    """
+    Test the ?links= query parameter.
+    With links=none every car has an empty links list; with links=template the
+    links are replaced by a single Link-Template response header.
+    """
+    resp = client.get("/api/v1/cars/", params={"links": "none"})
+    assert resp.status_code == 200
+    assert all(c["links"] == [] for c in resp.json())
+    assert "link-template" not in resp.headers
+
+    resp = client.get(f"/api/v1/cars/{created_car_id}", params={"links": "template"})
+    assert resp.status_code == 200
+    assert resp.json()["links"] == []
+    assert "/api/v1/cars/{automobilio_id}" in resp.headers["link-template"]
+
+def test_get_cars_sparse_fields(client, created_car_id):
+    """
+    Test the ?fields= query parameter.
+    Only the requested fields (plus the car ID) are returned, nested location
+    fields are selected with a dot and links are left out unless requested.
+    """
+    resp = client.get("/api/v1/cars/", params={"fields": "marke,kaina_parai,lokacija.miestas"})
+    assert resp.status_code == 200
+    car = next(c for c in resp.json() if c["automobilio_id"] == created_car_id)
+    assert set(car) == {"automobilio_id", "marke", "kaina_parai", "lokacija"}
+    assert set(car["lokacija"]) == {"miestas"}
+
+    resp = client.get(f"/api/v1/cars/{created_car_id}", params={"fields": "modelis,links"})
+    assert resp.status_code == 200
+    assert set(resp.json()) == {"automobilio_id", "modelis", "links"}
+
+def test_get_cars_unknown_field(client):
+    """
+    Test that an unknown field name in ?fields= is rejected with 400.
+    """
+    resp = client.get("/api/v1/cars/", params={"fields": "marke,nera_tokio"})
+    assert resp.status_code == 400
+    assert "nera_tokio" in resp.json()["detail"]
+
 def test_get_car_not_found(client):
     """
     Test retrieving a car by a non-existent ID.
@@ -151,6 +197,168 @@ def test_update_car_status_not_found(client):
     assert resp.status_code == 404
     assert resp.json()["detail"] == "Car not found"
 
+def test_bulk_update_car_status(client, created_car_id):
+    """
+    Test the bulk status change: cars selected by IDs and current status are
+    updated with one request, and a body without any filter is rejected.
+    """
+    client.patch("/api/v1/cars/status", json={"ids": [created_car_id], "status": "isnuomotas"})
+    resp = client.patch("/api/v1/cars/status", json={
+        "ids": [created_car_id, 999999], "from_status": "isnuomotas", "status": "laisvas",
+    })
+    assert resp.status_code == 200
+    assert resp.json() == {"updated": 1, "status": "laisvas"}
+    assert client.get(f"/api/v1/cars/{created_car_id}").json()["automobilio_statusas"] == "laisvas"
+
+    assert client.patch("/api/v1/cars/status", json={"status": "laisvas"}).status_code == 422
+
+def test_search_cars_text(client, created_car_id):
+    """
+    Test free-text car search.
+    A prefix with a typo finds the car, facet counts are returned in the same call
+    and the index follows car updates.
+    """
+    client.put(f"/api/v1/cars/{created_car_id}", json={"marke": "Honda", "modelis": "Civic"})
+    resp = client.get("/api/v1/cars/search/text", params={"q": "hond civc", "fields": "marke"})
+    assert resp.status_code == 200
+    result = resp.json()
+    assert created_car_id in [car["automobilio_id"] for car in result["items"]]
+    assert result["total"] >= 1
+    assert result["facets"]["marke"]["Honda"] >= 1
+
+    client.put(f"/api/v1/cars/{created_car_id}", json={"modelis": "Accord"})
+    resp = client.get("/api/v1/cars/search/text", params={"q": "honda accord"})
+    assert created_car_id in [car["automobilio_id"] for car in resp.json()["items"]]
+
+def test_search_cars_sorted_pages(client, created_car_id):
+    """
+    Test range filters with sorting and keyset pagination.
+    Pages follow X-Next-Cursor, come in the requested order and together
+    contain the same cars as the unpaginated search.
+    """
+    params = {"kaina_parai_min": 0, "kaina_parai_max": 100000, "sort": "-kaina_parai", "fields": "kaina_parai"}
+    expected = client.get("/api/v1/cars/search", params=params).json()
+    pages, page_params = [], {**params, "limit": 1}
+    while True:
+        resp = client.get("/api/v1/cars/search", params=page_params)
+        assert resp.status_code == 200
+        pages.extend(resp.json())
+        cursor = resp.headers.get("X-Next-Cursor")
+        if not cursor:
+            break
+        assert 'rel="next"' in resp.headers["Link"]
+        page_params["cursor"] = cursor
+    assert pages == expected
+    prices = [car["kaina_parai"] for car in pages]
+    assert prices == sorted(prices, reverse=True)
+    assert created_car_id in [car["automobilio_id"] for car in pages]
+
+    assert client.get("/api/v1/cars/search", params={"cursor": "blogas"}).status_code == 400
+    assert client.get("/api/v1/cars/search", params={"sort": "pastabos"}).status_code == 422
+
+@pytest.mark.parametrize("filters, sort, index", [
+    ({"status": "laisvas", "ranges": {"kaina_parai": (30, 60)}}, None, "ix_automobiliai_statusas_kaina"),
+    ({"kuro_tipas": "dyzelinas", "ranges": {"metai": (2018, None)}}, None, "ix_automobiliai_kuras_metai"),
+    ({"sedimos_vietos": 7, "ranges": {"kaina_parai": (None, 80)}}, None, "ix_automobiliai_vietos_kaina"),
+    ({"ranges": {"rida": (None, 50000)}}, None, "ix_automobiliai_rida"),
+    ({}, "kaina_parai", "ix_automobiliai_kaina"),
+])
+def test_search_query_plan_uses_index(db_session, filters, sort, index):
+    """
+    Query-plan regression test for the common search combinations.
+    EXPLAIN must show the composite/sort index (SQLite: in the plan, MySQL: among the keys).
+    """
+    query = car_repo.apply_search_filters(db_session.query(Car.automobilio_id), **filters)
+    if sort:
+        query = keyset(query, (getattr(Car, sort), Car.automobilio_id)).limit(20)
+    bind = db_session.get_bind()
+    sql = str(query.statement.compile(bind, compile_kwargs={"literal_binds": True}))
+    if bind.dialect.name == "sqlite":
+        plan = " ".join(str(row[-1]) for row in db_session.execute(text("EXPLAIN QUERY PLAN " + sql)))
+    else:
+        plan = " ".join(
+            f"{row['possible_keys']} {row['key']}"
+            for row in db_session.execute(text("EXPLAIN " + sql)).mappings()
+        )
+    assert index in plan
+
+def test_availability_calendar(client, db_session, created_car_id):
+    """
+    Test the availability calendar.
+    A reservation of the test car lowers the free count of its body type
+    exactly on the reserved days (end date exclusive); too long ranges are rejected.
+    """
+    from datetime import date
+    from app.models.reservation import Reservation
+    params = {"date_from": "2031-01-01", "date_to": "2031-01-08", "group_by": "kebulo_tipas"}
+    before = client.get("/api/v1/cars/availability-calendar", params=params).json()
+    row = before["groups"].index("Sedanas")
+    assert before["free"][row] == [before["totals"][row]] * 7
+
+    reservation = Reservation(automobilio_id=created_car_id, rezervacijos_pradzia=date(2031, 1, 3),
+                              rezervacijos_pabaiga=date(2031, 1, 5), busena="patvirtinta")
+    db_session.add(reservation)
+    db_session.flush()
+    after = client.get("/api/v1/cars/availability-calendar", params=params).json()
+    total = before["totals"][row]
+    assert after["free"][row] == [total, total, total - 1, total - 1, total, total, total]
+    db_session.delete(reservation)
+    db_session.flush()
+
+    resp = client.get("/api/v1/cars/availability-calendar", params={"date_from": "2031-01-01", "date_to": "2032-06-01"})
+    assert resp.status_code == 400
+
+def test_cancelled_reservation_does_not_block(client, db_session, created_car_id):
+    """
+    Test that a cancelled reservation leaves the car in /cars/available,
+    both from the in-memory bitmaps and from the SQL fallback outside their horizon.
+    """
+    from datetime import date, timedelta
+    from app.models.reservation import Reservation
+    from app.services.availability import availability_index
+    start = date.today() + timedelta(days=30)
+    ranges = [(start, start + timedelta(days=3)), (date(2031, 2, 1), date(2031, 2, 4))]
+    reservations = [
+        Reservation(automobilio_id=created_car_id, rezervacijos_pradzia=a, rezervacijos_pabaiga=b, busena="atšaukta")
+        for a, b in ranges
+    ]
+    db_session.add_all(reservations)
+    db_session.flush()
+    availability_index.invalidate()
+    try:
+        for a, b in ranges:
+            resp = client.get("/api/v1/cars/available", params={"date_from": str(a), "date_to": str(b)})
+            assert resp.status_code == 200
+            assert created_car_id in [car["automobilio_id"] for car in resp.json()]
+    finally:
+        for reservation in reservations:
+            db_session.delete(reservation)
+        db_session.flush()
+        availability_index.invalidate()
+
+def test_get_car_conditional(client, created_car_id):
+    """
+    Test conditional GET on a car.
+    A repeated request with the returned ETag gets 304 without a body;
+    after a successful update the ETag changes and the full car is returned again.
+    """
+    url = f"/api/v1/cars/{created_car_id}"
+    resp = client.get(url)
+    etag = resp.headers["etag"]
+    assert etag.startswith('W/"')
+    assert "last-modified" in resp.headers
+
+    resp = client.get(url, headers={"If-None-Match": etag})
+    assert resp.status_code == 304
+    assert resp.content == b""
+
+    resp = client.put(url, json={"rida": 12345})
+    assert resp.status_code == 200
+
+    resp = client.get(url, headers={"If-None-Match": etag})
+    assert resp.status_code == 200
+    assert resp.headers["etag"] != etag
+
 def test_delete_car(client, ensure_place_exists):
     """
     Test creating and then deleting a car.
@@ -14,6 +14,9 @@ Usage:
 """
 
 import pytest
+from datetime import date
+
+from app.models import Invoice, Order
 
 CLIENT_SAMPLE = {
     "vardas": "Testas",
@@ -105,6 +108,59 @@ def test_get_client_not_found(client):
     assert resp.json()["detail"] == "Client not found"
 
 
+def test_get_client_stats(client, created_client_id):
+    """
+    Test reading the precomputed statistics of a client without orders.
+    Expects zero counts and a 404 for a non-existent client.
+    """
+    resp = client.get(f"/api/v1/clients/{created_client_id}/stats")
+    assert resp.status_code == 200
+    stats = resp.json()
+    assert stats["kliento_id"] == created_client_id
+    assert stats["uzsakymu_skaicius"] == 0
+    assert stats["loyalty_eligible"] is False
+    assert client.get("/api/v1/clients/999999/stats").status_code == 404
+
+
+def test_get_client_order_history(client, db_session, created_client_id):
+    """
+    Test paging through a client's order history (newest first).
+    Checks the invoice columns of the joined query, the next page cursor,
+    that the last page has no X-Next-Cursor header and that a new invoice
+    changes the ETag.
+    """
+    orders = [Order(kliento_id=created_client_id, nuomos_data=date(2025, 1, day), bendra_kaina=10.0 * day,
+                    uzsakymo_busena="užbaigta") for day in (1, 2, 3)]
+    db_session.add_all(orders)
+    db_session.flush()
+    db_session.add(Invoice(uzsakymo_id=orders[2].uzsakymo_id, suma=30.0, saskaitos_data=date(2025, 1, 4)))
+    db_session.commit()
+
+    resp = client.get(f"/api/v1/clients/{created_client_id}/orders/history?limit=2")
+    assert resp.status_code == 200
+    page = resp.json()
+    assert [o["uzsakymo_id"] for o in page] == [orders[2].uzsakymo_id, orders[1].uzsakymo_id]
+    assert page[0]["saskaitos_suma"] == 30.0
+    assert page[1]["saskaitos_id"] is None
+    assert "links" in page[0]
+
+    cursor = resp.headers["X-Next-Cursor"]
+    resp = client.get(f"/api/v1/clients/{created_client_id}/orders/history?limit=2&cursor={cursor}")
+    assert [o["uzsakymo_id"] for o in resp.json()] == [orders[0].uzsakymo_id]
+    assert "X-Next-Cursor" not in resp.headers
+
+    # Nauja sąskaita keičia ETag – klientas negauna 304 su senais sąskaitos laukais
+    url = f"/api/v1/clients/{created_client_id}/orders/history?limit=2"
+    etag = client.get(url).headers["etag"]
+    db_session.add(Invoice(uzsakymo_id=orders[1].uzsakymo_id, suma=20.0, saskaitos_data=date(2025, 1, 3)))
+    db_session.commit()
+    resp = client.get(url, headers={"If-None-Match": etag})
+    assert resp.status_code == 200
+    assert resp.json()[1]["saskaitos_suma"] == 20.0
+
+    assert client.get("/api/v1/clients/999999/orders/history").status_code == 404
+
+
 def test_delete_client(client):
     """
     Test creating and then deleting a client.
@@ -0,0 +1,82 @@
+﻿"""
+Tests for the response compression middleware.
+
+Description:
+    Uses a minimal FastAPI app wrapped in CompressionMiddleware, so the
+    tests do not depend on the database contents.
+
+Usage:
+    pytest tests/api/test_compression.py
+"""
+
+import pytest
+from fastapi import FastAPI
+from fastapi.responses import JSONResponse, StreamingResponse
+from fastapi.testclient import TestClient
+
+from app.middleware import compression
+from app.middleware.compression import CompressionMiddleware
+
+PAYLOAD = {"items": ["automobilis"] * 500}
+
+
+@pytest.fixture(scope="module")
+def small_app():
+    """Creates a FastAPI app with a large, a small and a streaming endpoint."""
+    app = FastAPI()
+    app.add_middleware(CompressionMiddleware, minimum_size=1024)
+
+    @app.get("/large")
+    def large():
+        return JSONResponse(PAYLOAD)
+
+    @app.get("/small")
+    def small():
+        return JSONResponse({"ok": True})
+
+    @app.get("/stream")
+    def stream():
+        return StreamingResponse((b"eilute\n" for _ in range(1000)), media_type="text/csv")
+
+    return TestClient(app)
+
+def test_gzip_above_threshold(small_app):
+    """
+    Tests that a response above the size threshold is gzip-encoded
+    and decodes back to the same JSON.
+    """
+    resp = small_app.get("/large", headers={"Accept-Encoding": "gzip"})
+    assert resp.headers["content-encoding"] == "gzip"
+    assert "Accept-Encoding" in resp.headers["vary"]
+    assert resp.json() == PAYLOAD
+
+def test_small_response_not_compressed(small_app):
+    """
+    Tests that responses below the threshold are sent unchanged.
+    """
+    resp = small_app.get("/small", headers={"Accept-Encoding": "gzip"})
+    assert "content-encoding" not in resp.headers
+    assert resp.json() == {"ok": True}
+
+def test_identity_when_not_accepted(small_app):
+    """
+    Tests that nothing is compressed when the client does not accept gzip or br.
+    """
+    resp = small_app.get("/large", headers={"Accept-Encoding": "identity"})
+    assert "content-encoding" not in resp.headers
+
+def test_streaming_response_compressed(small_app):
+    """
+    Tests chunked compression of a streaming response (no Content-Length).
+    """
+    resp = small_app.get("/stream", headers={"Accept-Encoding": "gzip"})
+    assert resp.headers["content-encoding"] == "gzip"
+    assert resp.text == "eilute\n" * 1000
+
+@pytest.mark.skipif(compression.brotli is None, reason="brotli not installed")
+def test_brotli_preferred(small_app):
+    """
+    Tests that brotli is preferred over gzip when both are accepted.
+    """
+    resp = small_app.get("/large", headers={"Accept-Encoding": "gzip, br"})
+    assert resp.headers["content-encoding"] == "br"
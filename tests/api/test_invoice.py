@@ -14,6 +14,9 @@ from uuid import uuid4
 
 from app.api.deps import get_db
 from app.models import Location
+from app.repositories import invoice as crud_invoice
+from app.schemas.invoice import InvoiceCreate
+from sqlalchemy.exc import IntegrityError
 
 client = TestClient(app)
 
@@ -189,6 +192,36 @@ def test_create_invoice(example_invoice_data):
     assert float(data["total"]) == example_invoice_data["total"]
     assert data["invoice_date"] == example_invoice_data["invoice_date"]
 
+def test_duplicate_invoice_rejected(example_invoice_data):
+    """
+    Tests that an order gets only one invoice: a second POST is rejected and
+    the unique index stops an insert that skips the endpoint check.
+    """
+    assert client.post("/api/v1/invoices/", json=example_invoice_data).status_code in [200, 201]
+    assert client.post("/api/v1/invoices/", json=example_invoice_data).status_code == 400
+
+    db = next(get_db())
+    try:
+        with pytest.raises(IntegrityError):
+            crud_invoice.create_invoice(db, InvoiceCreate(**example_invoice_data))
+    finally:
+        db.close()
+
+def test_create_invoice_order_not_found(example_invoice_data):
+    """
+    Tests that an invoice for a missing order is rejected with 404 before any
+    background job is queued.
+    """
+    from app.models import Job
+    db = next(get_db())
+    try:
+        before = db.query(Job.uzduoties_id).count()
+        response = client.post("/api/v1/invoices/", json=dict(example_invoice_data, order_id=99999999))
+        assert response.status_code == 404
+        assert db.query(Job.uzduoties_id).count() == before
+    finally:
+        db.close()
+
 def test_get_all_invoices():
     """
     Tests retrieving all invoices via GET /invoices/ endpoint.
@@ -245,3 +278,55 @@ def test_delete_invoice(prepared_order):
     get_resp = client.get("/api/v1/invoices/")
     ids = [inv["invoice_id"] for inv in get_resp.json()]
     assert invoice_id not in ids
+
+
+def test_get_invoice_pdf(prepared_order):
+    """
+    Tests downloading an invoice as PDF via GET /invoices/{invoice_id}/pdf.
+    The second request is served from the disk cache (same file), and a
+    changed invoice gets a newly rendered file.
+    """
+    invoice_resp = client.post("/api/v1/invoices/", json={
+        "order_id": prepared_order,
+        "total": 88.5,
+        "invoice_date": "2024-06-01"
+    })
+    invoice_id = invoice_resp.json()["invoice_id"]
+
+    first = client.get(f"/api/v1/invoices/{invoice_id}/pdf")
+    assert first.status_code == 200
+    assert first.headers["content-type"] == "application/pdf"
+    assert first.content.startswith(b"%PDF-1.4")
+    assert first.content.rstrip().endswith(b"%EOF")
+
+    second = client.get(f"/api/v1/invoices/{invoice_id}/pdf")
+    assert second.content == first.content
+
+    client.patch(f"/api/v1/invoices/{invoice_id}/status", json={"status": "užbaigta"})
+    changed = client.get(f"/api/v1/invoices/{invoice_id}/pdf")
+    assert changed.status_code == 200
+    assert changed.content != first.content
+
+    assert client.get("/api/v1/invoices/999999/pdf").status_code == 404
+
+
+def test_generate_invoices(prepared_order):
+    """
+    Tests the month-end run POST /invoices/generate: a completed order without
+    an invoice gets one with the order price, and a repeated run creates none.
+    """
+    resp = client.patch("/api/v1/orders/status", json={"ids": [prepared_order], "status": "užbaigta"})
+    assert resp.status_code == 200
+
+    first = client.post("/api/v1/invoices/generate", params={"invoice_date": "2024-06-30"})
+    assert first.status_code == 200
+    assert first.json()["created"] >= 1
+    assert first.json()["invoice_date"] == "2024-06-30"
+
+    invoices = [inv for inv in client.get("/api/v1/invoices/").json() if inv["order_id"] == prepared_order]
+    assert len(invoices) == 1
+    assert invoices[0]["total"] == 100.0
+    assert invoices[0]["invoice_date"] == "2024-06-30"
+
+    second = client.post("/api/v1/invoices/generate", params={"invoice_date": "2024-06-30"})
+    assert second.json()["created"] == 0
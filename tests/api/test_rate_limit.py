@@ -0,0 +1,67 @@
+﻿"""
+Tests for the token-bucket rate limit middleware.
+
+Description:
+    Uses a minimal FastAPI app with its own limiter, so the tests do not
+    depend on the configured rules or the database.
+
+Usage:
+    pytest tests/api/test_rate_limit.py
+"""
+
+import pytest
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+
+from app.middleware.rate_limit import RateLimitMiddleware
+from app.services import token_service
+from app.services.rate_limiter import TokenBucketLimiter
+
+
+@pytest.fixture
+def limited_client():
+    """Creates an app where only the "heavyReport" operation is limited to 2 requests per minute."""
+    app = FastAPI()
+    app.add_middleware(RateLimitMiddleware, limiter=TokenBucketLimiter({"heavyReport": (2, 60)}))
+
+    @app.get("/report", operation_id="heavyReport")
+    def report():
+        return {"ok": True}
+
+    @app.get("/light", operation_id="light")
+    def light():
+        return {"ok": True}
+
+    return TestClient(app)
+
+
+def test_limit_per_operation(limited_client):
+    """
+    Tests that the third request within the period gets 429 with Retry-After,
+    while unlimited operations are not affected.
+    """
+    first = limited_client.get("/report")
+    assert first.status_code == 200
+    assert first.headers["X-RateLimit-Limit"] == "2"
+    assert first.headers["X-RateLimit-Remaining"] == "1"
+    assert limited_client.get("/report").status_code == 200
+
+    blocked = limited_client.get("/report")
+    assert blocked.status_code == 429
+    assert int(blocked.headers["Retry-After"]) >= 1
+
+    light = limited_client.get("/light")
+    assert light.status_code == 200
+    assert "X-RateLimit-Limit" not in light.headers
+
+
+def test_limit_per_principal(limited_client):
+    """
+    Tests that each token subject has its own bucket, separate from anonymous callers.
+    """
+    token = token_service.create_access_token({"sub": "partneris@example.com"})
+    auth = {"Authorization": f"Bearer {token}"}
+    for _ in range(2):
+        assert limited_client.get("/report").status_code == 200
+    assert limited_client.get("/report").status_code == 429
+    assert limited_client.get("/report", headers=auth).status_code == 200
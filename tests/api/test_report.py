@@ -0,0 +1,100 @@
+﻿"""
+API endpoint tests for aggregate reports.
+
+Description:
+    Integration tests for GET /api/v1/reports/revenue: grouping by month and
+    by client, the date range, and caching of closed periods.
+
+Usage:
+    pytest tests/api/test_report.py
+"""
+
+from datetime import date
+from uuid import uuid4
+
+import pytest
+from fastapi.testclient import TestClient
+
+from app.api.deps import get_db
+from app.main import app
+from app.models import Client, Invoice, Order
+
+client = TestClient(app)
+
+@pytest.fixture(scope="module")
+def invoices_2001():
+    """
+    Creates a client with three invoiced orders in January and February 2001
+    (a closed period no other test uses), removed afterwards.
+    """
+    db = next(get_db())
+    klientas = Client(vardas="Ataskaitos", pavarde="Klientas", el_pastas=f"report{uuid4().hex[:8]}@viko.lt")
+    db.add(klientas)
+    db.flush()
+    amounts = ((100.0, date(2001, 1, 5)), (50.5, date(2001, 1, 20)), (20.0, date(2001, 2, 3)))
+    orders = [Order(kliento_id=klientas.kliento_id, bendra_kaina=suma, uzsakymo_busena="užbaigta")
+              for suma, _ in amounts]
+    db.add_all(orders)
+    db.flush()
+    invoices = [
+        Invoice(uzsakymo_id=order.uzsakymo_id, suma=suma, saskaitos_data=day)
+        for order, (suma, day) in zip(orders, amounts)
+    ]
+    db.add_all(invoices)
+    db.commit()
+    yield klientas.kliento_id
+    for invoice in invoices:
+        db.delete(invoice)
+    for order in orders:
+        db.delete(order)
+    db.delete(klientas)
+    db.commit()
+
+def test_revenue_by_month(invoices_2001):
+    """
+    Tests that invoice amounts are summed per month within the range, that
+    a closed period is cached and revalidated with an ETag, and that a
+    changed invoice in the closed period is not hidden by the cache.
+    """
+    params = {"group_by": "month", "from": "2001-01-01", "to": "2001-02-28"}
+    response = client.get("/api/v1/reports/revenue", params=params)
+    assert response.status_code == 200
+    assert response.json() == [
+        {"key": "2001-01", "label": None, "revenue": 150.5, "invoices": 2},
+        {"key": "2001-02", "label": None, "revenue": 20.0, "invoices": 1},
+    ]
+    assert "immutable" not in response.headers["cache-control"]
+    etag = response.headers["etag"]
+
+    cached = client.get("/api/v1/reports/revenue", params=params)
+    assert cached.content == response.content
+    assert client.get("/api/v1/reports/revenue", params=params, headers={"If-None-Match": etag}).status_code == 304
+
+    db = next(get_db())
+    invoice = db.query(Invoice).filter(Invoice.saskaitos_data == date(2001, 2, 3)).one()
+    invoice.suma = 25.0
+    db.commit()
+    try:
+        changed = client.get("/api/v1/reports/revenue", params=params, headers={"If-None-Match": etag})
+        assert changed.status_code == 200
+        assert changed.json()[1]["revenue"] == 25.0
+    finally:
+        invoice.suma = 20.0
+        db.commit()
+        db.close()
+
+    january = client.get("/api/v1/reports/revenue", params={"group_by": "day", "from": "2001-01-01", "to": "2001-01-31"})
+    assert [row["key"] for row in january.json()] == ["2001-01-05", "2001-01-20"]
+
+def test_revenue_by_client(invoices_2001):
+    """
+    Tests grouping by client with the client's name as the label, and
+    rejection of an inverted date range.
+    """
+    response = client.get("/api/v1/reports/revenue", params={"group_by": "client", "from": "2001-01-01", "to": "2001-12-31"})
+    assert response.json() == [
+        {"key": invoices_2001, "label": "Ataskaitos Klientas", "revenue": 170.5, "invoices": 3},
+    ]
+
+    bad = client.get("/api/v1/reports/revenue", params={"from": "2001-02-01", "to": "2001-01-01"})
+    assert bad.status_code == 400
@@ -141,4 +141,86 @@ def test_delete_reservation(example_reservation_data):
     assert del_resp.status_code in [200, 204]
     get_all = client.get("/api/v1/reservations/").json()
     ids = [r["rezervacijos_id"] for r in get_all]
-    assert res_id not in ids
\ No newline at end of file
+    assert res_id not in ids
+
+def test_create_reservation_idempotent(example_reservation_data):
+    """
+    Tests that a retry with the same Idempotency-Key returns the first
+    response without creating another reservation, and that reusing the key
+    for a different body is rejected.
+    """
+    headers = {"Idempotency-Key": f"rez-{uuid4().hex}"}
+    before = len(client.get("/api/v1/reservations/").json())
+    first = client.post("/api/v1/reservations/", json=example_reservation_data, headers=headers)
+    retry = client.post("/api/v1/reservations/", json=example_reservation_data, headers=headers)
+    assert first.status_code == 200
+    assert retry.status_code == 200
+    assert retry.headers["Idempotent-Replayed"] == "true"
+    assert retry.json() == first.json()
+
+    assert len(client.get("/api/v1/reservations/").json()) == before + 1
+
+    other = dict(example_reservation_data, rezervacijos_pabaiga="2024-06-05")
+    assert client.post("/api/v1/reservations/", json=other, headers=headers).status_code == 422
+
+def test_failed_idempotent_request_can_be_retried(example_reservation_data, monkeypatch):
+    """
+    Tests that a request failing after the reservation was created leaves
+    neither the reservation nor the key behind, and that a key stuck without
+    a response longer than the lease is retried instead of answered with 409.
+    """
+    from datetime import datetime, timedelta
+    from app.api import idempotency
+    from app.api.v1.endpoints import reservation as reservation_endpoint
+    from app.models.idempotency_key import IdempotencyKey
+
+    headers = {"Idempotency-Key": f"rez-{uuid4().hex}"}
+    before = len(client.get("/api/v1/reservations/").json())
+
+    def fail(*args, **kwargs):
+        raise RuntimeError("links failed")
+
+    with monkeypatch.context() as m:
+        m.setattr(reservation_endpoint, "generate_links", fail)
+        with pytest.raises(RuntimeError):
+            client.post("/api/v1/reservations/", json=example_reservation_data, headers=headers)
+    assert len(client.get("/api/v1/reservations/").json()) == before
+    assert client.post("/api/v1/reservations/", json=example_reservation_data, headers=headers).status_code == 200
+
+    stale = {"Idempotency-Key": f"rez-{uuid4().hex}"}
+    db = next(get_db())
+    try:
+        db.add(IdempotencyKey(
+            subjektas="ip:testclient", raktas=stale["Idempotency-Key"], operacija="createReservation",
+            uzklausos_maisa="-",
+            sukurta=datetime.utcnow() - timedelta(seconds=idempotency.IDEMPOTENCY_LEASE_SECONDS + 1),
+        ))
+        db.commit()
+    finally:
+        db.close()
+    assert client.post("/api/v1/reservations/", json=example_reservation_data, headers=stale).status_code == 200
+
+def test_create_reservations_batch(example_reservation_data):
+    """
+    Tests batch creation: non-overlapping items are created, items overlapping
+    an existing reservation or an earlier item are reported as conflicts and
+    an empty date range is invalid.
+    """
+    existing = client.post("/api/v1/reservations/", json=example_reservation_data).json()
+    item = lambda start, end: dict(example_reservation_data, rezervacijos_pradzia=start, rezervacijos_pabaiga=end)
+    response = client.post("/api/v1/reservations/batch", json={"items": [
+        item("2024-06-10", "2024-06-12"),
+        item("2024-06-02", "2024-06-05"),
+        item("2024-06-11", "2024-06-13"),
+        item("2024-06-20", "2024-06-20"),
+        item("2024-06-12", "2024-06-14"),
+    ]})
+    assert response.status_code == 200
+    data = response.json()
+    assert [i["status"] for i in data["items"]] == ["created", "conflict", "conflict", "invalid", "created"]
+    assert data["created"] == 2 and data["rejected"] == 3
+    assert data["items"][1]["conflicts_with"] == [existing["rezervacijos_id"]]
+    assert data["items"][2]["conflicts_with_items"] == [0]
+
+    created = client.get(f"/api/v1/reservations/{data['items'][4]['rezervacijos_id']}").json()
+    assert created["rezervacijos_pradzia"] == "2024-06-12"
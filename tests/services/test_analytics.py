@@ -0,0 +1,75 @@
+﻿"""
+Unit tests for the columnar analytics snapshot (analytics.py).
+
+Description:
+    - a snapshot writes the tables to Parquet and becomes current
+    - utilization, revenue and cohorts are computed from the snapshot
+    - a fresh snapshot is not taken again
+
+Usage:
+    pytest tests/services/test_analytics.py
+"""
+
+import uuid
+from datetime import date, datetime, timedelta
+
+import pytest
+
+from app.models import Client, Invoice, Order
+from app.services import analytics
+
+NOW = datetime(2035, 6, 1, 12, 0)
+
+@pytest.fixture
+def snapshot_dir(tmp_path, monkeypatch):
+    monkeypatch.setattr(analytics, "ANALYTICS_DIR", tmp_path)
+    return tmp_path
+
+def test_snapshot_queries(db_session, snapshot_dir, make_car):
+    """
+    Tests the queries on one car rented 5 of 10 days in March 2035 by a client
+    who ordered again two months later.
+    """
+    car = make_car(kaina_parai=30)
+    suffix = uuid.uuid4().hex[:8]
+    client = Client(vardas="Ana", pavarde="Litikas", el_pastas=f"analytics{suffix}@test.lt")
+    db_session.add(client)
+    db_session.flush()
+    first = Order(kliento_id=client.kliento_id, automobilio_id=car.automobilio_id, nuomos_data=date(2035, 3, 1),
+                  grazinimo_data=date(2035, 3, 5), bendra_kaina=150.0, uzsakymo_busena="užbaigta")
+    again = Order(kliento_id=client.kliento_id, automobilio_id=car.automobilio_id, nuomos_data=date(2035, 5, 2),
+                  grazinimo_data=date(2035, 5, 3), bendra_kaina=60.0, uzsakymo_busena="užbaigta")
+    db_session.add_all([first, again])
+    db_session.flush()
+    db_session.add_all([
+        Invoice(uzsakymo_id=first.uzsakymo_id, suma=150.0, saskaitos_data=date(2035, 3, 5)),
+        Invoice(uzsakymo_id=again.uzsakymo_id, suma=60.0, saskaitos_data=date(2035, 5, 3)),
+    ])
+    db_session.commit()
+
+    counts = analytics.take_snapshot(db_session, NOW)
+    assert counts["orders"] >= 2 and counts["invoices"] >= 2
+    assert analytics.snapshot_info()["taken_at"] == NOW
+
+    utilization = {row["automobilio_id"]: row for row in analytics.utilization(date(2035, 3, 1), date(2035, 3, 10))}
+    assert utilization[car.automobilio_id]["rented_days"] == 5
+    assert utilization[car.automobilio_id]["utilization"] == 0.5
+
+    assert analytics.revenue(date(2035, 1, 1), date(2035, 12, 31), "month") == [
+        {"period": "2035-03", "revenue": 150.0, "invoices": 1, "average": 150.0},
+        {"period": "2035-05", "revenue": 60.0, "invoices": 1, "average": 60.0},
+    ]
+
+    cohort = next(row for row in analytics.cohorts(3) if row["cohort"] == "2035-03")
+    assert cohort["clients"] == 1 and cohort["revenue"] == 210.0
+    assert cohort["retention"] == [1.0, 0.0, 1.0]
+
+def test_snapshot_if_stale(db_session, snapshot_dir):
+    """
+    Tests that a snapshot is taken only when the current one is older than the interval.
+    """
+    assert analytics.snapshot_if_stale(db_session, NOW) is not None
+    assert analytics.snapshot_if_stale(db_session, NOW + timedelta(minutes=1)) is None
+    later = NOW + timedelta(minutes=analytics.ANALYTICS_SNAPSHOT_MINUTES)
+    assert analytics.snapshot_if_stale(db_session, later) is not None
+    assert analytics.current_snapshot() == later.strftime("%Y%m%dT%H%M%S%f")
@@ -0,0 +1,62 @@
+﻿"""
+Unit tests for the in-memory reservation bitmaps (availability.py).
+
+Description:
+    - busy cars and busy days in a range, end date exclusive
+    - overlapping reservations count each day once, status filters
+    - reservation updates and deletes
+    - ranges outside the horizon
+
+Usage:
+    pytest tests/services/test_availability.py
+"""
+
+from datetime import date
+
+from app.services.availability import AvailabilityIndex
+
+START = date(2030, 1, 1)
+
+def make_index():
+    """Index over 2030-01-01 .. 2030-03-01 with three reservations of two cars."""
+    index = AvailabilityIndex(past_days=0, future_days=59)
+    index.load(START, [
+        (1, 10, date(2030, 1, 5), date(2030, 1, 8), "patvirtinta"),
+        (2, 10, date(2030, 1, 7), date(2030, 1, 10), "laukia"),
+        (3, 20, date(2029, 12, 20), date(2030, 1, 3), "patvirtinta"),
+    ])
+    return index
+
+def test_busy_cars_and_days():
+    """
+    Tests busy car lookup and busy day counts, including overlapping
+    reservations of one car and the status filter.
+    """
+    index = make_index()
+    assert index.busy_car_ids(None, date(2030, 1, 1), date(2030, 1, 5)) == [20]
+    assert sorted(index.busy_car_ids(None, date(2030, 1, 2), date(2030, 1, 6))) == [10, 20]
+    assert index.busy_car_ids(None, date(2030, 1, 10), date(2030, 1, 20)) == []
+
+    assert index.used_days(None, date(2030, 1, 1), date(2030, 1, 31)) == {10: 5, 20: 2}
+    assert index.used_days(None, date(2030, 1, 1), date(2030, 1, 31), ["patvirtinta"]) == {10: 3, 20: 2}
+
+def test_updates_and_deletes():
+    """
+    Tests that replacing and removing reservations updates the bitmaps,
+    and that new cars get rows.
+    """
+    index = make_index()
+    index.apply(2, 10, date(2030, 2, 1), date(2030, 2, 3), "laukia")
+    index.remove(3)
+    for car_id in range(100, 200):
+        index.apply(car_id, car_id, date(2030, 1, 15), date(2030, 1, 16), "patvirtinta")
+    assert index.used_days(None, date(2030, 1, 1), date(2030, 1, 14)) == {10: 3}
+    assert len(index.busy_car_ids(None, date(2030, 1, 15), date(2030, 1, 16))) == 100
+
+def test_outside_horizon():
+    """
+    Tests that ranges outside the horizon return None (callers use SQL).
+    """
+    index = make_index()
+    assert index.busy_car_ids(None, date(2029, 12, 1), date(2030, 1, 5)) is None
+    assert index.used_days(None, date(2030, 2, 20), date(2030, 3, 10)) is None
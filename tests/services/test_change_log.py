@@ -0,0 +1,87 @@
+﻿"""
+Unit tests for the change log and its notifier (change_log.py).
+
+Description:
+    - flushed writes of tracked models create log entries in the same transaction
+    - the database notifier returns only entries of other processes after its start
+    - an entry committed after a later id was read is still delivered
+    - handlers are grouped by resource and remote-only handlers skip local changes
+
+Usage:
+    pytest tests/services/test_change_log.py
+"""
+
+from app.db.session import SessionLocal
+from app.models import Client
+from app.models.change_log import ChangeLog
+from app.services import change_log
+
+def test_flush_writes_entries(db_session):
+    """
+    Tests that inserting and updating a client logs both actions with this
+    process as the origin.
+    """
+    client = Client(vardas="Zurnalas", pavarde="Testas", el_pastas="zurnalas@example.com")
+    db_session.add(client)
+    db_session.flush()
+    client.telefono_nr = "+37060000000"
+    db_session.flush()
+
+    entries = (
+        db_session.query(ChangeLog)
+        .filter(ChangeLog.resursas == "clients", ChangeLog.iraso_id == client.kliento_id)
+        .order_by(ChangeLog.pakeitimo_id)
+        .all()
+    )
+    assert [entry.veiksmas for entry in entries] == ["insert", "update"]
+    assert {entry.saltinis for entry in entries} == {change_log.ORIGIN}
+
+def test_database_notifier_skips_own_entries(db_session):
+    """
+    Tests that the first poll only remembers the position, and later polls
+    return new entries of other origins.
+    """
+    notifier = change_log.DatabaseChangeNotifier(lambda: SessionLocal(bind=db_session.connection()))
+    assert notifier.poll() == []
+
+    table = ChangeLog.__table__
+    db_session.execute(table.insert(), [
+        {"resursas": "cars", "iraso_id": 7, "veiksmas": "update", "saltinis": "kitas:1"},
+        {"resursas": "cars", "iraso_id": 8, "veiksmas": "update", "saltinis": change_log.ORIGIN},
+    ])
+    assert notifier.poll() == [change_log.Change("cars", 7, "update", "kitas:1")]
+    assert notifier.poll() == []
+
+def test_database_notifier_delivers_late_entry(db_session):
+    """
+    Tests that an id skipped by a poll (its transaction committed later)
+    is delivered by a following poll, once.
+    """
+    notifier = change_log.DatabaseChangeNotifier(lambda: SessionLocal(bind=db_session.connection()))
+    notifier.poll()
+    start = notifier.last_id
+
+    table = ChangeLog.__table__
+    db_session.execute(table.insert(), {"pakeitimo_id": start + 2, "resursas": "reservations",
+                                        "iraso_id": 2, "veiksmas": "insert", "saltinis": "kitas:1"})
+    assert notifier.poll() == [change_log.Change("reservations", 2, "insert", "kitas:1")]
+
+    db_session.execute(table.insert(), {"pakeitimo_id": start + 1, "resursas": "reservations",
+                                        "iraso_id": 1, "veiksmas": "insert", "saltinis": "kitas:1"})
+    assert notifier.poll() == [change_log.Change("reservations", 1, "insert", "kitas:1")]
+    assert notifier.poll() == []
+
+def test_dispatch_remote_only():
+    """
+    Tests that handlers receive the changes of their resource and that
+    remote-only handlers ignore changes of this process.
+    """
+    calls = []
+    change_log.on_change("test_resource", lambda changes: calls.append(("all", len(changes))))
+    change_log.on_change("test_resource", lambda changes: calls.append(("remote", len(changes))), remote_only=True)
+    changes = [change_log.Change("test_resource", 1, "insert", "x"), change_log.Change("test_resource", 2, "delete", "x")]
+
+    change_log.dispatch(changes, remote=False)
+    assert calls == [("all", 2)]
+    change_log.dispatch(changes, remote=True)
+    assert calls == [("all", 2), ("all", 2), ("remote", 2)]
@@ -0,0 +1,83 @@
+﻿"""
+Unit tests for the incremental client statistics (client_stats.py).
+
+Description:
+    - order and invoice writes queue a refresh of their client
+    - a refresh aggregates orders, invoices and redeemed bonus points and
+      writes the balance (with the manual adjustment) to `bonus_taskai`
+    - LOYALTY eligibility follows the completed orders
+    - many IDs are split into jobs of CLIENT_STATS_BATCH IDs
+
+Usage:
+    pytest tests/services/test_client_stats.py
+"""
+
+import json
+import uuid
+from datetime import date, datetime
+
+from app.models import BonusUsage, Client, Invoice, Job, Order
+from app.services import client_stats
+
+NOW = datetime(2035, 6, 1, 12, 0)
+
+def test_refresh_after_writes(db_session, make_car):
+    """
+    Tests that writes queue a refresh and the refresh computes the statistics
+    of a client with two completed orders, one cancelled order and one
+    redemption, and writes the balance including the manual adjustment back
+    to `bonus_taskai`.
+    """
+    car = make_car()
+    suffix = uuid.uuid4().hex[:8]
+    client = Client(vardas="Stasys", pavarde="Statistikas", el_pastas=f"stats{suffix}@test.lt",
+                    bonus_korekcija=40)
+    db_session.add(client)
+    db_session.flush()
+    orders = [
+        Order(kliento_id=client.kliento_id, automobilio_id=car.automobilio_id, nuomos_data=date(2035, 1, d),
+              grazinimo_data=date(2035, 1, d + 1), bendra_kaina=price, uzsakymo_busena=status)
+        for d, price, status in ((3, 80.0, "užbaigta"), (10, 45.5, "užbaigta"), (20, 99.0, "atšaukta"))
+    ]
+    db_session.add_all(orders)
+    db_session.flush()
+    db_session.add_all([Invoice(uzsakymo_id=order.uzsakymo_id, suma=order.bendra_kaina,
+                                saskaitos_data=order.grazinimo_data) for order in orders[:2]])
+    db_session.add(BonusUsage(kliento_id=client.kliento_id, uzsakymo_id=orders[1].uzsakymo_id,
+                              panaudoti_taskai=5, nuolaidos_id=1))
+    db_session.commit()
+
+    jobs = db_session.query(Job).filter(Job.tipas == client_stats.REFRESH_JOB).all()
+    assert any(client.kliento_id in client_stats._client_ids(db_session, json.loads(job.duomenys)) for job in jobs)
+
+    assert client_stats.refresh(db_session, [client.kliento_id], NOW) == 1
+    db_session.commit()
+
+    stats = client_stats.get_stats(db_session, client.kliento_id)
+    assert stats["uzsakymu_skaicius"] == 2
+    assert stats["uzbaigti_uzsakymai"] == 2
+    assert stats["islaidos"] == 125.5
+    assert stats["uzdirbti_taskai"] == 12
+    assert stats["panaudoti_taskai"] == 5
+    assert stats["bonus_korekcija"] == 40
+    assert stats["taskai_likutis"] == 47
+    db_session.refresh(client)
+    assert client.bonus_taskai == 47
+    assert stats["pirmas_uzsakymas"] == date(2035, 1, 3)
+    assert stats["paskutinis_uzsakymas"] == date(2035, 1, 10)
+    assert stats["loyalty_eligible"] is False
+    assert client_stats.get_stats(db_session, -1) is None
+
+def test_enqueue_refresh_splits_ids(db_session):
+    """
+    Tests that a refresh of 1200 orders is queued as three jobs of at most
+    CLIENT_STATS_BATCH order IDs.
+    """
+    before = db_session.query(Job.uzduoties_id).filter(Job.tipas == client_stats.REFRESH_JOB).count()
+    client_stats.enqueue_refresh(db_session, orders=range(10_000_001, 10_001_201))
+    jobs = (
+        db_session.query(Job).filter(Job.tipas == client_stats.REFRESH_JOB)
+        .order_by(Job.uzduoties_id).offset(before).all()
+    )
+    sizes = [len(json.loads(job.duomenys)["orders"]) for job in jobs]
+    assert sizes == [500, 500, 200]
@@ -0,0 +1,110 @@
+﻿"""
+Unit tests for the database-backed job queue (job_queue.py).
+
+Description:
+    - enqueued jobs are run by a worker and marked done
+    - failing jobs are retried with backoff and marked failed after the last attempt
+    - a running job whose visibility timeout passed is taken again
+    - a job of a slow batch taken by another worker is not run twice
+
+Usage:
+    pytest tests/services/test_job_queue.py
+"""
+
+from datetime import datetime, timedelta
+
+from app.db.session import SessionLocal
+from app.services import job_queue
+
+NOW = datetime(2031, 1, 1, 12, 0)
+calls = []
+
+@job_queue.task("test.record")
+def record(db, payload):
+    calls.append(payload["n"])
+
+@job_queue.task("test.fail")
+def fail(db, payload):
+    raise RuntimeError("boom")
+
+def sessions(db_session):
+    """Session factory sharing the test transaction."""
+    return lambda: SessionLocal(bind=db_session.connection())
+
+def states(db_session, *jobs):
+    db_session.expire_all()
+    return [(job.busena, job.bandymai) for job in jobs]
+
+def test_run_and_retry(db_session):
+    """
+    Tests that a job runs once and is done, and that a failing job is retried
+    after its backoff and marked failed after max attempts.
+    """
+    ok = job_queue.enqueue(db_session, "test.record", {"n": 1})
+    bad = job_queue.enqueue(db_session, "test.fail", {}, max_attempts=2)
+    db_session.commit()
+    ok.paleisti_po = bad.paleisti_po = NOW
+    db_session.commit()
+
+    job_queue.run_pending(sessions(db_session), limit=100, now=NOW)
+    assert calls == [1]
+    assert states(db_session, ok, bad) == [("atlikta", 1), ("laukia", 1)]
+    assert "boom" in bad.klaida
+
+    # Backoff dar nepraėjo – nieko nevykdoma
+    job_queue.run_pending(sessions(db_session), limit=100, now=NOW + timedelta(seconds=1))
+    assert states(db_session, bad) == [("laukia", 1)]
+
+    job_queue.run_pending(sessions(db_session), limit=100, now=NOW + timedelta(hours=1))
+    assert states(db_session, ok, bad) == [("atlikta", 1), ("klaida", 2)]
+    assert calls == [1]
+
+def test_visibility_timeout(db_session):
+    """
+    Tests that a claimed job is not taken again before its visibility timeout
+    and is taken again after it, and that the stale attempt cannot finish it.
+    """
+    job = job_queue.enqueue(db_session, "test.record", {"n": 2})
+    db_session.commit()
+    job.paleisti_po = NOW
+    db_session.commit()
+
+    first = sessions(db_session)()
+    claimed = [row for row in job_queue.claim(first, limit=100, now=NOW) if row[0] == job.uzduoties_id]
+    assert len(claimed) == 1
+    assert not any(row[0] == job.uzduoties_id for row in job_queue.claim(first, limit=100, now=NOW))
+
+    later = NOW + timedelta(seconds=job_queue.JOB_VISIBILITY_SECONDS + 1)
+    again = [row for row in job_queue.claim(first, limit=100, now=later) if row[0] == job.uzduoties_id]
+    assert again[0][3] == 2
+
+    job_queue.execute(sessions(db_session), claimed[0], now=later)
+    assert states(db_session, job) == [("vykdoma", 2)]
+    job_queue.execute(sessions(db_session), again[0], now=later)
+    assert states(db_session, job) == [("atlikta", 2)]
+
+def test_slow_batch_does_not_run_retaken_job(db_session):
+    """
+    Tests that when the first job of a batch runs past the visibility timeout
+    and another worker takes the rest of the batch, the first worker skips
+    the job it no longer owns.
+    """
+    later = NOW + timedelta(seconds=job_queue.JOB_VISIBILITY_SECONDS + 1)
+    taken = []
+
+    @job_queue.task("test.slow")
+    def slow(db, payload):
+        # Kitas workeris paima užduotis, kurių matomumo laikas jau praėjo
+        taken.extend(job_queue.claim(sessions(db_session)(), limit=100, now=later))
+
+    first = job_queue.enqueue(db_session, "test.slow", {})
+    second = job_queue.enqueue(db_session, "test.record", {"n": 3})
+    db_session.commit()
+    first.paleisti_po = second.paleisti_po = NOW
+    db_session.commit()
+
+    assert job_queue.run_pending(sessions(db_session), limit=100, now=NOW) == 1
+    assert 3 not in calls
+    assert any(row[0] == second.uzduoties_id for row in taken)
+    assert states(db_session, second) == [("vykdoma", 2)]
+
@@ -0,0 +1,54 @@
+﻿"""
+Unit tests for the bounded password hashing pool (password_hasher.py).
+
+Description:
+    - hash/verify round trip through the pool
+    - backpressure: PasswordPoolSaturated when workers and queue are full
+    - queueing metrics
+
+Usage:
+    pytest tests/services/test_password_hasher.py
+"""
+
+import asyncio
+import threading
+
+import pytest
+from app.services.password_hasher import PasswordHasher, PasswordPoolSaturated
+
+def test_hash_and_verify_in_pool():
+    """
+    Tests that a password hashed in the pool verifies in the pool
+    and that completed calls are counted in the metrics.
+    """
+    hasher = PasswordHasher(workers=1, max_queue=2)
+
+    async def scenario():
+        hashed = await hasher.hash("SlaptasTestas!@#")
+        return await hasher.verify("SlaptasTestas!@#", hashed), await hasher.verify("blogas", hashed)
+
+    ok, wrong = asyncio.run(scenario())
+    assert ok and not wrong
+    metrics = hasher.metrics()
+    assert metrics["completed"] == 3
+    assert metrics["in_flight"] == 0
+
+def test_pool_rejects_when_saturated():
+    """
+    Tests backpressure: with one worker and no queue, a second call while the
+    first one is running fails immediately with PasswordPoolSaturated.
+    """
+    hasher = PasswordHasher(workers=1, max_queue=0)
+    release = threading.Event()
+
+    async def scenario():
+        first = asyncio.ensure_future(hasher.run(release.wait, 5))
+        await asyncio.sleep(0.05)
+        with pytest.raises(PasswordPoolSaturated) as exc:
+            await hasher.run(len, "x")
+        assert exc.value.retry_after >= 1
+        release.set()
+        assert await first is True
+
+    asyncio.run(scenario())
+    assert hasher.metrics()["rejected"] == 1
@@ -0,0 +1,97 @@
+﻿"""
+Unit tests for the login rate limiter (rate_limiter.py).
+
+Description:
+    - sliding window: old attempts leave the window, Retry-After is computed
+    - LoginGuard: per-IP limit, failed attempts per email, reset after success
+    - a custom store behind the RateLimitStore interface
+    - token buckets of the API limiter
+
+Usage:
+    pytest tests/services/test_rate_limiter.py
+"""
+
+import pytest
+from app.services.rate_limiter import (
+    LoginGuard, MemoryRateLimitStore, RateLimitExceeded, RateLimitStore, SlidingWindowLimiter,
+    TokenBucketLimiter,
+)
+
+class DictStore(RateLimitStore):
+    """Fake shared backend: plain lists of timestamps, counts every call."""
+
+    def __init__(self):
+        self.events = {}
+        self.calls = 0
+
+    def add(self, key, now, window):
+        self.calls += 1
+        self.events.setdefault(key, []).append(now)
+
+    def count(self, key, now, window):
+        self.calls += 1
+        live = [t for t in self.events.get(key, []) if t > now - window]
+        return len(live), (min(live) if live else None)
+
+    def clear(self, key):
+        self.events.pop(key, None)
+
+def test_sliding_window_and_retry_after():
+    """
+    Tests that the limit applies within the window, the Retry-After value
+    points at the moment the oldest attempt expires and the key is free again after it.
+    """
+    limiter = SlidingWindowLimiter(MemoryRateLimitStore(), limit=2, window=60, prefix="t")
+    limiter.hit("a", now=100)
+    limiter.hit("a", now=130)
+    with pytest.raises(RateLimitExceeded) as exc:
+        limiter.check("a", now=140)
+    assert exc.value.retry_after == 20
+    limiter.check("b", now=140)
+    limiter.check("a", now=161)
+
+def test_login_guard_limits_ip_and_failed_email():
+    """
+    Tests that every attempt counts against the IP, only failures count
+    against the email and a successful login clears the email failures.
+    """
+    guard = LoginGuard(MemoryRateLimitStore(), ip_limit=5, ip_window=60, email_limit=2, email_window=300)
+    for _ in range(2):
+        guard.check("10.0.0.1", "Jonas@Example.com")
+        guard.record("jonas@example.com", success=False)
+    with pytest.raises(RateLimitExceeded):
+        guard.check("10.0.0.2", "jonas@example.com")
+
+    guard.by_email.reset("jonas@example.com")
+    guard.check("10.0.0.1", "jonas@example.com")
+    guard.record("jonas@example.com", success=True)
+    guard.check("10.0.0.1", "ona@example.com")
+    guard.check("10.0.0.1", "petras@example.com")
+    with pytest.raises(RateLimitExceeded):
+        guard.check("10.0.0.1", "kitas@example.com")
+
+def test_guard_uses_custom_store():
+    """
+    Tests that LoginGuard works with any RateLimitStore implementation.
+    """
+    store = DictStore()
+    guard = LoginGuard(store, ip_limit=1, ip_window=60, email_limit=1, email_window=60)
+    guard.check("10.0.0.1", "a@b.lt")
+    assert "login-ip:10.0.0.1" in store.events
+    with pytest.raises(RateLimitExceeded):
+        guard.check("10.0.0.1", "a@b.lt")
+    assert store.calls > 0
+
+def test_token_bucket_refills():
+    """
+    Tests that a token bucket allows a burst of `capacity` requests,
+    then refills at capacity / period per second.
+    """
+    limiter = TokenBucketLimiter({"op": (2, 10)})
+    assert limiter.take("u", "op", now=0)[0]
+    assert limiter.take("u", "op", now=0)[0]
+    allowed, _, retry_after = limiter.take("u", "op", now=1)
+    assert not allowed and retry_after == 4
+    assert limiter.take("u", "op", now=6)[0]
+    assert limiter.take("other", "op", now=6)[0]
+    assert limiter.take("u", "unlimited", now=6) == (True, -1, 0)
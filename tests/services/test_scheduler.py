@@ -0,0 +1,64 @@
+﻿"""
+Unit tests for the periodic status transitions (scheduler.py and the repository jobs).
+
+Description:
+    - confirmed reservations past their end become 'baigta', current and
+      pending ones are kept
+    - rented cars are released only without an active reservation
+    - the leader lock is held by one process (every process without MySQL)
+
+Usage:
+    pytest tests/services/test_scheduler.py
+"""
+
+import uuid
+from datetime import date
+
+from app.db.session import engine
+from app.models import Client, Reservation
+from app.repositories import car as car_repo
+from app.repositories import reservation as reservation_repo
+from app.services.scheduler import LeaderLock
+
+TODAY = date(2031, 5, 10)
+
+def test_reservation_and_car_transitions(db_session, make_car):
+    """
+    Tests one run of the reservation and car jobs on a fixed day.
+    """
+    client = Client(vardas="Plan", pavarde="Uotojas", el_pastas=f"sched{uuid.uuid4().hex[:8]}@test.lt")
+    db_session.add(client)
+    returned, rented = make_car(automobilio_statusas="isnuomotas"), make_car(automobilio_statusas="isnuomotas")
+    reservations = [
+        Reservation(kliento_id=client.kliento_id, automobilio_id=returned.automobilio_id,
+                    rezervacijos_pradzia=date(2031, 5, 1), rezervacijos_pabaiga=TODAY, busena="patvirtinta"),
+        Reservation(kliento_id=client.kliento_id, automobilio_id=rented.automobilio_id,
+                    rezervacijos_pradzia=date(2031, 5, 8), rezervacijos_pabaiga=date(2031, 5, 12), busena="patvirtinta"),
+        Reservation(kliento_id=client.kliento_id, automobilio_id=rented.automobilio_id,
+                    rezervacijos_pradzia=date(2031, 5, 9), rezervacijos_pabaiga=date(2031, 5, 20), busena="laukia"),
+    ]
+    db_session.add_all(reservations)
+    db_session.commit()
+
+    assert reservation_repo.finish_expired(db_session, TODAY) >= 1
+    assert car_repo.release_returned(db_session, TODAY) >= 1
+
+    for obj in reservations + [returned, rented]:
+        db_session.refresh(obj)
+    assert [r.busena for r in reservations] == ["baigta", "patvirtinta", "laukia"]
+    assert (returned.automobilio_statusas, rented.automobilio_statusas) == ("laisvas", "isnuomotas")
+
+def test_leader_lock():
+    """
+    Tests that one process holds the lock and another cannot take it on MySQL;
+    databases without GET_LOCK make every process the leader.
+    """
+    name = f"test_lock_{uuid.uuid4().hex[:8]}"
+    first, second = LeaderLock(engine, name), LeaderLock(engine, name)
+    try:
+        assert first.acquire() is True
+        assert first.acquire() is True
+        assert second.acquire() is (engine.dialect.name != "mysql")
+    finally:
+        first.release()
+        second.release()
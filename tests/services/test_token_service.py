@@ -0,0 +1,76 @@
+﻿"""
+Unit tests for the token service (token_service.py).
+
+Description:
+    - key rotation: tokens signed with an older key id stay valid
+    - unknown key ids and refresh tokens are rejected as access tokens
+    - refresh tokens can be used only once (also by another session) and expired ids are purged
+    - verified tokens are served from the cache
+
+Usage:
+    pytest tests/services/test_token_service.py
+"""
+
+import pytest
+from jose import jwt
+from app.models import UsedRefreshToken
+from app.services import token_service
+
+@pytest.fixture
+def rotated_keys(monkeypatch):
+    """Configures two keys, "old" and "new", with "new" active."""
+    monkeypatch.setattr(token_service, "KEYS", {"old": "senas-raktas", "new": "naujas-raktas"})
+    monkeypatch.setattr(token_service, "ACTIVE_KID", "new")
+    token_service.clear_cache()
+    yield
+    token_service.clear_cache()
+
+def test_token_signed_with_previous_key_is_valid(rotated_keys):
+    """
+    Tests that after rotation a token carrying the previous kid still verifies,
+    while new tokens are signed with the active key.
+    """
+    old_token = jwt.encode({"sub": "senas@viko.lt"}, "senas-raktas", algorithm="HS256", headers={"kid": "old"})
+    assert token_service.decode_access_token(old_token)["sub"] == "senas@viko.lt"
+
+    new_token = token_service.create_access_token({"sub": "naujas@viko.lt"})
+    assert jwt.get_unverified_header(new_token)["kid"] == "new"
+    assert token_service.decode_access_token(new_token)["sub"] == "naujas@viko.lt"
+
+def test_unknown_kid_rejected(rotated_keys):
+    """
+    Tests that a token with a key id that is not configured is rejected.
+    """
+    token = jwt.encode({"sub": "x@viko.lt"}, "kitas", algorithm="HS256", headers={"kid": "removed"})
+    with pytest.raises(token_service.TokenError):
+        token_service.decode_access_token(token)
+
+def test_refresh_token_single_use(rotated_keys, db_session):
+    """
+    Tests that a refresh token is not accepted as an access token
+    and can be exchanged only once; the used id is kept until the token expires.
+    """
+    refresh = token_service.create_refresh_token("test@viko.lt")
+    with pytest.raises(token_service.TokenError):
+        token_service.decode_access_token(refresh)
+    assert token_service.use_refresh_token(db_session, refresh) == "test@viko.lt"
+    with pytest.raises(token_service.TokenError):
+        token_service.use_refresh_token(db_session, refresh)
+
+    jti = jwt.get_unverified_claims(refresh)["jti"]
+    assert token_service.purge_used_refresh_tokens(db_session) == 0
+    assert db_session.get(UsedRefreshToken, jti) is not None
+
+def test_verified_token_cached(rotated_keys, monkeypatch):
+    """
+    Tests that a token verified once is served from the cache
+    without decoding it again.
+    """
+    token = token_service.create_access_token({"sub": "test@viko.lt"})
+    token_service.decode_access_token(token)
+
+    def fail(_token):
+        raise AssertionError("token decoded twice")
+
+    monkeypatch.setattr(token_service, "_decode", fail)
+    assert token_service.decode_access_token(token)["sub"] == "test@viko.lt"
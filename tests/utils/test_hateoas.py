@@ -18,7 +18,7 @@ Notes:
 """
 
 import pytest
-from utils.hateoas import generate_links
+from utils.hateoas import LINK_TEMPLATES, LinkTemplate, LinksMode, apply_links, generate_links
 
 def test_generate_basic_links():
     """
@@ -79,3 +79,36 @@ def test_generate_links_duplicate_actions():
     rels = [l['rel'] for l in links]
     # Gali būti du "update"
     assert rels.count("update") == 2
+
+
+def test_link_template_matches_generate_links():
+    """
+    Tests that the precompiled "cars" template yields exactly the same links
+    as generate_links with the update, delete and update_status actions.
+    """
+    expected = generate_links("cars", 7, ["update", "delete", "update_status"])
+    assert LINK_TEMPLATES["cars"].expand({"automobilio_id": 7}) == expected
+
+def test_link_template_requires_single_field():
+    """
+    Tests that a template without a placeholder is rejected at compile time.
+    """
+    with pytest.raises(ValueError):
+        LinkTemplate([("self", "/cars")])
+
+def test_apply_links_modes():
+    """
+    Tests the three ?links= modes: full expands per item, template sends
+    one Link-Template header, none only leaves empty lists.
+    """
+    items = [{"uzsakymo_id": 1, "kliento_id": 2, "automobilio_id": 3}]
+
+    assert apply_links(items, "orders", LinksMode.FULL) == {}
+    assert items[0]["links"][1] == {"rel": "client", "href": "/clients/2"}
+
+    headers = apply_links(items, "orders", LinksMode.TEMPLATE)
+    assert items[0]["links"] == []
+    assert '</orders/{uzsakymo_id}>; rel="self"' in headers["Link-Template"]
+
+    assert apply_links(items, "orders", LinksMode.NONE) == {}
+    assert items[0]["links"] == []
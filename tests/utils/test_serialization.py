@@ -0,0 +1,65 @@
+﻿"""
+Unit tests for the fast JSON serialization helpers.
+
+Description:
+    Tests utils/serialization.py:
+    - dumps() handles Decimal, date and datetime values like pydantic output does.
+    - to_dict() projects ORM objects, Row-like objects and dicts onto schema fields.
+    - FastJSONResponse renders compact JSON with the correct media type.
+
+Usage:
+    pytest tests/utils/test_serialization.py
+"""
+
+import json
+from datetime import date, datetime
+from decimal import Decimal
+from types import SimpleNamespace
+
+from app.schemas.location import LocationOut
+from utils.serialization import FastJSONResponse, dumps, schema_fields, to_dict
+
+def test_dumps_special_types():
+    """
+    Decimal values are encoded as floats, dates and datetimes as ISO strings.
+    """
+    data = json.loads(dumps({
+        "kaina": Decimal("50.00"),
+        "data": date(2025, 12, 31),
+        "laikas": datetime(2024, 6, 1, 10, 30),
+    }))
+    assert data == {"kaina": 50.0, "data": "2025-12-31", "laikas": "2024-06-01T10:30:00"}
+
+def test_schema_fields_order_and_exclude():
+    """
+    schema_fields keeps the declaration order of the schema and skips excluded fields.
+    """
+    assert schema_fields(LocationOut) == ("vietos_id", "pavadinimas", "adresas", "miestas")
+    assert schema_fields(LocationOut, exclude=("adresas",)) == ("vietos_id", "pavadinimas", "miestas")
+
+def test_to_dict_projects_orm_object():
+    """
+    Only the requested fields are copied from an ORM-like object,
+    so internal attributes (e.g. _sa_instance_state, slaptazodis) never leak.
+    """
+    obj = SimpleNamespace(vietos_id=1, pavadinimas="Centras", adresas="Gedimino 1",
+                          miestas="Vilnius", _sa_instance_state=object(), slaptazodis="hash")
+    assert to_dict(obj, schema_fields(LocationOut)) == {
+        "vietos_id": 1, "pavadinimas": "Centras", "adresas": "Gedimino 1", "miestas": "Vilnius"
+    }
+
+def test_to_dict_row_and_dict():
+    """
+    Row-like objects (with _mapping) and dicts are projected the same way.
+    """
+    row = SimpleNamespace(_mapping={"vietos_id": 2, "miestas": "Kaunas", "extra": 1})
+    assert to_dict(row, ("vietos_id", "miestas")) == {"vietos_id": 2, "miestas": "Kaunas"}
+    assert to_dict({"vietos_id": 3}, ("vietos_id", "miestas")) == {"vietos_id": 3, "miestas": None}
+
+def test_fast_json_response():
+    """
+    FastJSONResponse renders compact JSON bytes with application/json media type.
+    """
+    resp = FastJSONResponse([{"id": 1, "kaina": Decimal("9.5")}])
+    assert resp.media_type == "application/json"
+    assert json.loads(resp.body) == [{"id": 1, "kaina": 9.5}]
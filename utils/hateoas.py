@@ -8,7 +8,18 @@ Author: Gabrielė Tamaševičiūtė <gabriele.tamaseviciutes@stud.viko.lt>
 Description:
     Builds standardized HATEOAS-style navigation links for a given resource.
     Supports actions such as update, delete, and update_status.
+
+    List and detail endpoints use the precompiled ``LINK_TEMPLATES`` registry:
+    every href is split into constant parts once at import, so a row only costs
+    one string concatenation per link. With ``?links=none`` links are skipped,
+    with ``?links=template`` they are sent once in the ``Link-Template`` header
+    (RFC 6570 style) for the client to expand.
 """
+from enum import Enum
+from string import Formatter
+
+from fastapi import Query
+
 
 def generate_links(resource: str, resource_id: int, actions: list[str] = None) -> list[dict]:
     """
@@ -40,3 +51,133 @@ def generate_links(resource: str, resource_id: int, actions: list[str] = None) -
             elif action == "update_status":
                 links.append({"rel": "update_status", "href": f"{base_url}/status"})
     return links
+
+
+class LinksMode(str, Enum):
+    """How a read endpoint renders the `links` of its items."""
+    FULL = "full"
+    TEMPLATE = "template"
+    NONE = "none"
+
+
+def links_param(
+    links: LinksMode = Query(
+        LinksMode.FULL,
+        description="full – links per item, template – one Link-Template header, none – no links",
+    ),
+) -> LinksMode:
+    """Shared `?links=` query parameter for read endpoints."""
+    return links
+
+
+class LinkTemplate:
+    """
+    Precompiled set of HATEOAS links for one resource.
+
+    Each href template holds exactly one field, e.g. "/orders/{uzsakymo_id}";
+    the field name is a key of the serialized item.
+    """
+    __slots__ = ("parts", "fields", "header")
+
+    def __init__(self, links: list[tuple[str, str]]):
+        parts = []
+        for rel, href in links:
+            (prefix, field, _, _), *rest = Formatter().parse(href)
+            if field is None or any(name is not None for _, name, _, _ in rest):
+                raise ValueError(f"Link template must contain exactly one field: {href}")
+            suffix = "".join(text for text, _, _, _ in rest)
+            parts.append((rel, prefix, field, suffix))
+        self.parts = tuple(parts)
+        self.fields = tuple(dict.fromkeys(field for _, _, field, _ in parts))
+        self.header = ", ".join(f'<{href}>; rel="{rel}"' for rel, href in links)
+
+    def expand(self, item: dict) -> list[dict]:
+        """
+        Build the links for one serialized item.
+
+        Args:
+            item (dict): Item holding the template fields.
+
+        Returns:
+            list[dict]: Links in the same shape as `generate_links`.
+        """
+        return [
+            {"rel": rel, "href": f"{prefix}{item[field]}{suffix}"}
+            for rel, prefix, field, suffix in self.parts
+        ]
+
+
+def _crud(resource: str, key: str, with_status: bool = False) -> LinkTemplate:
+    """Template equivalent to generate_links(resource, id, ["update", "delete"(, "update_status")])."""
+    base = f"/api/v1/{resource}/{{{key}}}"
+    links = [("self", base), ("update", base), ("delete", base)]
+    if with_status:
+        links.append(("update_status", f"{base}/status"))
+    return LinkTemplate(links)
+
+
+LINK_TEMPLATES: dict[str, LinkTemplate] = {
+    "cars": _crud("cars", "automobilio_id", with_status=True),
+    "clients": _crud("clients", "kliento_id"),
+    "employees": _crud("employees", "darbuotojo_id"),
+    "orders": LinkTemplate([
+        ("self", "/orders/{uzsakymo_id}"),
+        ("client", "/clients/{kliento_id}"),
+        ("car", "/cars/{automobilio_id}"),
+        ("delete", "/orders/{uzsakymo_id}"),
+    ]),
+    "client_orders": LinkTemplate([
+        ("self", "/orders/{uzsakymo_id}"),
+        ("car", "/cars/{automobilio_id}"),
+        ("delete", "/orders/{uzsakymo_id}"),
+    ]),
+    "reservations": LinkTemplate([
+        ("self", "/reservations/{rezervacijos_id}"),
+        ("client", "/clients/{kliento_id}"),
+        ("car", "/cars/{automobilio_id}"),
+    ]),
+    "reservation": LinkTemplate([
+        ("self", "/api/v1/reservations/{rezervacijos_id}"),
+        ("delete", "/api/v1/reservations/{rezervacijos_id}"),
+    ]),
+    "invoices": LinkTemplate([
+        ("self", "/invoices/{invoice_id}"),
+        ("order", "/orders/{order_id}"),
+        ("update_status", "/invoices/{invoice_id}/status"),
+        ("delete", "/invoices/{invoice_id}"),
+    ]),
+    "support": LinkTemplate([
+        ("self", "/support/{uzklausos_id}"),
+        ("client", "/clients/{kliento_id}"),
+        ("employee", "/employees/{darbuotojo_id}"),
+        ("answer", "/support/{uzklausos_id}"),
+        ("delete", "/support/{uzklausos_id}"),
+    ]),
+}
+
+
+def apply_links(data, resource: str, mode: LinksMode = LinksMode.FULL) -> dict:
+    """
+    Fill the `links` field of serialized items according to the requested mode.
+
+    Args:
+        data (dict | list[dict]): One item or a list of items, modified in place.
+        resource (str): Key of LINK_TEMPLATES.
+        mode (LinksMode): full – expand per item; template – empty lists plus
+            a header; none – empty lists.
+
+    Returns:
+        dict: Extra response headers (the `Link-Template` header in template mode).
+    """
+    template = LINK_TEMPLATES[resource]
+    items = data if isinstance(data, list) else (data,)
+    if mode is LinksMode.FULL:
+        expand = template.expand
+        for item in items:
+            item["links"] = expand(item)
+        return {}
+    for item in items:
+        item["links"] = []
+    if mode is LinksMode.TEMPLATE:
+        return {"Link-Template": template.header}
+    return {}
@@ -0,0 +1,113 @@
+"""
+utils/pagination.py
+
+Keyset (cursor) pagination helpers.
+
+Description:
+    Instead of OFFSET, which makes the database read and discard every skipped
+    row, a page continues after the sort key of the last row it returned:
+
+        WHERE (kaina_parai, automobilio_id) > (:last_price, :last_id)
+        ORDER BY kaina_parai, automobilio_id
+        LIMIT :limit + 1
+
+    With an index on the sort columns every page costs the same. The last
+    row values are handed to the client as an opaque cursor (base64url JSON);
+    the next page URL is sent in `X-Next-Cursor` and a `Link: rel="next"` header.
+
+Usage:
+    query = keyset(query, (Car.kaina_parai, Car.automobilio_id), decode_cursor(cursor, columns), descending)
+    rows = query.limit(limit + 1).all()
+    headers = next_page_headers(request, encode_cursor(last_values)) if len(rows) > limit else {}
+"""
+import base64
+import json
+from datetime import date, datetime
+from decimal import Decimal
+
+from fastapi import HTTPException, Request
+from sqlalchemy import tuple_
+
+
+def encode_cursor(values) -> str:
+    """
+    Encode the sort key of the last returned row.
+
+    Args:
+        values (Iterable): Column values (Decimal and dates are stored as strings).
+
+    Returns:
+        str: Opaque URL-safe cursor.
+    """
+    raw = json.dumps([v if isinstance(v, (int, float, str)) or v is None else str(v) for v in values],
+                     separators=(",", ":"))
+    return base64.urlsafe_b64encode(raw.encode()).decode().rstrip("=")
+
+
+def _coerce(column, value):
+    """Convert a cursor value back to the Python type of the column."""
+    python_type = column.type.python_type
+    if value is None or isinstance(value, python_type):
+        return value
+    if python_type in (date, datetime):
+        return python_type.fromisoformat(value)
+    if python_type is Decimal:
+        return Decimal(str(value))
+    return python_type(value)
+
+
+def decode_cursor(cursor: str, columns) -> list:
+    """
+    Decode a cursor created by `encode_cursor` for the given sort columns.
+
+    Args:
+        cursor (str): Value of the `cursor` query parameter.
+        columns (tuple): Sort columns the cursor was created for.
+
+    Returns:
+        list: Values typed like the columns.
+
+    Raises:
+        HTTPException: 400 if the cursor is malformed or does not fit the columns.
+    """
+    try:
+        values = json.loads(base64.urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4)))
+        if not isinstance(values, list) or len(values) != len(columns):
+            raise ValueError("cursor length")
+        return [_coerce(column, value) for column, value in zip(columns, values)]
+    except (ValueError, TypeError, ArithmeticError):
+        raise HTTPException(status_code=400, detail="Invalid cursor")
+
+
+def keyset(query, columns, after=None, descending: bool = False):
+    """
+    Order a query by the sort columns and continue after a cursor position.
+
+    Args:
+        query (Query): Query to paginate.
+        columns (tuple): Sort columns, the last one unique (usually the primary key).
+        after (list, optional): Decoded cursor values.
+        descending (bool): Sort direction of all columns.
+
+    Returns:
+        Query: Ordered (and filtered) query; the caller applies `limit`.
+    """
+    if after is not None:
+        key = tuple_(*columns)
+        query = query.filter(key < tuple_(*after) if descending else key > tuple_(*after))
+    return query.order_by(*(column.desc() if descending else column.asc() for column in columns))
+
+
+def next_page_headers(request: Request, cursor: str) -> dict:
+    """
+    Build the headers pointing to the next page.
+
+    Args:
+        request (Request): Current request (its query parameters are kept).
+        cursor (str): Cursor of the next page.
+
+    Returns:
+        dict: `X-Next-Cursor` and `Link` headers.
+    """
+    url = request.url.include_query_params(cursor=cursor)
+    return {"X-Next-Cursor": cursor, "Link": f'<{url}>; rel="next"'}
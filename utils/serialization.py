@@ -0,0 +1,117 @@
+"""
+utils/serialization.py
+
+Fast JSON serialization helpers for API responses.
+
+Description:
+    Turns SQLAlchemy ORM objects, ``Row`` tuples and plain dicts straight into
+    JSON bytes and wraps them into a ``Response``. When a handler returns such a
+    response FastAPI skips the second validation pass against ``response_model``,
+    while the model itself stays on the route, so the OpenAPI contract is unchanged.
+
+Usage:
+    from utils.serialization import FastJSONResponse, schema_fields, to_dict
+
+    CAR_FIELDS = schema_fields(CarOut, exclude=("lokacija", "links"))
+    return FastJSONResponse([to_dict(car, CAR_FIELDS) for car in cars])
+"""
+import json
+from datetime import date, datetime, time
+from decimal import Decimal
+from functools import lru_cache
+
+from fastapi.responses import Response
+
+try:
+    import orjson
+except ImportError:  # orjson nėra įdiegtas – naudojame standartinį json
+    orjson = None
+
+
+def _default(value):
+    """
+    Convert values the JSON encoder does not know natively.
+
+    Args:
+        value: Value that could not be encoded.
+
+    Returns:
+        A JSON-compatible representation (float for Decimal, ISO string for dates).
+
+    Raises:
+        TypeError: If the value type is not supported.
+    """
+    if isinstance(value, Decimal):
+        return float(value)
+    if isinstance(value, (datetime, date, time)):
+        return value.isoformat()
+    raise TypeError(f"Type {type(value).__name__} is not JSON serializable")
+
+
+def dumps(content) -> bytes:
+    """
+    Encode content into compact UTF-8 JSON bytes.
+
+    Args:
+        content: Lists, dicts and scalars (Decimal/date/datetime are supported).
+
+    Returns:
+        bytes: Encoded JSON document.
+    """
+    if orjson is not None:
+        return orjson.dumps(content, default=_default)
+    return json.dumps(
+        content, default=_default, ensure_ascii=False, separators=(",", ":")
+    ).encode("utf-8")
+
+
+class FastJSONResponse(Response):
+    """
+    JSON response rendered with the fast encoder and without pydantic validation.
+
+    The content must already have the shape of the route's ``response_model``.
+    """
+    media_type = "application/json"
+
+    def render(self, content) -> bytes:
+        return dumps(content)
+
+
+@lru_cache(maxsize=None)
+def schema_fields(schema, exclude: tuple[str, ...] = ()) -> tuple[str, ...]:
+    """
+    Return the output field names of a pydantic schema in declaration order.
+
+    Args:
+        schema: Pydantic model class (e.g. CarOut).
+        exclude (tuple[str, ...]): Fields filled in by the caller (e.g. "links").
+
+    Returns:
+        tuple[str, ...]: Field names, computed once per schema.
+    """
+    return tuple(name for name in schema.model_fields if name not in exclude)
+
+
+def to_dict(obj, fields: tuple[str, ...]) -> dict:
+    """
+    Project an ORM object, a ``Row`` tuple or a dict onto the given fields.
+
+    Only the listed fields are copied, so internal attributes such as
+    ``_sa_instance_state`` or password hashes never reach the response.
+
+    Args:
+        obj: SQLAlchemy model instance, ``Row`` or dict.
+        fields (tuple[str, ...]): Field names to copy.
+
+    Returns:
+        dict: New dictionary with exactly the given keys.
+    """
+    if isinstance(obj, dict):
+        return {name: obj.get(name) for name in fields}
+    if getattr(obj, "_fields", None) == fields:
+        # Projekcijos eilutė su tais pačiais stulpeliais – užtenka zip
+        return dict(zip(fields, obj))
+    mapping = getattr(obj, "_mapping", None)
+    if mapping is not None:
+        return {name: mapping.get(name) for name in fields}
+    return {name: getattr(obj, name, None) for name in fields}